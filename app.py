@@ -5,9 +5,15 @@ import json
 import os
 import plotly.graph_objects as go
 import engine
+import metrics
+from cache import RefreshingCache
 
 CONFIG_FILE = "config.json"
 
+# 소스별 캐시 유효 시간(초): 만료 후에는 이전 값을 보여주면서 백그라운드에서 갱신
+INDICES_TTL = 60
+NEWS_TTL = 600
+
 def load_config():
     if os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE, "r", encoding="utf-8") as f:
@@ -22,6 +28,18 @@ def save_config(config_data):
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
         json.dump(config_data, f, indent=4, ensure_ascii=False)
 
+@st.cache_resource
+def get_data_caches():
+    """모든 접속 세션이 공유하는 프로세스 전역 데이터 캐시 (지수, 뉴스)"""
+    caches = {
+        "indices": RefreshingCache(engine.get_global_indices, ttl=INDICES_TTL, name="지수"),
+        "news": RefreshingCache(engine.get_latest_news, ttl=NEWS_TTL, name="뉴스"),
+    }
+    # 첫 접속 시 두 소스를 동시에 받아오도록 미리 백그라운드 로딩 시작
+    for data_cache in caches.values():
+        data_cache.refresh()
+    return caches
+
 # 페이지 기본 설정
 st.set_page_config(
     page_title="프리미엄 주식 분석 & AI 타점 어드바이저",
@@ -31,6 +49,7 @@ st.set_page_config(
 
 def main():
     config = load_config()
+    data_caches = get_data_caches()
     
     # CSS 인젝션 (Shadcn/ui 라이트모드 모던 디자인)
     st.markdown("""
@@ -299,14 +318,19 @@ def main():
     st.markdown("<div class='custom-section-title'>오늘의 주요 증시 현황</div>", unsafe_allow_html=True)
     
     try:
-        indices = engine.get_global_indices()
+        indices = data_caches["indices"].get()
         if indices:
-            i_cols = st.columns(4)
+            # 지수가 4개를 넘으면 4개씩 줄을 나눠 표시
+            i_cols = []
+            for _ in range(0, len(indices), 4):
+                i_cols.extend(st.columns(4))
             for idx, (col, (name, data)) in enumerate(zip(i_cols, indices.items())):
                 with col:
                     diff_val = data['diff']
                     pct_val = data['pct']
                     history = data.get('history', [])
+                    # 최신 조회에 실패해 이전 값을 보여주는 경우 표시
+                    stale_mark = " <span style='color:#d97706; font-size:0.75rem;'>(지연)</span>" if data.get('stale') else ""
                     
                     # 상승은 빨간색, 하락은 파란색 (한국 증시 기준)
                     if diff_val > 0:
@@ -350,7 +374,7 @@ def main():
                         
                     st.markdown(f"""
 <div style="background-color: #ffffff; border: 1px solid #e2e8f0; border-radius: 0.5rem; padding: 1.25rem; box-shadow: 0 1px 2px 0 rgba(0, 0, 0, 0.05); height: 100%;">
-    <div style="font-size: 0.875rem; color: #64748b; font-weight: 500; margin-bottom: 0.25rem;">{name}</div>
+    <div style="font-size: 0.875rem; color: #64748b; font-weight: 500; margin-bottom: 0.25rem;">{name}{stale_mark}</div>
     <div style="font-size: 1.5rem; font-weight: 700; color: #0f172a; margin-bottom: 0.25rem;">{data['close']:,.2f}</div>
     <div style="font-size: 0.875rem; font-weight: 600; color: {color_hex};">
         {arrow} {abs(diff_val):,.2f} ({pct_val:+.2f}%)
@@ -391,18 +415,32 @@ def main():
         
         progress_bar = st.progress(0)
         status_text = st.empty()
-        
-        def update_progress(current, total, current_ticker_name):
+        top_box = st.empty()    # 스캔 도중 현재까지의 상위 종목
+        table_box = st.empty()  # 스캔 도중 현재까지의 결과 표
+
+        # 종목이 끝나는 대로 결과를 받아 표와 상위 종목을 바로바로 갱신
+        stream = engine.iter_scan_hot_stocks(limit=30, workers=engine.SCAN_WORKERS, max_rps=engine.SCAN_MAX_RPS)
+        for current, total, current_ticker_name, rows in stream:
             percent = int((current / total) * 100)
             progress_bar.progress(percent)
             status_text.text(f"스캔 중... {current}/{total} (분석 중: {current_ticker_name})")
-            
-        df = engine.scan_hot_stocks(limit=30, progress_callback=update_progress)
-        
+
+            if rows:
+                best = " &nbsp;|&nbsp; ".join(f"<b>{r['종목명']}</b> {r['적합도 점수']}점" for r in stream.top())
+                top_box.markdown(f"<div class='legend-banner'>🏆 현재까지 상위 종목: {best}</div>", unsafe_allow_html=True)
+                partial = stream.to_frame()
+                table_box.dataframe(
+                    partial[['종목코드', '종목명', '현재가(원)', '등락률(%)', '시가총액(억)', '적합도 점수', '조건만족']],
+                    use_container_width=True,
+                    hide_index=True
+                )
+
         progress_bar.empty()
         status_text.empty()
-        
-        st.session_state['search_result'] = df
+        top_box.empty()
+        table_box.empty()
+
+        st.session_state['search_result'] = stream.to_frame()
         st.rerun()
             
     if 'search_result' in st.session_state:
@@ -466,20 +504,27 @@ def main():
                 
                 st.markdown("<br>", unsafe_allow_html=True)
                 
-                chart_df_d = target_row['_chart_df']
-                chart_df_w = target_row.get('_chart_w', pd.DataFrame())
-                chart_df_m = target_row.get('_chart_m', pd.DataFrame())
+                # 선택한 종목의 차트만 필요할 때 생성 (엔진의 공유 LRU 캐시 사용, 실패는 캐시되지 않아 다음 선택 때 다시 시도)
+                try:
+                    payload = engine.get_chart_payload(target_row['_handle'])
+                except Exception as e:
+                    payload = None
+                    st.warning(f"차트 데이터를 불러오지 못했습니다. 잠시 후 다시 선택해 주세요. ({e})")
                 
-                if not chart_df_d.empty:
+                if payload is not None:
+                    chart_df_d = payload['daily']
+                    chart_df_w = payload['weekly']
+                    chart_df_m = payload['monthly']
                     tab_daily, tab_weekly, tab_monthly = st.tabs(["일봉 차트", "주봉 차트", "월봉 차트"])
                     
-                    def create_candlestick(df_data, show_ma=False):
+                    def create_candlestick(bars, show_ma=False):
+                        # bars: engine.get_chart_payload가 돌려준 정수 배열 일봉(Bars)
                         fig = go.Figure()
                         fig.add_trace(go.Candlestick(
-                            x=df_data.index, open=df_data['Open'], high=df_data['High'], low=df_data['Low'], close=df_data['Close'], name='가격'
+                            x=bars.dates, open=bars.open, high=bars.high, low=bars.low, close=bars.close, name='가격'
                         ))
-                        if show_ma and 'MA20' in df_data.columns:
-                            fig.add_trace(go.Scatter(x=df_data.index, y=df_data['MA20'], line=dict(color='#F59E0B', width=2), name='20일 이평선'))
+                        if show_ma:
+                            fig.add_trace(go.Scatter(x=bars.dates, y=bars.ma(20), line=dict(color='#F59E0B', width=2), name='20일 이평선'))
                         
                         fig.update_layout(
                             xaxis_rangeslider_visible=False,
@@ -521,13 +566,39 @@ def main():
             * **+알파 [펀더멘털]:** 영업이익 10억 이상 & 시가총액 500억 이상
             """
         )
+    
+    with st.expander("🔧 스캔 성능 진단 (단계별 소요 시간 / 캐시 적중)"):
+        # 계측기는 서버 프로세스 전체(모든 접속 세션)가 공유하며, 초기화 이후 누적값을 보여줌
+        report = metrics.get_metrics().report()
+        st.caption(f"집계 시작: {report['started_at']} (경과 {report['elapsed_sec']:.0f}초)")
+        if report["stages"]:
+            stage_df = pd.DataFrame.from_dict(report["stages"], orient="index")
+            stage_df.index.name = "단계"
+            st.dataframe(stage_df, use_container_width=True)
+        else:
+            st.info("아직 기록된 스캔이 없습니다.")
+        
+        counters = dict(report["counters"])
+        chart_cache = engine.get_chart_payload.cache_info()
+        counters["chart_cache.hit"] = chart_cache.hits
+        counters["chart_cache.miss"] = chart_cache.misses
+        st.dataframe(pd.DataFrame(list(counters.items()), columns=["항목", "값"]), use_container_width=True, hide_index=True)
+        
+        col_json, col_reset = st.columns(2)
+        with col_json:
+            st.download_button("JSON 보고서 받기", json.dumps(report, indent=2, ensure_ascii=False),
+                               file_name="scan_metrics.json", mime="application/json")
+        with col_reset:
+            if st.button("진단 기록 초기화"):
+                metrics.get_metrics().reset()
+                st.rerun()
         
     st.markdown("<br>", unsafe_allow_html=True)
     
     # 5. 주요 뉴스 연동
     st.markdown("<div class='custom-section-title'>🌍 테마별 핵심 뉴스 브리핑</div>", unsafe_allow_html=True)
     with st.spinner("최신 글로벌 뉴스를 실시간으로 수집 중입니다..."):
-        news_data = engine.get_latest_news()
+        news_data = data_caches["news"].get()
         
     if news_data:
         tabs = st.tabs(list(news_data.keys()))
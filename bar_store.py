@@ -0,0 +1,239 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import metrics
+import providers
+from bars import Bars
+
+# 로컬 캐시 폴더 (GitHub Actions에서는 actions/cache로 실행 간 유지)
+CACHE_DIR = os.environ.get("STOCK_CACHE_DIR", ".cache")
+DB_FILE = "bars.sqlite"
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 수정주가 반영 등으로 과거 봉이 바뀌었는지 비교할 때의 허용 오차
+REVISION_TOLERANCE = 1e-6
+
+# 마지막 수집 후 이 시간(초) 이내의 재요청은 네트워크 조회 없이 저장된 봉으로 응답
+REFRESH_INTERVAL = 60
+
+# 봉 보관 기간(일): 쓸 때마다 이보다 오래된 봉을 지움 (가장 긴 조회 창인 load_history 150일 + 지난 스캔 차트용 여유)
+# 0이면 지우지 않음, 스윕처럼 더 긴 구간을 요청하면 그 요청 구간은 남겨 둠
+RETENTION_DAYS = int(os.environ.get("STOCK_BAR_RETENTION_DAYS", 180))
+
+
+class BarStore:
+    """
+    종목별 일봉(OHLCV)을 SQLite 파일에 저장해 두고,
+    마지막 저장일 이후의 봉만 추가로 받아오는(증분 수집) 로컬 저장소입니다.
+    """
+
+    def __init__(self, path=None, fetcher=None, retention_days=RETENTION_DAYS):
+        self.path = path or os.path.join(CACHE_DIR, DB_FILE)
+        # fetcher(ticker, start, end) -> DataFrame (기본값: providers.get_provider().daily_bars)
+        self.fetcher = fetcher
+        self.retention_days = retention_days
+        self.stats = {"full": 0, "delta": 0, "revised": 0, "rows": 0, "trimmed": 0}
+        self._stats_lock = threading.Lock()
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        # 스레드/프로세스마다 별도 커넥션을 열어 동시 접근 시에도 안전하게 사용
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    ticker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume INTEGER,
+                    PRIMARY KEY (ticker, date)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    ticker TEXT PRIMARY KEY,
+                    covered_from TEXT NOT NULL,
+                    last_date TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL
+                )
+            """)
+
+    def _fetch(self, ticker, start, end, limiter=None):
+        if limiter is not None:
+            limiter.acquire()
+        fetcher = self.fetcher or providers.get_provider().daily_bars
+        try:
+            with metrics.timer("fetch"):
+                df = fetcher(ticker, start, end)
+        except Exception:
+            metrics.incr("fetch.error")
+            raise
+        metrics.incr("fetch.rows", len(df))
+        with self._stats_lock:
+            self.stats["rows"] += len(df)
+        return df
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+        metrics.incr(f"bar_store.{key}")
+
+    def _read_meta(self, conn, ticker):
+        row = conn.execute(
+            "SELECT covered_from, last_date, fetched_at FROM meta WHERE ticker = ?", (ticker,)
+        ).fetchone()
+        return row
+
+    def _read_rows(self, conn, ticker, start, end):
+        return conn.execute(
+            "SELECT date, open, high, low, close, volume FROM bars "
+            "WHERE ticker = ? AND date >= ? AND date <= ? ORDER BY date",
+            (ticker, start, end)
+        ).fetchall()
+
+    def _write(self, conn, ticker, df, covered_from, keep_from, replace=False):
+        if replace:
+            conn.execute("DELETE FROM bars WHERE ticker = ?", (ticker,))
+        rows = [
+            (ticker, idx.strftime('%Y-%m-%d'),
+             float(r.Open), float(r.High), float(r.Low), float(r.Close),
+             int(r.Volume) if pd.notna(r.Volume) else 0)  # 지수/환율은 거래량이 비어 있을 수 있음
+            for idx, r in zip(df.index, df[BAR_COLUMNS].itertuples(index=False))
+        ]
+        conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+        # covered_from은 실제 첫 봉이 아니라 '요청했던 시작일' (휴일/상장일 때문에 매번 전체 조회되는 것 방지)
+        last_date = conn.execute("SELECT MAX(date) FROM bars WHERE ticker = ?", (ticker,)).fetchone()[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?)",
+            (ticker, covered_from, last_date, datetime.now().isoformat(timespec='seconds'))
+        )
+        self._trim(conn, ticker, keep_from)
+
+    def _trim(self, conn, ticker, keep_from):
+        """
+        보관 기간(retention_days)보다 오래된 봉을 지우고 covered_from을 지운 만큼 당깁니다. (keep_from 이후 봉은 유지)
+        covered_from이 같이 바뀌므로 나중에 지운 구간을 다시 요청하면 전체 조회로 채워집니다.
+        """
+        if not self.retention_days:
+            return
+        cutoff = min((datetime.now() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d'), keep_from)
+        deleted = conn.execute("DELETE FROM bars WHERE ticker = ? AND date < ?", (ticker, cutoff)).rowcount
+        conn.execute("UPDATE meta SET covered_from = ? WHERE ticker = ? AND covered_from < ?", (cutoff, ticker, cutoff))
+        if deleted > 0:
+            with self._stats_lock:
+                self.stats["trimmed"] += deleted
+            metrics.incr("bar_store.trimmed", deleted)
+
+    @staticmethod
+    def _to_frame(rows):
+        df = pd.DataFrame(rows, columns=['Date'] + BAR_COLUMNS)
+        df['Date'] = pd.to_datetime(df['Date'])
+        df = df.set_index('Date')
+        df['Volume'] = df['Volume'].astype('int64')
+        return df
+
+    def _result(self, rows, ticker, as_bars):
+        return Bars.from_rows(rows, ticker) if as_bars else self._to_frame(rows)
+
+    @staticmethod
+    def _is_revised(stored, fetched):
+        """저장된 기준봉과 새로 받은 같은 날짜의 봉이 다르면 과거 데이터가 수정된 것으로 판단합니다."""
+        for col in BAR_COLUMNS:
+            a, b = float(stored[col]), float(fetched[col])
+            if abs(a - b) > REVISION_TOLERANCE * max(1.0, abs(a)):
+                return True
+        return False
+
+    def load(self, ticker, start, end, limiter=None, refresh=True, as_bars=False):
+        """
+        start~end 구간의 일봉을 리턴합니다.
+        저장소에 없는 구간은 전체 조회, 이미 있는 종목은 마지막 저장일 이후 봉만 조회해 덧붙입니다.
+        limiter(throttle.RateLimiter)를 주면 실제 네트워크 조회마다 토큰을 소모합니다.
+        업스트림 조회가 실패하면 빈 DataFrame이 아니라 providers.DataFetchError를 던집니다.
+        as_bars=True 이면 DataFrame 대신 정수 배열 기반 Bars로 리턴합니다. (종목 시세 전용, 지수는 DataFrame)
+        refresh=False 이면 저장된 봉이 있는 한 네트워크 조회 없이 그대로 리턴합니다. (스캔 당시 데이터로 차트 재구성 등)
+        """
+        start_s = pd.Timestamp(start).strftime('%Y-%m-%d')
+        end_s = pd.Timestamp(end).strftime('%Y-%m-%d')
+
+        with self._connect() as conn:
+            meta = self._read_meta(conn, ticker)
+
+            if meta is None or meta[0] > start_s:
+                # 저장된 적이 없거나 더 과거 구간이 필요하면 전체 조회 후 교체
+                df = self._fetch(ticker, start, end, limiter)
+                self._count("full")
+                if not df.empty:
+                    self._write(conn, ticker, df, start_s, start_s, replace=True)
+                return self._result(self._read_rows(conn, ticker, start_s, end_s), ticker, as_bars)
+
+            covered_from, last_date, fetched_at = meta
+            recently = (datetime.now() - datetime.fromisoformat(fetched_at)).total_seconds() < REFRESH_INTERVAL
+            if end_s < last_date or recently or not refresh:
+                # 과거 시점 조회이거나 방금 수집했다면 이미 저장된 봉으로 충분
+                metrics.incr("bar_store.hit")
+                return self._result(self._read_rows(conn, ticker, start_s, end_s), ticker, as_bars)
+
+            # 마지막 두 봉을 겹쳐서 조회: 직전 봉은 확정봉(비교 기준), 마지막 봉은 장중 갱신분일 수 있음
+            tail = conn.execute(
+                "SELECT date, open, high, low, close, volume FROM bars "
+                "WHERE ticker = ? ORDER BY date DESC LIMIT 2",
+                (ticker,)
+            ).fetchall()
+            anchor = self._to_frame(tail[-1:]).iloc[0]
+            anchor_date = anchor.name
+
+            delta = self._fetch(ticker, anchor_date, end, limiter)
+            self._count("delta")
+
+            if delta.empty:
+                # 업스트림 응답이 없으면 저장된 데이터로 대체
+                return self._result(self._read_rows(conn, ticker, start_s, end_s), ticker, as_bars)
+
+            if anchor_date not in delta.index or self._is_revised(anchor, delta.loc[anchor_date]):
+                # 수정주가(액면분할, 권리락 등)로 과거 봉이 바뀜 -> 전체 다시 조회
+                self._count("revised")
+                df = self._fetch(ticker, covered_from, end, limiter)
+                if not df.empty:
+                    self._write(conn, ticker, df, covered_from, start_s, replace=True)
+            else:
+                self._write(conn, ticker, delta, covered_from, start_s)
+
+            return self._result(self._read_rows(conn, ticker, start_s, end_s), ticker, as_bars)
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_store():
+    """프로세스 전역에서 공유하는 기본 BarStore 인스턴스를 리턴합니다."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = BarStore()
+        return _default_store
+
+
+def load_bars(ticker, start, end, limiter=None, refresh=True, as_bars=False):
+    """기본 저장소를 통해 일봉을 조회합니다. (fdr.DataReader 대체용)"""
+    return get_store().load(ticker, start, end, limiter, refresh, as_bars)
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# 날짜는 이 날부터의 일수(int32)로 보관
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def _to_won(values, name):
+    """가격 배열을 int32 원 단위로 바꿉니다. 정수가 아니거나 비어 있거나 범위를 넘으면 ValueError"""
+    values = np.asarray(values, dtype=float)
+    if len(values) and (np.isnan(values).any() or np.abs(values - np.rint(values)).max() > 1e-6
+                        or np.abs(values).max() > INT32_MAX):
+        raise ValueError(f"{name}: 정수 원 단위 가격만 담을 수 있습니다.")
+    return np.rint(values).astype(np.int32)
+
+
+class Bars:
+    """
+    한 종목의 일봉을 정수 배열로 담는 작은 컨테이너입니다.
+    KRX 가격은 원 단위 정수이므로 가격은 int32, 거래량은 int64, 날짜는 1970-01-01부터의 일수(int32)로 보관해
+    봉당 28바이트만 씁니다. (float64 DataFrame은 봉당 48바이트에 인덱스/블록 관리 오버헤드가 더 붙음)
+    engine.score_history, resample_chart_frames, panel.Panel.from_frames, IndicatorState가 DataFrame 대신 그대로 받습니다.
+    지수/환율처럼 소수점이 있는 시세는 담을 수 없으므로 DataFrame을 그대로 쓰세요.
+    """
+
+    __slots__ = ('ticker', 'days', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, ticker, days, open_, high, low, close, volume):
+        self.ticker = ticker
+        self.days = days
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_arrays(cls, ticker, dates, open_, high, low, close, volume):
+        """날짜(datetime64/문자열)와 OHLCV 배열로 만듭니다."""
+        days = (np.asarray(dates, dtype='datetime64[D]') - EPOCH).astype(np.int32)
+        volume = np.nan_to_num(np.asarray(volume, dtype=float)).astype(np.int64)  # 거래량이 빈 봉은 0
+        return cls(ticker, days, _to_won(open_, 'Open'), _to_won(high, 'High'), _to_won(low, 'Low'),
+                   _to_won(close, 'Close'), volume)
+
+    @classmethod
+    def from_frame(cls, df, ticker=None):
+        """OHLCV DataFrame(날짜 인덱스)으로 만듭니다."""
+        return cls.from_arrays(ticker, df.index.values, *(df[col].values for col in COLUMNS))
+
+    @classmethod
+    def from_rows(cls, rows, ticker=None):
+        """(날짜 문자열, 시가, 고가, 저가, 종가, 거래량) 행 리스트(bar_store 조회 결과)로 만듭니다."""
+        if not rows:
+            return cls.from_arrays(ticker, [], [], [], [], [], [])
+        dates, open_, high, low, close, volume = zip(*rows)
+        return cls.from_arrays(ticker, dates, open_, high, low, close, volume)
+
+    def __len__(self):
+        return len(self.days)
+
+    def __repr__(self):
+        if not len(self):
+            return f"Bars({self.ticker}, 0봉)"
+        return f"Bars({self.ticker}, {len(self)}봉, {self.dates[0].date()}~{self.dates[-1].date()})"
+
+    @property
+    def empty(self):
+        return len(self.days) == 0
+
+    @property
+    def nbytes(self):
+        """배열이 차지하는 바이트 수"""
+        return sum(getattr(self, name).nbytes for name in ('days', 'open', 'high', 'low', 'close', 'volume'))
+
+    @property
+    def dates(self):
+        """봉 날짜 DatetimeIndex"""
+        return pd.DatetimeIndex(self.datetimes().astype('datetime64[ns]'), name='Date')
+
+    def datetimes(self):
+        """봉 날짜 datetime64[D] 배열"""
+        return EPOCH + self.days.astype('timedelta64[D]')
+
+    def column(self, name):
+        """'Open'/'High'/'Low'/'Close'/'Volume' 컬럼 배열"""
+        if name not in COLUMNS:
+            raise KeyError(name)
+        return getattr(self, name.lower())
+
+    def _take(self, index):
+        return Bars(self.ticker, self.days[index], self.open[index], self.high[index], self.low[index],
+                    self.close[index], self.volume[index])
+
+    def tail(self, n):
+        return self._take(slice(max(0, len(self) - n), None))
+
+    def locate(self, date):
+        """date 봉의 위치 (없으면 -1)"""
+        day = (np.datetime64(pd.Timestamp(date).date(), 'D') - EPOCH).astype(np.int32)
+        pos = int(np.searchsorted(self.days, day))
+        return pos if pos < len(self) and self.days[pos] == day else -1
+
+    def since(self, date):
+        """date 이후(같은 날 포함) 봉만 남긴 Bars"""
+        day = (np.datetime64(pd.Timestamp(date).date(), 'D') - EPOCH).astype(np.int32)
+        return self._take(slice(int(np.searchsorted(self.days, day)), None))
+
+    def ma(self, window):
+        """종가 이동평균 배열 (앞쪽 window-1개는 NaN, pandas rolling(window).mean()과 같은 위치)"""
+        result = np.full(len(self), np.nan)
+        if len(self) >= window:
+            sums = np.cumsum(np.concatenate([[0], self.close.astype(np.int64)]))
+            result[window - 1:] = (sums[window:] - sums[:-window]) / window
+        return result
+
+    def resample(self, rule):
+        """
+        주봉('W', 금요일 기준 주) 또는 월봉('M', 월말 기준)으로 묶은 Bars를 리턴합니다.
+        DataFrame.resample('W-Fri'/'M').agg(first/max/min/last/sum).dropna()와 같은 결과입니다.
+        """
+        if rule == 'W':
+            # 1970-01-01은 목요일: (일수 + 3) % 7 이 월요일 0 ~ 일요일 6
+            labels = self.days + (4 - (self.days + 3) % 7) % 7
+        elif rule == 'M':
+            months = self.datetimes().astype('datetime64[M]')
+            labels = ((months + 1).astype('datetime64[D]') - 1 - EPOCH).astype(np.int32)
+        else:
+            raise ValueError(f"지원하지 않는 주기: {rule} ('W' 또는 'M')")
+        if self.empty:
+            return self._take(slice(0, 0))
+
+        starts = np.flatnonzero(np.concatenate([[True], labels[1:] != labels[:-1]]))
+        ends = np.concatenate([starts[1:], [len(self)]]) - 1
+        return Bars(self.ticker, labels[starts].astype(np.int32), self.open[starts],
+                    np.maximum.reduceat(self.high, starts), np.minimum.reduceat(self.low, starts),
+                    self.close[ends], np.add.reduceat(self.volume, starts))
+
+    def to_frame(self):
+        """float64 가격의 OHLCV DataFrame으로 바꿉니다. (기존 DataFrame 기반 코드와 같은 형태)"""
+        return pd.DataFrame({
+            'Open': self.open.astype(float), 'High': self.high.astype(float), 'Low': self.low.astype(float),
+            'Close': self.close.astype(float), 'Volume': self.volume
+        }, index=self.dates)
@@ -0,0 +1,231 @@
+"""
+네트워크 없이 합성 데이터(synthetic.py)로 스캔/차트/뉴스 경로의 성능을 재는 벤치마크입니다.
+
+    python benchmark.py                       # 50, 500, 2,500종목 스캔 + run_strategy + 뉴스 측정, 기준값과 비교
+    python benchmark.py --sizes 50 500 --save # 결과를 기준값 파일로 저장
+    python benchmark.py --latency 0.05        # 시세 조회마다 50ms 지연을 넣어 네트워크 대기 흉내
+
+종목 수별로 빈 저장소에서 시작하는 cold 스캔과 저장소가 채워진 warm 스캔의 초당 종목 수,
+종목당 지연 백분위(p50/p90/p99, ms), tracemalloc 최대 메모리(MB)를 출력합니다.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+BASELINE_FILE = os.path.join("benchmarks", "baseline.json")
+DEFAULT_SIZES = [50, 500, 2500]
+
+# 기준값 대비 이 비율 이상 나빠지면 '느려짐'으로 표시
+REGRESSION_THRESHOLD = 0.10
+
+
+def _percentiles(values):
+    """초 단위 지연 리스트 -> {"p50", "p90", "p99"} (ms)"""
+    if not values:
+        return None
+    arr = np.array(values) * 1000
+    return {f"p{q}": round(float(np.percentile(arr, q)), 3) for q in (50, 90, 99)}
+
+
+class _LatencyRecorder:
+    """모듈 함수를 감싸 호출마다 걸린 시간을 기록합니다. (with 블록을 벗어나면 원래 함수로 복구)"""
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self.values = []
+
+    def __enter__(self):
+        original = self.original = getattr(self.module, self.name)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.values.append(time.perf_counter() - started)
+
+        setattr(self.module, self.name, timed)
+        return self
+
+    def __exit__(self, *exc):
+        setattr(self.module, self.name, self.original)
+
+
+def _scan_once(engine, n, workers, vectorized, trace_memory=False):
+    # 종목별 채점(score_ticker) 또는 패널 모드의 종목별 일봉 조회(_safe_history) 지연을 잼
+    target = "_safe_history" if vectorized else "score_ticker"
+    with _LatencyRecorder(engine, target) as recorder:
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        df = engine.scan_hot_stocks(limit=n, workers=workers, vectorized=vectorized)
+        elapsed = time.perf_counter() - started
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+
+    return {
+        "seconds": round(elapsed, 3),
+        "tickers_per_sec": round(n / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": _percentiles(recorder.values),
+        "peak_mb": round(peak, 1) if peak is not None else None,
+        # 결과가 바뀌지 않았는지 확인용 (같은 시드면 항상 같아야 함)
+        "result_rows": len(df),
+        "score_sum": round(float(df['적합도 점수'].sum()), 1) if not df.empty else 0.0,
+    }
+
+
+def bench_scan(engine, bar_store, market, root, n, workers, vectorized):
+    """n종목 스캔: 빈 저장소(cold) -> 채워진 저장소(warm) -> warm + 메모리 측정"""
+    # 종목 수마다 새 저장소로 시작해 cold 측정이 이전 측정의 영향을 받지 않게 함
+    bar_store._default_store = bar_store.BarStore(os.path.join(root, f"bars_{n}_{int(vectorized)}.sqlite"))
+    reads = market.calls["reader"]
+    cold = _scan_once(engine, n, workers, vectorized)
+    cold["fetches"] = market.calls["reader"] - reads
+    warm = _scan_once(engine, n, workers, vectorized)
+    memory = _scan_once(engine, n, workers, vectorized, trace_memory=True)
+    warm["peak_mb"] = memory["peak_mb"]
+    return {"cold": cold, "warm": warm}
+
+
+def bench_run_strategy(engine, tickers):
+    """차트 경로(run_strategy: 채점 + 주/월봉 리샘플링) 종목당 지연 (저장소가 채워진 상태)"""
+    latencies = []
+    for tk in tickers:
+        started = time.perf_counter()
+        engine.run_strategy(tk)
+        latencies.append(time.perf_counter() - started)
+    return {"calls": len(tickers), "latency_ms": _percentiles(latencies)}
+
+
+def bench_news(news, synthetic, rounds):
+    """로컬 RSS 서버로 get_latest_news 지연 측정 (첫 회는 전체 수신, 이후는 ETag 304 경로)"""
+    server = synthetic.start_rss_server()
+    original_url = news.NEWS_URL
+    news.NEWS_URL = f"http://127.0.0.1:{server.server_port}/rss/search"
+    try:
+        latencies = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            news.get_latest_news()
+            latencies.append(time.perf_counter() - started)
+    finally:
+        news.NEWS_URL = original_url
+        server.shutdown()
+    return {"rounds": rounds, "first_ms": round(latencies[0] * 1000, 3), "latency_ms": _percentiles(latencies[1:])}
+
+
+def _flatten(results, prefix=""):
+    """비교용으로 {"scan.scalar.50.warm.tickers_per_sec": 값, ...} 형태로 펼칩니다."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline):
+    """기준값과 비교해 지표별 변화율을 출력합니다. 처리량은 높을수록, 지연/메모리는 낮을수록 좋음"""
+    now, base = _flatten(results), _flatten(baseline.get("results", {}))
+    print(f"\n[기준값 비교] ({baseline.get('meta', {}).get('created_at', '?')} 기준)")
+    for name in sorted(now):
+        if name not in base or not base[name]:
+            continue
+        if not (name.endswith("tickers_per_sec") or ".latency_ms." in name or name.endswith("peak_mb")):
+            if name.endswith("result_rows") or name.endswith("score_sum"):
+                if now[name] != base[name]:
+                    print(f"  ! {name}: {base[name]} -> {now[name]} (결과가 달라짐)")
+            continue
+        change = (now[name] - base[name]) / base[name]
+        worse = -change if name.endswith("tickers_per_sec") else change
+        mark = "느려짐" if worse > REGRESSION_THRESHOLD else ("빨라짐" if worse < -REGRESSION_THRESHOLD else "")
+        print(f"  {name}: {base[name]} -> {now[name]} ({change * 100:+.1f}%) {mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 데이터 오프라인 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="스캔 종목 수 (기본: 50 500 2500)")
+    parser.add_argument("--seed", type=int, default=42, help="합성 시장 시드")
+    parser.add_argument("--latency", type=float, default=0.0, help="시세 조회 한 번의 가짜 네트워크 지연(초)")
+    parser.add_argument("--workers", type=int, default=None, help="스캔 동시 작업 스레드 수 (기본: engine.SCAN_WORKERS)")
+    parser.add_argument("--modes", nargs="+", default=["scalar", "panel"], choices=["scalar", "panel"],
+                        help="scalar: 종목별 채점, panel: 패널 엔진(vectorized=True)")
+    parser.add_argument("--news-rounds", type=int, default=5, help="뉴스 수집 반복 횟수 (0이면 생략)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="기준값 파일 경로")
+    parser.add_argument("--save", action="store_true", help="이번 결과를 기준값 파일로 저장")
+    args = parser.parse_args()
+
+    # 저장소/캐시 경로는 모듈을 불러올 때 정해지므로 임시 폴더를 먼저 지정한 뒤 불러옴
+    root = tempfile.mkdtemp(prefix="stock_bench_")
+    os.environ["STOCK_CACHE_DIR"] = root
+    import synthetic
+    market = synthetic.SyntheticMarket(n_tickers=max(args.sizes) + 100, seed=args.seed, latency=args.latency)
+    market.install()
+    import bar_store
+    import engine
+    import news
+    import translation
+    translation.GoogleTranslator = synthetic.OfflineTranslator
+
+    workers = args.workers or engine.SCAN_WORKERS
+    results = {"scan": {}}
+    try:
+        engine.get_candidate_tickers()  # 상장 목록은 측정에서 제외 (universe 캐시에 올려 둠)
+        for mode in args.modes:
+            results["scan"][mode] = {}
+            for n in args.sizes:
+                r = bench_scan(engine, bar_store, market, root, n, workers, mode == "panel")
+                results["scan"][mode][str(n)] = r
+                print(f"[scan/{mode}] {n}종목: cold {r['cold']['tickers_per_sec']}/s, "
+                      f"warm {r['warm']['tickers_per_sec']}/s, 지연 {r['warm']['latency_ms']}, "
+                      f"최대 메모리 {r['warm']['peak_mb']}MB, 결과 {r['warm']['result_rows']}건")
+
+        sample = list(engine.get_candidate_tickers().index)[:min(args.sizes)]
+        results["run_strategy"] = bench_run_strategy(engine, sample)
+        print(f"[run_strategy] {results['run_strategy']}")
+
+        if args.news_rounds > 0:
+            results["news"] = bench_news(news, synthetic, args.news_rounds)
+            print(f"[news] {results['news']}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        compare(results, baseline)
+
+    if args.save:
+        folder = os.path.dirname(args.baseline)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        meta = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "latency": args.latency,
+            "workers": workers,
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n기준값 저장: {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,165 @@
+import argparse
 import json
 import os
-from datetime import datetime
+import time
+from datetime import datetime, time as dtime
 import pandas as pd
 import engine
+import market_calendar
+import metrics
 import notifier
+import outbox
 
-def main():
+# 알림 기준 점수 (투자 적기)
+ALERT_SCORE = 70
+
+# 스캔이 끝나기 전이라도 바로 텔레그램으로 알릴 점수
+EARLY_ALERT_SCORE = 90
+
+# 조기 알림: 첫 종목이 나온 뒤 이 시간(초) 동안 나온 종목까지 모아 메시지 한 통으로 보냄 (실행마다 한 번),
+# 메시지 한 통에 나열하는 최대 종목 수
+EARLY_ALERT_WINDOW = 30
+EARLY_ALERT_MAX_ROWS = 10
+
+# 데몬 모드 실행 시각 (KST, 거래일만): 오전 11시, 오후 1시, 장 마감 15:30
+RUN_TIMES = [dtime(11, 0), dtime(13, 0), dtime(15, 30)]
+
+# 데몬 대기 중 시계를 다시 확인하는 최대 간격(초) - 절전/시계 변경 후에도 실행 시각을 놓치지 않도록
+DAEMON_POLL = 300
+
+# 실행마다 덮어쓰는 단계별 소요 시간/캐시 적중 계측 보고서 (JSON)
+METRICS_FILE = "scan_metrics.json"
+
+def send_early_alert(rows, config):
+    """스캔 도중 모인 EARLY_ALERT_SCORE 이상 종목을 최종 리포트를 기다리지 않고 텔레그램 메시지 한 통으로 먼저 알립니다."""
+    telegram = config.get("telegram", {})
+    bot_token = telegram.get("bot_token")
+    chat_ids = telegram.get("chat_ids", [])
+    if not (bot_token and chat_ids) or not rows:
+        return
+    
+    rows = sorted(rows, key=lambda row: -row['적합도 점수'])
+    text = f"⚡ <b>[주식 로봇 AI 조기 알림]</b> {len(rows)}종목\n\n"
+    for row in rows[:EARLY_ALERT_MAX_ROWS]:
+        text += f"🎯 <b>{row['종목명']}</b> ({row['현재가(원)']:,.0f}원 / {row['등락률(%)']}%)\n"
+        text += f"✔️ 총점: <b>{row['적합도 점수']}점</b>\n"
+        text += f"✔️ 비고: {row['조건만족']}\n\n"
+    if len(rows) > EARLY_ALERT_MAX_ROWS:
+        text += f"외 {len(rows) - EARLY_ALERT_MAX_ROWS}종목\n\n"
+    text += "스캔이 진행 중이며, 전체 결과는 스캔 완료 후 따로 보내드립니다."
+    success, msg = notifier.send_telegram_message(text, bot_token, chat_ids)
+    print(f"조기 알림 발송 결과 ({len(rows)}종목): {msg}")
+
+def drain_with_early_alert(stream, config, window=EARLY_ALERT_WINDOW):
+    """
+    스캔 결과(engine.ScanStream)를 끝까지 읽으면서 EARLY_ALERT_SCORE 이상 종목을 모으고,
+    첫 종목이 나온 지 window초가 지나면 그때까지 모인 종목을 send_early_alert로 한 번만 보낸 뒤 전체 결과 DataFrame을 리턴합니다.
+    그 전에 스캔이 끝나면 곧 나갈 최종 리포트와 겹치므로 조기 알림은 보내지 않습니다. (이후 종목도 최종 리포트에 포함)
+    """
+    hits, first_at, sent = [], None, False
+    for current, total, name, rows in stream:
+        if sent:
+            continue
+        for row in rows:
+            if row['적합도 점수'] >= EARLY_ALERT_SCORE:
+                hits.append(row)
+                if first_at is None:
+                    first_at = time.monotonic()
+        if first_at is not None and time.monotonic() - first_at >= window:
+            send_early_alert(hits, config)
+            sent = True
+    return stream.to_frame()
+
+def _smtp_settings(config):
+    """
+    config.json의 발신 계정과 "smtp" 설정({"host", "port", "starttls", "login"})으로 만든 dispatch 인자.
+    발신 계정이 없으면 None (login이 false면 앱 비밀번호 없이 보냄 - 로컬 테스트 서버용)
+    """
+    sender = config.get("sender", {})
+    smtp = config.get("smtp", {})
+    login = smtp.get("login", True)
+    if not sender.get("email") or (login and not sender.get("app_password")):
+        return None
+    return {
+        "sender_email": sender["email"],
+        "sender_password": sender.get("app_password") if login else None,
+        "host": smtp.get("host", outbox.SMTP_HOST),
+        "port": int(smtp.get("port", outbox.SMTP_PORT)),
+        "starttls": smtp.get("starttls", True),
+    }
+
+def dispatch_emails(config):
+    """발송함에 쌓인 메일 중 보낼 때가 된 것을 모두 보냅니다."""
+    settings = _smtp_settings(config)
+    if not settings:
+        return
+    box = outbox.get_outbox()
+    stats = box.dispatch(**settings)
+    if any(stats.values()):
+        print(f"이메일 발송 결과: 성공 {stats['sent']}건, 재시도 대기 {stats['retry']}건, 포기 {stats['failed']}건")
+    box.purge()
+
+def save_metrics_report(path=METRICS_FILE, **extra):
+    """이번 실행의 계측 보고서(metrics.Metrics.report + extra)를 JSON으로 저장하고 시간이 오래 걸린 단계를 출력합니다."""
+    report = metrics.get_metrics().report()
+    report.update(extra)
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    except OSError as e:
+        print(f"계측 보고서 저장 실패: {e}")
+        return report
+    
+    slowest = ", ".join(f"{name} {stage['total_ms'] / 1000:.1f}초" for name, stage in list(report["stages"].items())[:4])
+    print(f"계측 보고서 저장: {path} (총 {report['elapsed_sec']}초 / {slowest or '기록 없음'})")
+    return report
+
+def main(limit=None, scanner=None, metrics_path=METRICS_FILE):
+    """
+    종목을 스캔해 70점 이상 종목을 이메일/텔레그램으로 알립니다.
+    scanner(engine.WarmScan)를 주면 실행 사이에 유지한 지표 상태로 바뀐 종목만 다시 채점합니다. (데몬 모드)
+    실행이 끝나면(실패해도) 단계별 계측 보고서를 metrics_path에 저장합니다.
+    """
+    metrics.get_metrics().reset()
+    try:
+        _scan_and_notify(limit, scanner)
+    finally:
+        if metrics_path:
+            save_metrics_report(metrics_path, mode="daemon" if scanner is not None else ("limit" if limit else "full"),
+                                limit=limit)
+
+def _scan_and_notify(limit=None, scanner=None):
     print(f"[{datetime.now()}] 자동화 봇 스크립트 시작")
     config = notifier.load_config()
     
-    # 1. 대상 종목 스캔 (우선순위 상위 50종목 스캔)
-    print("종목 스캔 중...")
-    # 프로모션용 제한을 풀 수 있지만 우선 빠른 속도를 위해 limit=50 유지
-    df = engine.scan_hot_stocks(limit=50)
+    # 지난 실행에서 보내지 못한 메일부터 발송
+    dispatch_emails(config)
+    
+    # 1. 대상 종목 스캔
+    if scanner is not None:
+        print(f"종목 스캔 중... (데몬 모드{f', 상위 {limit}종목' if limit else ''})")
+        stream = scanner.stream(min_score=ALERT_SCORE, limit=limit)
+    elif limit:
+        # 시가총액 상위 limit개 종목만 빠르게 스캔
+        print(f"종목 스캔 중... (상위 {limit}종목)")
+        stream = engine.iter_scan_hot_stocks(limit=limit, workers=engine.SCAN_WORKERS, max_rps=engine.SCAN_MAX_RPS,
+                                             min_score=ALERT_SCORE)
+    else:
+        # 시가총액 500억 이상 KOSPI+KOSDAQ 전체 종목을 멀티 프로세스로 스캔
+        print("종목 스캔 중... (전체 시장)")
+        stream = engine.iter_full_universe(min_score=ALERT_SCORE, max_rps=engine.SCAN_MAX_RPS)
+    
+    # 결과가 나오는 대로 확인해 아주 높은 점수는 스캔 완료 전에 모아서 먼저 알림
+    df = drain_with_early_alert(stream, config)
+    if scanner is not None:
+        print(f"지표 상태: {scanner.stats}")
     
     if df.empty:
         print("검색된 종목이 없습니다.")
         return
         
     # 2. 투자 적기 70점 이상 종목 필터링
-    hot_stocks = df[df['적합도 점수'] >= 70].copy()
+    hot_stocks = df[df['적합도 점수'] >= ALERT_SCORE].copy()
     
     if hot_stocks.empty:
         print("조건(70점 이상)을 만족하는 우수한 종목이 없어 알림 발송을 생략합니다.")
@@ -56,19 +196,16 @@ def main():
     # 텔레그램 하단 버튼 (Streamlit URL 접속 유도)
     tg_text += "👉 <a href='https://korea333333-web-stock-chart.streamlit.app'>대시보드로 이동하여 상세 차트 보기</a>"
     
-    # 4. 이메일 자동 발송
+    # 4. 이메일 자동 발송: 발송함에 넣은 뒤 SMTP 세션 하나로 발송 (실패분은 다음 실행 때 재시도)
     emails = config.get("emails", [])
-    sender = config.get("sender", {})
-    if emails and sender.get("email") and sender.get("app_password"):
-        print(f"이메일 발송 시도: {emails}")
-        success, msg = notifier.send_email(
+    if emails and _smtp_settings(config):
+        added = outbox.get_outbox().enqueue(
             subject=f"[주식 AI] 🎯 {datetime.now().strftime('%m/%d')} 강력 매수 적기 종목 알림 ({len(hot_stocks)}건)",
             body=body_html,
-            to_emails=emails,
-            sender_email=sender["email"],
-            sender_password=sender["app_password"]
+            recipients=emails
         )
-        print(f"이메일 발송 결과: {msg}")
+        print(f"이메일 발송함 등록: {added}건 (수신: {emails})")
+        dispatch_emails(config)
     
     # 5. 텔레그램 자동 발송
     telegram = config.get("telegram", {})
@@ -80,5 +217,40 @@ def main():
         success, msg = notifier.send_telegram_message(tg_text, bot_token, chat_ids)
         print(f"텔레그램 발송 결과: {msg}")
 
+def run_daemon(limit=None, metrics_path=METRICS_FILE):
+    """
+    상주 실행 모드: 거래일 RUN_TIMES(KST)마다 main을 실행합니다.
+    상장 목록, 일봉 저장소, 종목별 지표 상태를 프로세스 안에 유지하므로 각 실행은 새 봉만 받아 바뀐 종목만 다시 채점합니다.
+    """
+    scanner = engine.WarmScan()
+    
+    # 시작하자마자 지표 상태를 채워 두어 첫 예약 실행도 바로 끝나도록 함 (알림 없음)
+    print(f"[{datetime.now()}] 데몬 시작: 지표 상태 초기화 중...")
+    scanner.run(min_score=ALERT_SCORE, limit=limit)
+    print(f"지표 상태 준비 완료: {len(scanner.states)}종목")
+    
+    while True:
+        next_run = market_calendar.next_run_time(RUN_TIMES)
+        print(f"다음 실행 예정: {next_run.strftime('%Y-%m-%d %H:%M')} KST")
+        while True:
+            remaining = (next_run - market_calendar.now_kst()).total_seconds()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, DAEMON_POLL))
+        
+        try:
+            main(limit=limit, scanner=scanner, metrics_path=metrics_path)
+        except Exception as e:
+            # 한 번 실패해도 데몬은 계속 다음 실행을 기다림
+            print(f"예약 실행 실패: {e}")
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="주식 알림 봇")
+    parser.add_argument("--limit", type=int, default=None, help="시가총액 상위 N개 종목만 스캔 (기본: 전체 시장 스캔)")
+    parser.add_argument("--daemon", action="store_true", help="상주하면서 거래일 11:00, 13:00, 15:30(KST)마다 실행")
+    parser.add_argument("--metrics", default=METRICS_FILE, help=f"계측 보고서(JSON) 저장 경로 (기본: {METRICS_FILE})")
+    args = parser.parse_args()
+    if args.daemon:
+        run_daemon(limit=args.limit, metrics_path=args.metrics)
+    else:
+        main(limit=args.limit, metrics_path=args.metrics)
@@ -0,0 +1,69 @@
+import threading
+import time
+
+
+class RefreshingCache:
+    """
+    loader()의 결과를 ttl(초) 동안 보관하는 프로세스 공용 캐시입니다.
+    만료된 뒤에도 기존 값을 바로 돌려주고 새로 고침은 백그라운드 스레드에서 한 번만 수행하므로,
+    처음 한 번을 제외하면 호출자가 네트워크를 기다리지 않습니다.
+    loader가 예외를 던지면 기존 값을 그대로 유지합니다.
+    """
+
+    def __init__(self, loader, ttl, name=None):
+        self.loader = loader
+        self.ttl = ttl
+        self.name = name or getattr(loader, '__name__', 'cache')
+        self._value = None
+        self._loaded_at = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def age(self):
+        """마지막으로 값을 받아온 뒤 지난 시간(초). 값이 없으면 None"""
+        if self._loaded_at is None:
+            return None
+        return time.monotonic() - self._loaded_at
+
+    def _load(self):
+        # 같은 캐시를 동시에 여러 번 조회하지 않도록 직렬화
+        with self._load_lock:
+            try:
+                value = self.loader()
+            except Exception as e:
+                print(f"[{self.name}] 데이터 갱신 실패: {e}")
+                return
+            with self._lock:
+                self._value = value
+                self._loaded_at = time.monotonic()
+
+    def _load_in_background(self):
+        try:
+            self._load()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def refresh(self, wait=False):
+        """값을 새로 받아옵니다. wait=False 이면 백그라운드 스레드로 실행합니다."""
+        if wait:
+            self._load()
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._load_in_background, daemon=True).start()
+
+    def get(self):
+        """캐시된 값을 리턴합니다. 값이 한 번도 없을 때만 직접 받아올 때까지 기다립니다."""
+        if self._loaded_at is None:
+            with self._load_lock:
+                loaded = self._loaded_at is not None
+            if not loaded:
+                self._load()
+        elif self.age >= self.ttl:
+            self.refresh()
+        return self._value
@@ -1,389 +1,911 @@
 import pandas as pd
 import numpy as np
-import FinanceDataReader as fdr
 from datetime import datetime, timedelta
 import warnings
-import urllib.request
-import urllib.parse
-import xml.etree.ElementTree as ET
-import ssl
-from deep_translator import GoogleTranslator
+import os
+import heapq
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from functools import lru_cache
+import bar_store
+import universe
+import indices
+import market_calendar
+import metrics
+from throttle import RateLimiter
+from bars import Bars
+from panel import Panel, score_panel
+from rules import RuleSet, load_rules
+from indicator_state import IndicatorState
+from news import get_latest_news
 
 warnings.filterwarnings('ignore')
 
+# 동시 스캔 기본값 (대시보드/봇에서 사용): 동시 작업 스레드 수, 초당 최대 시세 요청 수
+SCAN_WORKERS = 8
+SCAN_MAX_RPS = 10
+
+# 스캔 도중 보여줄 상위 종목 수
+SCAN_TOP_N = 5
+
+# 전체 시장 스캔 기본값: 프로세스 하나가 한 번에 맡는 종목 수
+FULL_SCAN_CHUNK = 200
+
+# 상장 목록 사전 필터: KRX 일일 가격제한폭(장중 목록이면 종가가 이 범위 안에서 움직인다고 봄),
+# 장 마감 후 이 시간이 지나서 받은 목록만 확정 종가로 취급
+PRICE_LIMIT = 0.30
+LISTING_FINAL_DELAY = timedelta(minutes=10)
+
+# 종가 / C조건 창(25~6봉 전) 최저가의 하한. 6봉 전 종가는 창 최저가 이상이고 봉마다 종가가 ±PRICE_LIMIT 안에서
+# 움직인다고 보면, 조건별로 통과하려면 종가가 최저가 아래로 얼마까지만 내려갈 수 있는지 정해짐 (C 점수 상한 계산용)
+_FALL = 1 - PRICE_LIMIT
+LOW_RATIO_ANY = _FALL ** 5                                      # 5봉 연속 하한가
+LOW_RATIO_E = 0.85                                              # E 통과: 10봉 최고가(>= 창 최저가)의 85% 초과
+LOW_RATIO_F = min(5 / sum(_FALL ** -k for k in range(5)),       # F 정배열: MA5 > 6~20봉 전 종가 평균
+                  3 / sum(_FALL ** -k for k in range(3)))       # F 각도: 최근 3봉 종가 합 > 6~8봉 전 종가 합
+LOW_RATIO_G = 0.95 * sum(_FALL ** k for k in range(1, 5)) / (5 - 0.95)  # G 통과: 종가 >= MA5 * 0.95
+LOW_RATIO_FG = min(0.95, 0.95 * (3 + _FALL + _FALL ** 2) / 5)   # F와 G 동시 통과
+
+# 차트 데이터(일/주/월봉)는 선택한 종목만 만들어 최근 N개만 메모리에 보관
+CHART_CACHE_SIZE = 16
+
 def get_candidate_tickers(date_str=None):
     """
     FinanceDataReader를 활용하여 KOSPI, KOSDAQ 시장에서 시가총액 500억 이상인 종목의 
     종목코드와 종목명, 시가총액(억) 목록 데이터프레임을 리턴합니다.
+    상장 목록은 universe 모듈이 메모리(TTL)와 날짜별 디스크 스냅샷으로 캐시하며, 거래일마다 한 번 갱신합니다.
     """
-    try:
-        # FinanceDataReader 한국 증시 (KRX) 전체 종목 리스트 
-        df = fdr.StockListing('KRX')
-        
-        # 'Code', 'Market', 'Marcap' (시가총액, 원), 'Name' 등 컬럼 존재
-        # KOSPI, KOSDAQ 종목만 취합
-        df_filtered = df[(df['Market'].str.contains('KOSPI') | df['Market'].str.contains('KOSDAQ'))]
-        
-        # 시가총액 500억 = 50,000,000,000 원
-        df_filtered = df_filtered[df_filtered['Marcap'] >= 50000000000].copy()
-        
-        # 종목코드 코드를 인덱스로
-        df_filtered = df_filtered.set_index('Code')
-        
-        # 종목코드별 시가총액 억 단위로 변환해 새 컬럼에 넣기
-        df_filtered['시가총액(억)'] = df_filtered['Marcap'] // 100000000
-        
-        return df_filtered
-    except Exception as e:
-        print(f"시가총액 데이터 수집 실패: {e}")
-        return pd.DataFrame()
+    return universe.get_universe()
 
 def get_global_indices():
     """
     KOSPI(KS11), KOSDAQ(KQ11), S&P500(US500), NASDAQ(IXIC) 
     4개 주요 글로벌 지수의 최근 등락 정보를 가져옵니다.
+    지수 목록과 캐시 정책은 indices 모듈(IndexService)에서 관리합니다.
     """
-    indices = {
-        'KOSPI': 'KS11',
-        'KOSDAQ': 'KQ11',
-        'S&P 500': 'US500', 
-        'NASDAQ': 'IXIC'
-    }
-    
-    results = {}
-    today = datetime.today()
-    start_date = today - timedelta(days=7) # 주말/휴일 고려 7일치
-    
-    for name, code in indices.items():
-        try:
-            df = fdr.DataReader(code, start_date, today)
-            if len(df) >= 2:
-                curr = df['Close'].iloc[-1]
-                prev = df['Close'].iloc[-2]
-                diff = curr - prev
-                pct = (diff / prev) * 100
-                history = df['Close'].tolist()
-                results[name] = {"close": curr, "diff": diff, "pct": pct, "history": history}
-            else:
-                results[name] = {"close": 0, "diff": 0, "pct": 0, "history": []}
-        except Exception as e:
-            results[name] = {"close": 0, "diff": 0, "pct": 0, "history": []}
-            
-    return results
-
-def get_latest_news():
-    """Google News RSS를 활용하여 주요 키워드별 최신 기사를 5개씩 가져옵니다."""
-    results = {}
-    
-    # 카테고리별 검색어 (검색어, hl, gl, ceid) - 주요 기사 및 퀄리티 위주로 큐레이션 개선
-    queries = {
-        "🇰🇷 국내 증시 주요뉴스": ("국내 증시 주요뉴스 OR 코스피 시황", "ko", "KR", "KR:ko"),
-        "🇰🇷 국내 경제 핫이슈": ("한국 경제 주요기사 OR 경제 동향", "ko", "KR", "KR:ko"),
-        "🇺🇸 글로벌 증시 마감/시황": ("미국 증시 주요뉴스 OR 뉴욕증시 마감", "ko", "KR", "KR:ko"),
-        "🇺🇸 연준/금리/거시경제": ("Fed 금리 주요뉴스 OR 연준 미국 경제", "ko", "KR", "KR:ko"),
-        "🌎 글로벌 경제 오피니언 (외신)": ("global economy major news OR Wall Street stock market analysis", "en-US", "US", "US:en")
-    }
-    
-    # SSL 우회 설정 (특정 환경 오류 방지)
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-
-    import requests
-    for title, (q, hl, gl, ceid) in queries.items():
-        encoded_q = urllib.parse.quote(q)
-        url = f"https://news.google.com/rss/search?q={encoded_q}&hl={hl}&gl={gl}&ceid={ceid}"
-        
-        try:
-            # RSS 크롤링 안정성 확보를 위한 세션 및 헤더 위장
-            session = requests.Session()
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
-                'Referer': 'https://www.google.com/'
-            }
-            # Timeout을 넉넉하게 7초로 설정하고, verify=False 로 SSL 깐깐함 완화
-            res = session.get(url, headers=headers, timeout=7, verify=False)
-            res.raise_for_status() # 400, 500 에러 발생 시 except로 던짐
-            
-            root = ET.fromstring(res.text)
-            translator = GoogleTranslator(source='auto', target='ko')
-            
-            items = []
-            for item in root.findall('.//item')[:5]: # 기사는 딱 5개만 제한
-                news_title = item.find('title').text
-                news_link = item.find('link').text
-                
-                # 출처(source) 요소 찾기
-                source_node = item.find('source')
-                source_name = source_node.text if source_node is not None else "Unknown"
-                
-                # 퍼블리시 시간
-                pub_date = item.find('pubDate')
-                pub_text = pub_date.text if pub_date is not None else ""
-                
-                # ' - 출처' 형태가 제목에 붙어있는 경우 정리
-                if f" - {source_name}" in news_title:
-                    news_title = news_title.replace(f" - {source_name}", "")
-                    
-                # [추가] 외신 채널의 경우 한국어 번역본 제공
-                translated_title = ""
-                if "외신" in title or "US" in gl:
-                    try:
-                        translated_title = translator.translate(text=news_title)
-                    except Exception as trans_e:
-                        translated_title = "(번역 실패)"
-                        
-                items.append({
-                    "title": news_title, 
-                    "title_ko": translated_title,
-                    "link": news_link, 
-                    "source": source_name, 
-                    "date": pub_text
-                })
-            
-            results[title] = items
-        except Exception as e:
-            print(f"Error fetching news for {title}: {e}")
-            results[title] = [] # 에러 시 빈 리스트
-            
-    return results
+    return indices.get_snapshot()
 
-def run_strategy(ticker, today=None):
+def load_history(ticker, today=None, limiter=None, refresh=True, as_bars=False):
     """
-    단일 종목에 대해 A~G 조건을 평가하여 점수(score, 100점 만점)와 
-    세부 내역(details), 현재가 등의 기본 정보를 리턴합니다.
+    run_strategy가 채점에 쓰는 150일 분량의 일봉을 로컬 저장소 경유로 조회합니다.
+    as_bars=True 이면 DataFrame 대신 정수 배열 기반 Bars로 리턴합니다. (스캔/차트용, 메모리 절약)
     """
     if today is None:
         today = datetime.today()
-        
     start_date = today - timedelta(days=150) # MA60 여유 있게 구하기 위해 150일 분량 조회
-    
-    try:
-        # fdr로 데이터 수집
-        df = fdr.DataReader(ticker, start_date, today)
-        if len(df) < 60:
-            return 0, {}, 0, 0 # 데이터 너무 적음
-            
-        # 이평선 계산
+    # 로컬 저장소 경유로 데이터 수집 (마지막 저장일 이후 봉만 fdr로 추가 조회)
+    with metrics.timer("load_history"):
+        return bar_store.load_bars(ticker, start_date, today, limiter, refresh, as_bars)
+
+def add_moving_averages(df):
+    """차트/채점용 MA5, MA20, MA60 컬럼을 추가합니다."""
+    with metrics.timer("moving_averages"):
         df['MA5'] = df['Close'].rolling(window=5).mean()
         df['MA20'] = df['Close'].rolling(window=20).mean()
         df['MA60'] = df['Close'].rolling(window=60).mean()
+    return df
+
+def resample_chart_frames(df):
+    """주식 차트 멀티 프레임을 위한 주봉(Weekly), 월봉(Monthly) 데이터 리샘플링 생성 (Bars를 주면 Bars로 리턴)"""
+    with metrics.timer("resample"):
+        if isinstance(df, Bars):
+            return df.resample('W'), df.resample('M')
+        df_weekly = df.resample('W-Fri').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
+        df_monthly = df.resample('M').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
+    return df_weekly, df_monthly
+
+def _price_band_score(close):
+    """[A조건] 주가범위 점수 (1,000원 미만은 0점, 50,000원 초과부터 감점)"""
+    if close < 1000:
+        return 0
+    return min(10, 10 - ((close - 50000)/5000) if close > 50000 else 10)
+
+def _retention_score(retention_ratio):
+    """[E조건] 주가상단 지지 점수 (10봉 고가 대비 85% 초과부터 부분 점수)"""
+    if retention_ratio > 0.85:
+        return 15.0 * min(1.0, (retention_ratio - 0.85) / 0.15)
+    return 0
+
+def _rise_score_max(low_ratio):
+    """[C조건] 종가 / 창 최저가가 low_ratio 이상일 때 C조건 점수의 최댓값 (최저가 아래에서는 15점을 넘음)"""
+    return 15.0 * (1.0 - (min(low_ratio, 1.0) - 1.0) / 0.35)
+
+def tail_score_bound(e_max=15.0):
+    """
+    E조건 점수가 e_max 이하일 때 B~G 조건 점수 합의 상한입니다.
+    B, D, E, F, G는 15점을 넘지 않지만 C는 종가가 창 최저가 아래로 내려갈수록 커지므로(5봉 연속 하한가면 약 50.7점),
+    E/F/G 중 어떤 조건이 통과하느냐에 따라 정해지는 종가 하한(LOW_RATIO_*)으로 C 상한을 같이 계산합니다.
+    (C가 커지면 E/F/G가 0점이 되는 관계를 이용하며, 일봉 사이 가격제한폭 ±PRICE_LIMIT를 가정)
+    """
+    return 30.0 + max(
+        _rise_score_max(LOW_RATIO_ANY),                      # E, F, G 모두 0점
+        15.0 + _rise_score_max(LOW_RATIO_F),                 # F만 통과
+        15.0 + _rise_score_max(LOW_RATIO_G),                 # G만 통과
+        30.0 + _rise_score_max(LOW_RATIO_FG),                # F, G 통과
+        e_max + 30.0 + _rise_score_max(LOW_RATIO_E),         # E 통과 (F, G는 만점으로 가정)
+    )
+
+# 각 조건을 채점한 뒤 남은 조건들이 받을 수 있는 점수 합의 상한 (채점 도중 가지치기용)
+# C를 채점하기 전에는 C가 15점을 넘을 수 있으므로 tail_score_bound, C 이후로는 남은 조건이 모두 15점 만점
+REMAINING_MAX = {'A': tail_score_bound(), 'B': tail_score_bound() - 15.0, 'C': 60, 'D': 45, 'E': 30, 'F': 15}
+# 상장 목록으로 좁힐 수 없는 B~G 상한의 최솟값: 이 점수 이하 기준에서는 사전 필터가 거를 종목이 없음
+PREFILTER_FLOOR = tail_score_bound(0.0)
+
+def _out_of_reach(score, done, cutoff):
+    """done 조건까지의 점수에 남은 조건 점수 상한(REMAINING_MAX)을 더해도 cutoff(반올림 기준)에 못 미치면 True"""
+    return cutoff is not None and round(score + REMAINING_MAX[done] + 1e-6, 1) < cutoff
+
+def score_history(df, cutoff=None):
+    """
+    이평선(MA5/MA20/MA60)이 추가된 일봉 df로 A~G 조건을 채점해
+    (점수, details, 현재가, 등락률, 조건만족, markers)를 리턴합니다.
+    df 대신 Bars를 주면 이평선 컬럼 없이 패널 엔진(같은 공식)으로 채점하며, 이때 cutoff 가지치기는 하지 않습니다.
+    cutoff를 주면 조건을 하나씩 채점하다가 남은 조건이 상한(REMAINING_MAX)까지 받아도 cutoff에 못 미치는 순간 멈추고
+    (0, {}, 현재가, 등락률, "Pruned", {})를 리턴합니다.
+    """
+    if isinstance(df, Bars):
+        return score_panel(Panel.from_frames({df.ticker: df}))[0]
+    
+    # 최신 데이터
+    current_close = int(df['Close'].iloc[-1])
+    # 등락률 계산 (전일 종가 대비)
+    prev_close = int(df['Close'].iloc[-2])
+    # 혹시 0 분모 에러 방지
+    current_chg_pct = round(((current_close - prev_close) / prev_close) * 100, 2) if prev_close > 0 else 0
+    
+    score = 0
+    details = {}
+    pass_points = []
+    markers = {}  # 차트 오버레이(표시)용 이벤트 좌표 저장
+    
+    # [A조건] 주가범위: 0일전 종가가 1,000원 ~ 50,000원 (10점 만점)
+    if 1000 <= current_close:
+        pct_score = _price_band_score(current_close)
+        if pct_score > 0:
+            score += pct_score
+            details['A'] = f"Pass({pct_score:.1f}점)"
+            pass_points.append('A')
+        else:
+            details['A'] = "Fail"
+    else:
+        details['A'] = "Fail"
         
-        # 최신 데이터
-        current_close = int(df['Close'].iloc[-1])
-        # 등락률 계산 (전일 종가 대비)
-        prev_close = int(df['Close'].iloc[-2])
-        # 혹시 0 분모 에러 방지
-        current_chg_pct = round(((current_close - prev_close) / prev_close) * 100, 2) if prev_close > 0 else 0
+    if _out_of_reach(score, 'A', cutoff):
+        return 0, {}, current_close, current_chg_pct, "Pruned", {}
         
-        score = 0
-        details = {}
-        pass_points = []
-        markers = {}  # 차트 오버레이(표시)용 이벤트 좌표 저장
+    # [B조건] 기간내 거래대금: 5일 이내 200억 이상 유무 (15점 만점)
+    # 200억을 넘는 비율에 따라 최대 15점까지 가중치 부여
+    try:
+        recent_5 = df.iloc[-5:]
+        trade_vals = recent_5['Volume'] * recent_5['Close']
+        max_trade_val = trade_vals.max()
+        max_date = trade_vals.idxmax()
         
-        # [A조건] 주가범위: 0일전 종가가 1,000원 ~ 50,000원 (10점 만점)
-        if 1000 <= current_close:
-            pct_score = min(10, 10 - ((current_close - 50000)/5000) if current_close > 50000 else 10)
-            if pct_score > 0:
-                score += pct_score
-                details['A'] = f"Pass({pct_score:.1f}점)"
-                pass_points.append('A')
-            else:
-                details['A'] = "Fail"
+        if max_trade_val >= 10_000_000_000: # 최소 100억부터 점수 인정 시작
+            ratio = min(1.0, max_trade_val / 20_000_000_000)
+            b_score = 15.0 * ratio
+            score += b_score
+            details['B'] = f"Pass({b_score:.1f}점)"
+            pass_points.append('B')
+            markers['B_Vol'] = (max_date, recent_5.loc[max_date, 'Close'], "최대거래량")
         else:
-            details['A'] = "Fail"
-            
-        # [B조건] 기간내 거래대금: 5일 이내 200억 이상 유무 (15점 만점)
-        # 200억을 넘는 비율에 따라 최대 15점까지 가중치 부여
-        try:
-            recent_5 = df.iloc[-5:]
-            trade_vals = recent_5['Volume'] * recent_5['Close']
-            max_trade_val = trade_vals.max()
-            max_date = trade_vals.idxmax()
-            
-            if max_trade_val >= 10_000_000_000: # 최소 100억부터 점수 인정 시작
-                ratio = min(1.0, max_trade_val / 20_000_000_000)
-                b_score = 15.0 * ratio
-                score += b_score
-                details['B'] = f"Pass({b_score:.1f}점)"
-                pass_points.append('B')
-                markers['B_Vol'] = (max_date, recent_5.loc[max_date, 'Close'], "최대거래량")
-            else:
-                details['B'] = "Fail"
-        except:
-            details['B'] = "Error"
+            details['B'] = "Fail"
+    except:
+        details['B'] = "Error"
+        
+    if _out_of_reach(score, 'B', cutoff):
+        return 0, {}, current_close, current_chg_pct, "Pruned", {}
+        
+    # [C조건] 기간내 주가위치: 5봉전 20봉 이내 '최저가' (15점 만점)
+    # 최저점 대비 현재가가 얼마나 올라왔는지(너무 많이 오르지 않아야 고득점)
+    try:
+        recent_20_lows = df['Low'].iloc[-25:-5] # 정확히 5봉전~25봉전 사이의 데이터
+        min_val = recent_20_lows.min()
+        min_date = recent_20_lows.idxmin()
+        
+        # 현재가가 바닥 대비 30% 이내에 머물러 있을 때 점수 부여 (바닥권 횡보 확인)
+        rise_ratio = (current_close - min_val) / min_val
+        if rise_ratio <= 0.35: 
+            c_score = 15.0 * (1.0 - (rise_ratio / 0.35))
+            score += c_score
+            details['C'] = f"Pass({c_score:.1f}점)"
+            pass_points.append('C')
+            markers['C_Low'] = (min_date, min_val, "기간최저가")
+        else:
+            details['C'] = "Fail(너무오름)"
+    except:
+        details['C'] = "Error"
+        
+    if _out_of_reach(score, 'C', cutoff):
+        return 0, {}, current_close, current_chg_pct, "Pruned", {}
+        
+    # [D조건] 주가비교: 10봉 이내 15% 이상 상승봉 (15점 만점)
+    # 상승 조건의 크기가 클수록 고득점 계산
+    try:
+        recent_11 = df.iloc[-11:] 
+        max_spike = 0
+        spike_date = None
+        spike_price = 0
+        
+        for i in range(1, len(recent_11)):
+            last_c = recent_11['Close'].iloc[i-1]
+            curr_h = recent_11['High'].iloc[i]
+            if last_c > 0:
+                spike_pct = curr_h / last_c
+                if spike_pct > max_spike:
+                    max_spike = spike_pct
+                    spike_date = recent_11.index[i]
+                    spike_price = curr_h
+                    
+        if max_spike >= 1.10: # 10% 이상부터 부분 점수, 25%면 만점
+            score_ratio = min(1.0, (max_spike - 1.10) / 0.15)
+            d_score = 15.0 * score_ratio
+            score += d_score
+            details['D'] = f"Pass({d_score:.1f}점)"
+            pass_points.append('D')
+            if max_spike >= 1.15:
+                markers['D_Spike'] = (spike_date, spike_price, f"{((max_spike-1)*100):.1f}%급등")
+        else:
+            details['D'] = "Fail"
+    except:
+        details['D'] = "Error"
+        
+    if _out_of_reach(score, 'D', cutoff):
+        return 0, {}, current_close, current_chg_pct, "Pruned", {}
+        
+    # [E조건] 주가상단 지지 여부: 0일전 종가 > 10봉 고가 * 0.9 (15점 만점)
+    try:
+        max_high_10 = df['High'].iloc[-10:].max()
+        retention_ratio = current_close / max_high_10
+        if retention_ratio > 0.85: # 85% 이상 지지부터 부분 점수 
+            e_score = _retention_score(retention_ratio)
+            score += e_score
+            details['E'] = f"Pass({e_score:.1f}점)"
+            pass_points.append('E')
+        else:
+            details['E'] = "Fail"
+    except:
+         details['E'] = "Error"
+         
+    if _out_of_reach(score, 'E', cutoff):
+        return 0, {}, current_close, current_chg_pct, "Pruned", {}
+        
+    # [F조건] 주가이평배열: 5 > 20 > 60 가중치 점수 (15점 만점)
+    # 이평선 역배열이어도 5일선이 고개를 들고 각도가 가파르면 점수 부여 (각도 계산)
+    try:
+        ma5 = df['MA5'].iloc[-1]
+        ma20 = df['MA20'].iloc[-1]
+        ma60 = df['MA60'].iloc[-1]
+        
+        # 5일선 3일 전 대비 상승 각도(비율)
+        ma5_prev = df['MA5'].iloc[-4]
+        ma5_angle = (ma5 - ma5_prev) / ma5_prev * 100
+        
+        f_score = 0
+        if ma5 > ma20 and ma20 > ma60:
+            f_score += 10 # 기본 정배열 점수
+        if ma5_angle > 0: # 5일선이 위로 꺾임 (각도 가산점 최대 5점)
+            f_score += min(5.0, ma5_angle) 
             
-        # [C조건] 기간내 주가위치: 5봉전 20봉 이내 '최저가' (15점 만점)
-        # 최저점 대비 현재가가 얼마나 올라왔는지(너무 많이 오르지 않아야 고득점)
+        if f_score > 0:
+            score += f_score
+            details['F'] = f"Pass({f_score:.1f}점)"
+            pass_points.append('F')
+        else:
+            details['F'] = "Fail"
+    except:
+         details['F'] = "Error"
+         
+    if _out_of_reach(score, 'F', cutoff):
+        return 0, {}, current_close, current_chg_pct, "Pruned", {}
+        
+    # [G조건] 이동평균이격도: 5일선에 98% ~ 102% 이내로 바짝 붙음 (15점 만점)
+    # 1.0(100%)에 완벽하게 일치할수록 15점 만점, 멀어질수록 깎임
+    try:
+        ma5 = df['MA5'].iloc[-1]
+        ratio = current_close / ma5
+        diff_from_center = abs(1.0 - ratio) # 0에 가까울수록 완벽
+        
+        if diff_from_center <= 0.05: # 95% ~ 105% 사이면 점수 배분
+            g_score = 15.0 * (1.0 - (diff_from_center / 0.05))
+            score += g_score
+            details['G'] = f"Pass({g_score:.1f}점)"
+            pass_points.append('G')
+            markers['G_MA5'] = (df.index[-1], current_close, "5일선 밀착")
+        else:
+            details['G'] = "Fail"
+    except:
+         details['G'] = "Error"
+         
+         
+    pass_str = ",".join(pass_points) if pass_points else "None"
+    
+    return round(score, 1), details, current_close, current_chg_pct, pass_str, markers
+
+def run_strategy(ticker, today=None, limiter=None):
+    """
+    단일 종목에 대해 A~G 조건을 평가하여 점수(score, 100점 만점)와 
+    세부 내역(details), 현재가 등의 기본 정보를 리턴합니다.
+    limiter(RateLimiter)를 넘기면 시세 조회 시 초당 요청 수 제한을 따릅니다.
+    """
+    with metrics.timer("ticker"):
         try:
-            recent_20_lows = df['Low'].iloc[-25:-5] # 정확히 5봉전~25봉전 사이의 데이터
-            min_val = recent_20_lows.min()
-            min_date = recent_20_lows.idxmin()
+            df = load_history(ticker, today, limiter)
+            if len(df) < 60:
+                return 0, {}, 0, 0, "None", pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), {} # 데이터 너무 적음
+                
+            # 이평선 계산
+            add_moving_averages(df)
             
-            # 현재가가 바닥 대비 30% 이내에 머물러 있을 때 점수 부여 (바닥권 횡보 확인)
-            rise_ratio = (current_close - min_val) / min_val
-            if rise_ratio <= 0.35: 
-                c_score = 15.0 * (1.0 - (rise_ratio / 0.35))
-                score += c_score
-                details['C'] = f"Pass({c_score:.1f}점)"
-                pass_points.append('C')
-                markers['C_Low'] = (min_date, min_val, "기간최저가")
-            else:
-                details['C'] = "Fail(너무오름)"
-        except:
-            details['C'] = "Error"
+            with metrics.timer("score"):
+                score, details, current_close, current_chg_pct, pass_str, markers = score_history(df)
             
-        # [D조건] 주가비교: 10봉 이내 15% 이상 상승봉 (15점 만점)
-        # 상승 조건의 크기가 클수록 고득점 계산
-        try:
-            recent_11 = df.iloc[-11:] 
-            max_spike = 0
-            spike_date = None
-            spike_price = 0
+            df_weekly, df_monthly = resample_chart_frames(df)
             
-            for i in range(1, len(recent_11)):
-                last_c = recent_11['Close'].iloc[i-1]
-                curr_h = recent_11['High'].iloc[i]
-                if last_c > 0:
-                    spike_pct = curr_h / last_c
-                    if spike_pct > max_spike:
-                        max_spike = spike_pct
-                        spike_date = recent_11.index[i]
-                        spike_price = curr_h
-                        
-            if max_spike >= 1.10: # 10% 이상부터 부분 점수, 25%면 만점
-                score_ratio = min(1.0, (max_spike - 1.10) / 0.15)
-                d_score = 15.0 * score_ratio
-                score += d_score
-                details['D'] = f"Pass({d_score:.1f}점)"
-                pass_points.append('D')
-                if max_spike >= 1.15:
-                    markers['D_Spike'] = (spike_date, spike_price, f"{((max_spike-1)*100):.1f}%급등")
-            else:
-                details['D'] = "Fail"
-        except:
-            details['D'] = "Error"
+            return score, details, current_close, current_chg_pct, pass_str, df, df_weekly, df_monthly, markers
             
-        # [E조건] 주가상단 지지 여부: 0일전 종가 > 10봉 고가 * 0.9 (15점 만점)
+        except Exception as e:
+            metrics.incr("ticker.error")
+            return 0, {}, 0, 0, "Error", pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), {}
+
+def _iter_tickers(func, tickers, workers=1):
+    """
+    종목마다 func(ticker)를 실행하며 끝나는 대로 (원래 순서 번호, 결과)를 내보내는 제너레이터입니다.
+    workers > 1 이면 스레드 풀로 동시에 실행하고, 소비자가 중간에 멈추면 남은 작업은 취소합니다.
+    """
+    if workers > 1:
+        pool = ThreadPoolExecutor(max_workers=workers)
         try:
-            max_high_10 = df['High'].iloc[-10:].max()
-            retention_ratio = current_close / max_high_10
-            if retention_ratio > 0.85: # 85% 이상 지지부터 부분 점수 
-                e_score = 15.0 * min(1.0, (retention_ratio - 0.85) / 0.15)
-                score += e_score
-                details['E'] = f"Pass({e_score:.1f}점)"
-                pass_points.append('E')
-            else:
-                details['E'] = "Fail"
-        except:
-             details['E'] = "Error"
-             
-        # [F조건] 주가이평배열: 5 > 20 > 60 가중치 점수 (15점 만점)
-        # 이평선 역배열이어도 5일선이 고개를 들고 각도가 가파르면 점수 부여 (각도 계산)
+            futures = {pool.submit(func, tk): i for i, tk in enumerate(tickers)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    else:
+        for i, tk in enumerate(tickers):
+            yield i, func(tk)
+
+def _map_tickers(func, tickers, names_dict, workers=1, progress_callback=None):
+    """
+    종목마다 func(ticker)를 실행해 원래 종목 순서대로 결과 리스트를 리턴합니다.
+    workers > 1 이면 스레드 풀로 동시에 실행하고, progress_callback은 호출한 스레드에서 완료 순서대로 불립니다.
+    """
+    outputs = [None] * len(tickers)
+    for done, (i, output) in enumerate(_iter_tickers(func, tickers, workers), start=1):
+        outputs[i] = output
+        if progress_callback:
+            progress_callback(done, len(tickers), names_dict.get(tickers[i], tickers[i]))
+    return outputs
+
+def score_ticker(ticker, today=None, limiter=None, get_cutoff=None):
+    """
+    스캔용 단일 종목 채점: run_strategy와 같은 점수를 내지만 주봉/월봉 리샘플링은 하지 않고
+    (점수, details, 현재가, 등락률, 조건만족, markers)만 리턴합니다.
+    get_cutoff()는 일봉을 받은 직후 불러 그 시점의 합격선으로 가지치기합니다. (score_history의 cutoff 참고)
+    """
+    with metrics.timer("ticker"):
         try:
-            ma5 = df['MA5'].iloc[-1]
-            ma20 = df['MA20'].iloc[-1]
-            ma60 = df['MA60'].iloc[-1]
-            
-            # 5일선 3일 전 대비 상승 각도(비율)
-            ma5_prev = df['MA5'].iloc[-4]
-            ma5_angle = (ma5 - ma5_prev) / ma5_prev * 100
-            
-            f_score = 0
-            if ma5 > ma20 and ma20 > ma60:
-                f_score += 10 # 기본 정배열 점수
-            if ma5_angle > 0: # 5일선이 위로 꺾임 (각도 가산점 최대 5점)
-                f_score += min(5.0, ma5_angle) 
-                
-            if f_score > 0:
-                score += f_score
-                details['F'] = f"Pass({f_score:.1f}점)"
-                pass_points.append('F')
-            else:
-                details['F'] = "Fail"
-        except:
-             details['F'] = "Error"
-             
-        # [G조건] 이동평균이격도: 5일선에 98% ~ 102% 이내로 바짝 붙음 (15점 만점)
-        # 1.0(100%)에 완벽하게 일치할수록 15점 만점, 멀어질수록 깎임
+            df = load_history(ticker, today, limiter)
+            if len(df) < 60:
+                return 0, {}, 0, 0, "None", {} # 데이터 너무 적음
+            add_moving_averages(df)
+            with metrics.timer("score"):
+                result = score_history(df, get_cutoff() if get_cutoff else None)
+            if result[4] == "Pruned":
+                metrics.incr("score.pruned")
+            return result
+        except Exception as e:
+            metrics.incr("ticker.error")
+            return 0, {}, 0, 0, "Error", {}
+
+def _safe_history(ticker, today=None, limiter=None):
+    """load_history와 같지만 조회에 실패하면 None을 리턴합니다. (봉이 없는 종목의 빈 DataFrame과 구분)"""
+    try:
+        return load_history(ticker, today, limiter, as_bars=True)
+    except Exception as e:
+        metrics.incr("ticker.error")
+        return None
+
+def _score_vectorized(tickers, names_dict, workers, limiter, progress_callback, today=None):
+    """패널 엔진으로 전체 종목을 한 번에 채점해 score_ticker와 같은 형태의 결과 리스트를 리턴합니다."""
+    frames = _map_tickers(lambda tk: _safe_history(tk, today, limiter), tickers, names_dict, workers, progress_callback)
+    return _score_frames(tickers, frames)
+
+def _score_frames(tickers, frames):
+    """종목별 일봉 리스트를 패널로 묶어 한꺼번에 채점합니다. 조회에 실패한 종목(None)은 "Error" 결과가 됩니다."""
+    failed = [df is None for df in frames]
+    with metrics.timer("panel.build"):
+        panel = Panel.from_frames({tk: pd.DataFrame() if df is None else df for tk, df in zip(tickers, frames)})
+    with metrics.timer("panel.score"):
+        scored = score_panel(panel)
+    return [(0, {}, 0, 0, "Error", {}) if fail else result for fail, result in zip(failed, scored)]
+
+def build_indicator_states(tickers, today=None, limiter=None, workers=1):
+    """
+    종목별 최근 일봉으로 증분 지표 상태(IndicatorState)를 만들어 {종목코드: 상태}로 리턴합니다.
+    데이터가 모자라거나 조회에 실패한 종목은 빠집니다. 이후 장중 재채점은 rescore_states로 합니다.
+    """
+    frames = _map_tickers(lambda tk: _safe_history(tk, today, limiter), tickers, {}, workers)
+    return {tk: IndicatorState.from_frame(df) for tk, df in zip(tickers, frames) if df is not None and len(df) >= 60}
+
+def rescore_states(states, today=None, limiter=None, workers=1):
+    """
+    각 종목의 최신 봉을 저장소 경유로 다시 받아(마지막 봉 부근만 증분 조회) 상태에 반영하고,
+    {종목코드: (점수, details, 현재가, 등락률, 조건만족, markers)}를 리턴합니다.
+    지표를 처음부터 다시 계산하지 않고 바뀐 마지막 봉만 반영하므로 분 단위 관심 종목 재채점에 씁니다.
+    """
+    def refresh(tk):
         try:
-            ma5 = df['MA5'].iloc[-1]
-            ratio = current_close / ma5
-            diff_from_center = abs(1.0 - ratio) # 0에 가까울수록 완벽
-            
-            if diff_from_center <= 0.05: # 95% ~ 105% 사이면 점수 배분
-                g_score = 15.0 * (1.0 - (diff_from_center / 0.05))
-                score += g_score
-                details['G'] = f"Pass({g_score:.1f}점)"
-                pass_points.append('G')
-                markers['G_MA5'] = (df.index[-1], current_close, "5일선 밀착")
-            else:
-                details['G'] = "Fail"
-        except:
-             details['G'] = "Error"
-             
-             
-        pass_str = ",".join(pass_points) if pass_points else "None"
+            state = states[tk]
+            state.update_from_frame(load_history(tk, today, limiter, as_bars=True))
+            return state.score()
+        except Exception as e:
+            return 0, {}, 0, 0, "Error", {}
+    
+    tickers = list(states)
+    return dict(zip(tickers, _map_tickers(refresh, tickers, {}, workers)))
+
+class WarmScan:
+    """
+    데몬 모드(bot.py --daemon)용 스캐너: 후보 종목별 IndicatorState와 직전 채점 결과를 실행 사이에 메모리에 유지합니다.
+    매 실행마다 저장소 경유로 마지막 봉 부근만 증분 조회하고, 봉이 바뀐 종목만 다시 채점합니다.
+    상장 목록은 universe 모듈의 메모리/스냅샷 캐시를 그대로 씁니다.
+    """
+    
+    def __init__(self, workers=SCAN_WORKERS, max_rps=SCAN_MAX_RPS):
+        self.workers = workers
+        self.max_rps = max_rps
+        self.states = {}    # 종목코드 -> IndicatorState
+        self.results = {}   # 종목코드 -> 직전 채점 결과 (score_history와 같은 튜플)
+        self.stats = {"built": 0, "rescored": 0, "unchanged": 0, "failed": 0}
+    
+    def _refresh(self, tk, today, limiter):
+        """종목 하나의 상태를 최신 봉으로 갱신하고 (결과, 상태 이름)을 리턴합니다."""
+        df = load_history(tk, today, limiter, as_bars=True)
+        state = self.states.get(tk)
+        if state is None or not state.continues(df):
+            if len(df) < 60:
+                return (0, {}, 0, 0, "None", {}), "built" # 데이터 너무 적음
+            state = IndicatorState.from_frame(df)
+            self.states[tk] = state
+            return state.score(), "built"
         
-        # 주식 차트 멀티 프레임을 위한 주봉(Weekly), 월봉(Monthly) 데이터 리샘플링 생성
-        df_weekly = df.resample('W-Fri').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
-        df_monthly = df.resample('M').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
+        before = (state.count, state.last_bar)
+        state.update_from_frame(df)
+        if tk in self.results and (state.count, state.last_bar) == before:
+            return self.results[tk], "unchanged"
+        return state.score(), "rescored"
+    
+    def stream(self, min_score=0, limit=None):
+        """
+        후보 종목 전체(limit를 주면 시가총액 상위 limit개)를 채점하며 종목이 끝나는 대로 결과를 내보내는 ScanStream을 리턴합니다.
+        상장 목록에서 빠진 종목의 상태는 버리고, 반복이 끝나면 stats와 직전 채점 결과(results)를 이번 실행 것으로 바꿉니다.
+        """
+        df_cap = get_candidate_tickers()
+        if df_cap.empty:
+            return _empty_stream()
+        if limit:
+            df_cap = df_cap.iloc[:limit]
+        # 목록에서 빠진 종목의 상태만 버림 (사전 필터로 이번에 건너뛰는 종목은 유지)
+        listed = set(df_cap.index)
+        for tk in [tk for tk in self.states if tk not in listed]:
+            del self.states[tk]
+        df_cap = prefilter_candidates(df_cap, min_score)
+        tickers = list(df_cap.index)
+        names_dict = df_cap['Name'].to_dict()
+        today = datetime.today()
+        limiter = RateLimiter(self.max_rps) if self.max_rps else None
         
-        return round(score, 1), details, current_close, current_chg_pct, pass_str, df, df_weekly, df_monthly, markers
+        def work(tk):
+            try:
+                return self._refresh(tk, today, limiter)
+            except Exception as e:
+                return (0, {}, 0, 0, "Error", {}), "failed"
         
-    except Exception as e:
-        return 0, {}, 0, 0, "Error", pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), {}
+        def source():
+            stats = dict.fromkeys(self.stats, 0)
+            results = {}
+            outputs = _iter_tickers(work, tickers, self.workers)
+            try:
+                for done, (i, (result, status)) in enumerate(outputs, start=1):
+                    tk = tickers[i]
+                    stats[status] += 1
+                    metrics.incr(f"warm.{status}")
+                    results[tk] = result
+                    score, details, price, chg_pct, pass_str, markers = result
+                    rows = []
+                    if score > 0 and score >= min_score:
+                        rows.append((i, _result_row(tk, names_dict.get(tk, tk), df_cap, score, price, chg_pct, pass_str,
+                                                    make_chart_handle(tk, today))))
+                    yield done, names_dict.get(tk, tk), rows
+            finally:
+                outputs.close()
+            # 끝까지 채점한 경우에만 교체 (중간에 멈추면 직전 실행 결과 유지)
+            self.results = results
+            self.stats = stats
+        
+        return ScanStream(source(), len(tickers), min_score=min_score)
+    
+    def run(self, min_score=0, limit=None, progress_callback=None):
+        """stream()을 끝까지 채점해 scan_hot_stocks와 같은 형태의 DataFrame을 리턴합니다."""
+        stream = self.stream(min_score, limit)
+        for current, total, name, rows in stream:
+            if progress_callback:
+                progress_callback(current, total, name)
+        return stream.to_frame()
+
+def make_chart_handle(ticker, today=None):
+    """
+    스캔 결과 행에 담는 차트 핸들 ('종목코드@스캔 시작 시각')
+    같은 날 다시 스캔하면(장중 봉이 바뀜) 시각이 달라 get_chart_payload 캐시에 남은 이전 스캔의 차트를 쓰지 않습니다.
+    """
+    today = today or datetime.today()
+    return f"{ticker}@{today.isoformat(timespec='seconds') if isinstance(today, datetime) else today.isoformat()}"
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def get_chart_payload(handle):
+    """
+    차트 핸들로 선택한 종목 하나의 일봉/주봉/월봉과 마커, 점수 세부 내역을 필요할 때 만들어 리턴합니다.
+    스캔 당시 저장소에 쌓인 봉을 그대로 쓰며(네트워크 조회 없음), 최근 CHART_CACHE_SIZE개만 메모리에 보관합니다.
+    일봉/주봉/월봉은 Bars이며(이평선은 bars.ma(n)), 여러 세션이 공유하므로 수정하지 않고 읽기만 해야 합니다.
+    봉이 모자라거나 읽기에 실패하면 예외를 던집니다. (lru_cache는 예외를 캐시하지 않으므로 다음 호출에서 다시 시도)
+    """
+    ticker, scanned_at = handle.split('@')
+    bars = load_history(ticker, datetime.fromisoformat(scanned_at), refresh=False, as_bars=True)
+    if len(bars) < 60:
+        raise ValueError(f"차트 데이터 부족 ({handle}): {len(bars)}봉")
+    score, details, price, chg_pct, pass_str, markers = score_history(bars)
+    weekly, monthly = resample_chart_frames(bars)
+    return {'daily': bars, 'weekly': weekly, 'monthly': monthly, 'markers': markers, 'details': details}
+
+def _result_row(tk, name, df_cap, score, price, chg_pct, pass_str, handle):
+    """스캔 결과 한 행 (스칼라 값과 차트 핸들만 보관)"""
+    return {
+        '종목코드': tk,
+        '종목명': name,
+        '현재가(원)': price,
+        '등락률(%)': chg_pct,
+        '영업이익(억)': '실시간계산대기',
+        '시가총액(억)': df_cap.loc[tk, '시가총액(억)'] if tk in df_cap.index else 0,
+        '적합도 점수': score,
+        '조건만족': pass_str,
+        '_handle': handle              # 차트/세부 내역은 get_chart_payload(handle)로 필요할 때 생성
+    }
+
+def listing_score_bound(close, high, prev_close=None):
+    """
+    상장 목록의 현재가/당일 고가만으로 구한 A~G 총점의 상한입니다.
+    (일봉 사이 종가가 ±PRICE_LIMIT 안에서 움직이는 한 실제 점수는 이 값을 넘을 수 없음)
+    - A: 현재가로 그대로 계산
+    - E: 10봉 최고가는 당일 고가 이상이므로 현재가 / 당일 고가로 상한 계산
+    - B~G: 상장 목록으로는 알 수 없으므로 E 상한을 넣은 tail_score_bound (C는 15점을 넘을 수 있음)
+    prev_close를 주면 장중 목록으로 보고, 종가가 전일 종가의 ±PRICE_LIMIT 안 어디로든 움직일 수 있다고 가정해 그 범위의 최댓값을 씁니다.
+    값을 알 수 없으면 inf를 리턴합니다. (걸러내지 않음)
+    """
+    if pd.isna(close) or pd.isna(high) or high <= 0:
+        return float('inf')
+    if prev_close is None:
+        lo = hi = int(close)
+    else:
+        if pd.isna(prev_close) or prev_close <= 0:
+            return float('inf')
+        lo, hi = int(prev_close * (1 - PRICE_LIMIT)), int(prev_close * (1 + PRICE_LIMIT)) + 1
+    
+    # A는 1,000원 이상에서 가격이 오를수록 줄어들므로 범위 안의 가장 낮은 가격에서 최대
+    a_max = max(0, _price_band_score(max(lo, 1000))) if hi >= 1000 else 0
+    # 장중에는 당일 고가도 같이 오를 수 있으므로 (종가 / 10봉 고가) <= min(1, 최고 가능 종가 / 현재 고가)
+    e_max = _retention_score(min(1.0, hi / high))
+    return a_max + tail_score_bound(e_max)
+
+def prefilter_candidates(df_cap, min_score):
+    """
+    일봉을 받기 전에 상장 목록(Close, High, Changes 컬럼)만으로 점수 상한을 계산해,
+    상한이 min_score에 못 미치는 종목을 뺀 목록을 리턴합니다.
+    목록의 기준 시점은 목록과 함께 저장된 값(universe.listing_as_of)을 쓰며, 오늘 거래일 것이 아니거나
+    필요한 컬럼이 없으면 걸러내지 않습니다.
+    A/E 조건 외에는 상한을 좁힐 수 없으므로 PREFILTER_FLOOR(약 85점) 이하 기준(봇의 ALERT_SCORE 70점 포함)에서는
+    목록을 보지 않고 그대로 리턴합니다.
+    """
+    if min_score <= PREFILTER_FLOOR or df_cap.empty or not {'Close', 'High'} <= set(df_cap.columns):
+        return df_cap
+    day, fetched_at = universe.listing_as_of(df_cap)
+    if day is None or day != market_calendar.trading_date():
+        return df_cap
+    
+    close_at = datetime.combine(day, market_calendar.MARKET_CLOSE, market_calendar.KST) + LISTING_FINAL_DELAY
+    if fetched_at is not None and fetched_at >= close_at:
+        prev_close = [None] * len(df_cap)
+    elif 'Changes' in df_cap.columns:
+        prev_close = (df_cap['Close'] - df_cap['Changes']).tolist()
+    else:
+        return df_cap
+    
+    bounds = np.array([
+        listing_score_bound(close, high, prev)
+        for close, high, prev in zip(df_cap['Close'], df_cap['High'], prev_close)
+    ], dtype=float)
+    # 실제 점수는 소수 첫째 자리로 반올림되므로 상한도 같은 방식으로 비교 (부동소수 오차 여유 포함)
+    keep = np.round(bounds + 1e-6, 1) >= min_score
+    metrics.incr("prefilter.pruned", int((~keep).sum()))
+    if not keep.all():
+        print(f"상장 목록 사전 필터: {len(df_cap)}종목 중 {int((~keep).sum())}종목 제외 (기준 {min_score}점)")
+    return df_cap[keep]
+
+def _rows_to_frame(ordered_rows):
+    """(원래 종목 순서, 결과 행) 리스트를 점수 내림차순 -> 종목 순서로 정렬한 DataFrame으로 만듭니다."""
+    ordered_rows = sorted(ordered_rows, key=lambda item: (-item[1]['적합도 점수'], item[0]))
+    return pd.DataFrame([row for _, row in ordered_rows])
+
+class ScanStream:
+    """
+    스캔 결과를 종목(전체 시장 스캔은 종목 묶음)이 끝나는 대로 내보내는 이터레이터입니다.
+    for current, total, name, rows in stream: 형태로 쓰며, rows는 이번에 새로 나온 결과 행 리스트입니다. (점수 0 종목 제외)
+    반복하는 도중에도 top()으로 지금까지의 상위 top_n개, to_frame()으로 지금까지의 전체 결과를 볼 수 있고,
+    반복이 끝난 뒤 to_frame()은 완료 순서와 관계없이 한꺼번에 스캔한 결과와 같습니다.
+    keep_all=False(top-K 모드)이면 상위 top_n개 힙만 보관하고, to_frame()도 그 top_n개만 돌려줍니다.
+    """
+    
+    def __init__(self, source, total, top_n=SCAN_TOP_N, keep_all=True, min_score=0):
+        self._source = source   # (완료 종목 수, 마지막 종목명, [(종목 순서, 결과 행), ...])를 내보내는 제너레이터
+        self.total = total
+        self.top_n = top_n
+        self.keep_all = keep_all
+        self.min_score = min_score
+        self.done = 0
+        self._rows = []
+        self._top = []          # (점수, -종목 순서, 결과 행) 최소 힙
+        self._cutoff = min_score
+    
+    def __iter__(self):
+        for done, name, new_rows in self._source:
+            self.done = done
+            for order, row in new_rows:
+                if self.keep_all:
+                    self._rows.append((order, row))
+                self._push_top(order, row)
+            yield done, self.total, name, [row for _, row in new_rows]
+    
+    @property
+    def cutoff(self):
+        """
+        이 점수 미만인 종목은 더 이상 결과에 들어갈 수 없는 합격선 (점수만 올라가며, 작업 스레드에서 읽어도 안전)
+        top-K 모드에서 힙이 차면 현재 K번째 점수, 그 전에는 min_score입니다.
+        """
+        return self._cutoff
+    
+    def _push_top(self, order, row):
+        item = (row['적합도 점수'], -order, row)
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, item)
+        elif item[:2] > self._top[0][:2]:
+            heapq.heapreplace(self._top, item)
+        # 힙을 고치는 도중의 값을 작업 스레드가 읽지 않도록 합격선은 따로 한 번에 갱신
+        if not self.keep_all and len(self._top) >= self.top_n:
+            self._cutoff = max(self.min_score, self._top[0][0])
+    
+    def top(self):
+        """지금까지 나온 결과 중 점수 상위 top_n개 행 (점수 같으면 원래 종목 순서)"""
+        return [row for _, _, row in sorted(self._top, key=lambda item: item[:2], reverse=True)]
+    
+    def to_frame(self):
+        """지금까지 나온 결과 행 전체(top-K 모드면 상위 top_n개)를 점수순으로 정렬한 DataFrame"""
+        if not self.keep_all:
+            return _rows_to_frame([(-neg_order, row) for _, neg_order, row in self._top])
+        return _rows_to_frame(self._rows)
+    
+    def close(self):
+        """스캔을 중간에 멈추고 아직 시작하지 않은 작업을 취소합니다."""
+        self._source.close()
+
+def _empty_stream(top_n=SCAN_TOP_N):
+    return ScanStream(iter(()), 0, top_n)
 
-def scan_hot_stocks(limit=50, progress_callback=None):
+def iter_scan_hot_stocks(limit=50, workers=1, max_rps=None, top_n=SCAN_TOP_N, min_score=0, top_k=None):
+    """
+    scan_hot_stocks와 같은 종목을 같은 방식으로 채점하되, 종목이 끝나는 대로 결과를 내보내는 ScanStream을 리턴합니다.
+    채점은 반복을 시작할 때 진행되며, 결과 행에는 차트 DataFrame 대신 '_handle'만 들어 있습니다.
+    min_score를 주면 그 점수 미만 종목은 결과에서 빼고, 상장 목록만으로 도달할 수 없는 종목은 일봉을 받지 않습니다.
+    top_k를 주면 상위 top_k개만 보관하는 top-K 모드로 돌며(top_n 대신), 합격선에 못 미칠 종목은 채점 도중 멈춥니다.
+    """
+    df_cap = get_candidate_tickers()
+    if df_cap.empty:
+        return _empty_stream(top_n)
+    
+    # 시간 절약을 위해 시가총액 상위 일부 종목만 테스트 진행
+    df_cap = prefilter_candidates(df_cap.iloc[:limit], min_score)
+    tickers = list(df_cap.index)
+    
+    # df_cap 안의 'Name' 컬럼으로 종목 이름 맵핑
+    names_dict = df_cap['Name'].to_dict()
+    
+    today = datetime.today()
+    limiter = RateLimiter(max_rps) if max_rps else None
+    
+    def source():
+        outputs = _iter_tickers(lambda tk: score_ticker(tk, today, limiter, lambda: stream.cutoff), tickers, workers)
+        try:
+            for done, (i, (score, details, price, chg_pct, pass_str, markers)) in enumerate(outputs, start=1):
+                tk = tickers[i]
+                name = names_dict.get(tk, tk)
+                rows = []
+                if score > 0 and score >= min_score:
+                    rows.append((i, _result_row(tk, name, df_cap, score, price, chg_pct, pass_str, make_chart_handle(tk, today))))
+                yield done, name, rows
+        finally:
+            outputs.close()
+    
+    if top_k:
+        stream = ScanStream(source(), len(tickers), top_k, keep_all=False, min_score=min_score)
+    else:
+        stream = ScanStream(source(), len(tickers), top_n, min_score=min_score)
+    return stream
+
+def scan_hot_stocks(limit=50, progress_callback=None, workers=1, max_rps=None, vectorized=False, min_score=0, top_k=None):
     """
     개발 편의를 위해 전체 종목 중 거래대금 상위 종목 일부만 샘플링하여 
     빠르게 엔진을 테스트하는 함수입니다. (시가총액 500억 이상 기본 조건)
+    workers > 1 이면 여러 종목을 스레드로 동시에 조회하고, max_rps로 전체 초당 시세 요청 수를 제한합니다.
+    progress_callback(current, total, name)은 항상 호출한 스레드에서 완료 순서대로 불립니다.
+    vectorized=True 이면 종목별 채점 대신 패널 엔진(panel.py)으로 한꺼번에 채점합니다.
+    결과 행에는 차트 DataFrame 대신 '_handle'만 들어 있습니다. (get_chart_payload 참고)
+    min_score를 주면 그 점수 미만 종목은 결과에서 빼고, 상장 목록 사전 필터로 가망 없는 종목은 조회하지 않습니다.
+    top_k를 주면 점수 상위 top_k개만 힙으로 보관해 돌려주고, 그 안에 들 수 없는 종목은 채점 도중 멈춥니다.
+    진행 중인 결과가 필요하면 iter_scan_hot_stocks를 쓰세요.
     """
+    if not vectorized:
+        stream = iter_scan_hot_stocks(limit, workers, max_rps, min_score=min_score, top_k=top_k)
+        for current, total, name, rows in stream:
+            if progress_callback:
+                progress_callback(current, total, name)
+        return stream.to_frame()
+    
     df_cap = get_candidate_tickers()
     if df_cap.empty:
         return pd.DataFrame()
-        
-    # 시간 절약을 위해 시가총액 상위 일부 종목만 테스트 진행
-    tickers = list(df_cap.index)[:limit]
+    
+    df_cap = prefilter_candidates(df_cap.iloc[:limit], min_score)
+    tickers = list(df_cap.index)
+    names_dict = df_cap['Name'].to_dict()
+    today = datetime.today()
+    limiter = RateLimiter(max_rps) if max_rps else None
+    outputs = _score_vectorized(tickers, names_dict, workers, limiter, progress_callback, today)
+    
     results = []
+    for i, (tk, (score, details, price, chg_pct, pass_str, markers)) in enumerate(zip(tickers, outputs)):
+        if score > 0 and score >= min_score:
+            name = names_dict.get(tk, tk)
+            results.append((i, _result_row(tk, name, df_cap, score, price, chg_pct, pass_str, make_chart_handle(tk, today))))
+    if top_k:
+        results = heapq.nlargest(top_k, results, key=lambda item: (item[1]['적합도 점수'], -item[0]))
+    return _rows_to_frame(results)
+
+def scan_rule_variants(rules=None, limit=50, variants=None, progress_callback=None, workers=1, max_rps=None, min_score=0):
+    """
+    규칙 파일(rules.py)의 여러 변형을 같은 데이터로 한 번에 채점해 {변형 이름: 결과 DataFrame}을 리턴합니다.
+    종목 선정과 결과 행 형태는 scan_hot_stocks(vectorized=True)와 같고, 일봉 조회와 공통 지표 계산은 변형끼리 한 번만 합니다.
+    rules는 RuleSet 또는 규칙 파일 경로이며, 없으면 기존 A~G와 같은 default_rules.json을 씁니다.
+    상장 목록 사전 필터는 A~G 공식의 상한이라 사용자 규칙에는 맞지 않으므로 쓰지 않습니다.
+    """
+    ruleset = rules if isinstance(rules, RuleSet) else load_rules(rules)
+    names = list(variants or ruleset.variants)
+
+    df_cap = get_candidate_tickers()
+    if df_cap.empty:
+        return {name: pd.DataFrame() for name in names}
+
+    df_cap = df_cap.iloc[:limit]
+    tickers = list(df_cap.index)
+    names_dict = df_cap['Name'].to_dict()
+    today = datetime.today()
+    limiter = RateLimiter(max_rps) if max_rps else None
+    frames = _map_tickers(lambda tk: _safe_history(tk, today, limiter), tickers, names_dict, workers, progress_callback)
+
+    failed = [df is None for df in frames]
+    with metrics.timer("panel.build"):
+        panel = Panel.from_frames({tk: pd.DataFrame() if df is None else df for tk, df in zip(tickers, frames)})
+    with metrics.timer("rules.score"):
+        scored = ruleset.score_panel(panel, names)
+
+    results = {}
+    for name, outputs in scored.items():
+        rows = []
+        for i, (tk, fail, (score, details, price, chg_pct, pass_str, markers)) in enumerate(zip(tickers, failed, outputs)):
+            if not fail and score > 0 and score >= min_score:
+                rows.append((i, _result_row(tk, names_dict.get(tk, tk), df_cap, score, price, chg_pct, pass_str,
+                                            make_chart_handle(tk, today))))
+        results[name] = _rows_to_frame(rows)
+    return results
+
+def _score_chunk(tickers, today, threads, max_rps, min_score, top_k=None):
+    """
+    (프로세스 풀 작업자) 종목 묶음 하나의 일봉을 조회해 패널 엔진으로 채점하고,
+    min_score 이상인 종목의 스칼라 결과만 리턴합니다. DataFrame은 부모 프로세스로 넘기지 않습니다.
+    top_k를 주면 묶음 안의 상위 top_k개만 리턴합니다. (전체 상위 K개는 반드시 각 묶음의 상위 K개 안에 있음)
+    (결과 행 리스트, 이 묶음의 계측 기록)을 리턴하며, 부모는 계측 기록을 자기 계측기에 합칩니다. (metrics.Metrics.merge)
+    """
+    # 작업자 프로세스는 여러 묶음을 차례로 맡으므로 묶음마다 계측을 새로 시작
+    metrics.get_metrics().reset()
+    limiter = RateLimiter(max_rps) if max_rps else None
+    frames = _map_tickers(lambda tk: _safe_history(tk, today, limiter), tickers, {}, threads)
+    scored = _score_frames(tickers, frames)
+    del frames
+    
+    rows = []
+    for tk, (score, details, price, chg_pct, pass_str, markers) in zip(tickers, scored):
+        if score > 0 and score >= min_score:
+            rows.append((tk, score, price, chg_pct, pass_str))
+    if top_k:
+        # 점수가 같으면 묶음 안의 종목 순서(= 전체 종목 순서)가 앞선 종목을 남김
+        rows = heapq.nlargest(top_k, rows, key=lambda row: row[1])
+    return rows, metrics.get_metrics().export()
+
+def iter_full_universe(min_score=0, workers=None, chunk_size=FULL_SCAN_CHUNK, max_rps=None, today=None, top_n=SCAN_TOP_N, top_k=None):
+    """
+    scan_full_universe와 같은 방식으로 전체 종목을 채점하되, 종목 묶음이 끝나는 대로 결과를 내보내는 ScanStream을 리턴합니다.
+    이터레이션마다 current는 완료 종목 수, name은 그 묶음의 마지막 종목명입니다.
+    top_k를 주면 각 작업자는 묶음 안의 상위 top_k개만 돌려주고, 스트림은 전체 상위 top_k개만 보관합니다.
+    """
+    df_cap = get_candidate_tickers()
+    if df_cap.empty:
+        return _empty_stream(top_n)
     
-    # fdr로 종목 이름 맵핑 
-    # df_cap 안의 'Name' 컬럼 활용
+    # 상장 목록만으로 min_score에 도달할 수 없는 종목은 작업자에게 넘기지 않음
+    df_cap = prefilter_candidates(df_cap, min_score)
+    tickers = list(df_cap.index)
     names_dict = df_cap['Name'].to_dict()
+    order = {tk: i for i, tk in enumerate(tickers)}
+    today = today or datetime.today()
+    workers = workers or os.cpu_count() or 1
+    per_worker_rps = (max_rps / workers) if max_rps else None
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
     
-    for i, tk in enumerate(tickers):
-        score, details, price, chg_pct, pass_str, df_chart, df_w, df_m, markers = run_strategy(tk)
-        
-        name = names_dict.get(tk, tk)
-        
-        if score > 0:
-            market_cap_100m = df_cap.loc[tk, '시가총액(억)'] if tk in df_cap.index else 0
-            
-            results.append({
-                '종목코드': tk,
-                '종목명': name,
-                '현재가(원)': price,
-                '등락률(%)': chg_pct,
-                '영업이익(억)': '실시간계산대기',
-                '시가총액(억)': market_cap_100m,
-                '적합도 점수': score,
-                '조건만족': pass_str,
-                '_chart_df': df_chart,         # 일별(단기) 차트
-                '_chart_w': df_w,              # 주별(중기) 차트
-                '_chart_m': df_m,              # 월별(장기) 차트
-                '_markers': markers,           # 오버레이 마커용 
-                '_details': details            # 점수 산정 세부 내역 
-            })
-            
+    def source():
+        done = 0
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = {
+                pool.submit(_score_chunk, chunk, today, SCAN_WORKERS, per_worker_rps, min_score, top_k): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    scored, chunk_metrics = future.result()
+                    metrics.get_metrics().merge(chunk_metrics)
+                except Exception as e:
+                    print(f"종목 묶음 채점 실패 ({chunk[0]}~{chunk[-1]}): {e}")
+                    metrics.incr("chunk.error")
+                    scored = []
+                
+                rows = [
+                    (order[tk], _result_row(tk, names_dict.get(tk, tk), df_cap, score, price, chg_pct, pass_str,
+                                            make_chart_handle(tk, today)))
+                    for tk, score, price, chg_pct, pass_str in scored
+                ]
+                done += len(chunk)
+                yield done, names_dict.get(chunk[-1], chunk[-1]), rows
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    if top_k:
+        return ScanStream(source(), len(tickers), top_k, keep_all=False, min_score=min_score)
+    return ScanStream(source(), len(tickers), top_n, min_score=min_score)
+
+def scan_full_universe(min_score=0, workers=None, chunk_size=FULL_SCAN_CHUNK, max_rps=None, progress_callback=None, today=None, top_k=None):
+    """
+    get_candidate_tickers의 전체 종목(시가총액 500억 이상 KOSPI+KOSDAQ)을 프로세스 풀로 나눠 채점합니다.
+    각 작업자는 chunk_size 종목씩 받아 패널 엔진으로 채점한 뒤 스칼라 결과만 돌려주고,
+    부모는 묶음이 끝나는 대로 합치므로 전체 종목의 DataFrame을 한꺼번에 들고 있지 않습니다.
+    max_rps는 전체 초당 요청 수이며 작업자 프로세스 수로 나눠 각자 적용합니다.
+    progress_callback(current, total, name)은 묶음이 끝날 때마다 (완료 종목 수, 전체 종목 수, 마지막 종목명)으로 불립니다.
+    결과 행에는 차트 DataFrame 대신 '_handle'만 들어 있습니다. (get_chart_payload 참고)
+    top_k를 주면 점수 상위 top_k개만 돌려줍니다.
+    진행 중인 결과가 필요하면 iter_full_universe를 쓰세요.
+    """
+    stream = iter_full_universe(min_score, workers, chunk_size, max_rps, today, top_k=top_k)
+    for current, total, name, rows in stream:
         if progress_callback:
-            progress_callback(i + 1, len(tickers), name)
-            
-    df_res = pd.DataFrame(results)
-    if not df_res.empty:
-        df_res = df_res.sort_values(by='적합도 점수', ascending=False).reset_index(drop=True)
-    return df_res
+            progress_callback(current, total, name)
+    return stream.to_frame()
 
 if __name__ == "__main__":
     print("엔진 테스트 시작... 시가총액 상위 50개 종목을 대상으로 A~G 필터링을 1차 검증합니다.")
@@ -0,0 +1,252 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from bars import Bars
+from panel import MIN_BARS, compute_scores, result_details
+
+# 이동평균 창 길이 (MA5/MA20/MA60)와 5일선 각도 비교용 지연 (3봉 전)
+MA_WINDOWS = (5, 20, 60)
+MA5_ANGLE_LAG = 3
+
+# 조건별 창: B 거래대금 5봉, D 급등률/E 고가 10봉, C 최저가는 5봉 전에서 끝나는 20봉
+TRADE_WINDOW = 5
+SPIKE_WINDOW = 10
+HIGH_WINDOW = 10
+LOW_WINDOW = 20
+LOW_DELAY = 5
+
+# 확정 종가 보관 개수 (가장 긴 창 + 여유), 누적 합 부동소수 오차를 지우려고 다시 더하는 주기(확정 봉 수)
+CLOSE_BUFFER = 64
+RESYNC_EVERY = 256
+
+
+class _WindowExtreme:
+    """
+    고정 길이 창의 최댓값(또는 최솟값)과 그 첫 위치를 단조 덱으로 관리합니다.
+    값이 같으면 먼저 들어온 봉을 남겨 pandas idxmax/idxmin과 같은 위치를 가리키며, 추가/만료 모두 분할상환 O(1)입니다.
+    """
+
+    def __init__(self, mode='max'):
+        self.sign = 1 if mode == 'max' else -1
+        self._items = deque()  # (봉 번호, 값, 부가 정보)
+
+    def push(self, index, value, payload=None):
+        if value is None or math.isnan(value):
+            return
+        key = self.sign * value
+        while self._items and self.sign * self._items[-1][1] < key:
+            self._items.pop()
+        self._items.append((index, value, payload))
+
+    def expire(self, lowest_index):
+        """봉 번호가 lowest_index보다 작은 값을 창에서 뺍니다."""
+        while self._items and self._items[0][0] < lowest_index:
+            self._items.popleft()
+
+    def front(self):
+        return self._items[0] if self._items else None
+
+
+class IndicatorState:
+    """
+    한 종목의 A~G 채점 입력을 봉 단위로 갱신하는 증분 지표 상태입니다.
+    마지막 봉은 장중에 계속 바뀌는 '임시 봉'으로 따로 들고, 그 전 봉들만 누적 합(MA5/MA20/MA60)과
+    단조 덱(5봉 거래대금, 10봉 급등률/고가, 지연된 20봉 최저가)에 확정 반영합니다.
+    - 같은 날짜 봉이 다시 들어오면 임시 봉만 바꿔 끼움: O(1)
+    - 새 날짜 봉이 들어오면 임시 봉을 확정하고 새 임시 봉으로 교체: 분할상환 O(1)
+    score()는 engine.score_history와 같은 형태의 결과를 리턴합니다.
+    """
+
+    def __init__(self):
+        self.count = 0                    # 확정 봉 수 (임시 봉 번호 = count)
+        self.last_bar = None              # 임시 봉 (date, open, high, low, close, volume)
+        self.committed_date = None        # 마지막 확정 봉 날짜
+        self._closes = [0.0] * CLOSE_BUFFER
+        self._sums = {w: 0.0 for w in MA_WINDOWS}   # 창 길이 w: 확정 종가 중 최근 w-1개의 합
+        self._ma5_prev_sum = 0.0          # MA5의 3봉 전 값에 쓰는 확정 종가 5개의 합
+        self._trade = _WindowExtreme('max')
+        self._spike = _WindowExtreme('max')
+        self._high = _WindowExtreme('max')
+        self._low = _WindowExtreme('min')
+        self._pending_lows = deque()      # 아직 C 창에 들어가지 않은 최근 확정 봉의 저가
+
+    @classmethod
+    def from_frame(cls, df):
+        """일봉 DataFrame(Open/High/Low/Close/Volume, 날짜 인덱스) 또는 Bars 전체로 상태를 만듭니다."""
+        state = cls()
+        state.update_from_frame(df)
+        return state
+
+    @property
+    def length(self):
+        """임시 봉을 포함한 전체 봉 수"""
+        return self.count + (1 if self.last_bar is not None else 0)
+
+    @property
+    def last_date(self):
+        return self.last_bar[0] if self.last_bar is not None else None
+
+    def _close_at(self, index):
+        """확정 봉 index의 종가 (아직 없는 앞쪽 봉은 0)"""
+        if index < 0:
+            return 0.0
+        return self._closes[index % CLOSE_BUFFER]
+
+    def update(self, date, open_, high, low, close, volume):
+        """
+        봉 하나를 반영합니다. 임시 봉과 날짜가 같으면 임시 봉을 고치고, 더 늦으면 임시 봉을 확정한 뒤 새 임시 봉으로 둡니다.
+        임시 봉보다 이전 날짜는 되돌릴 수 없으므로 ValueError를 던집니다.
+        """
+        date = pd.Timestamp(date)
+        bar = (date, float(open_), float(high), float(low), float(close), float(volume))
+        if self.last_bar is not None:
+            if date < self.last_bar[0]:
+                raise ValueError(f"이미 반영한 봉보다 이전 날짜입니다: {date.date()} < {self.last_bar[0].date()}")
+            if date > self.last_bar[0]:
+                self._commit(self.last_bar)
+        self.last_bar = bar
+
+    def update_from_frame(self, df):
+        """df(DataFrame 또는 Bars)에서 임시 봉 날짜 이후(같은 날 포함)의 봉만 차례로 반영합니다. (저장소에서 다시 읽은 최근 일봉용)"""
+        if isinstance(df, Bars):
+            if self.last_bar is not None:
+                df = df.since(self.last_bar[0])
+            rows = zip(df.dates, df.open, df.high, df.low, df.close, df.volume)
+        else:
+            if self.last_bar is not None:
+                df = df[df.index >= self.last_bar[0]]
+            rows = zip(df.index, df['Open'].values, df['High'].values,
+                       df['Low'].values, df['Close'].values, df['Volume'].values)
+        for date, o, h, l, c, v in rows:
+            self.update(date, o, h, l, c, v)
+
+    def continues(self, df):
+        """
+        df가 이 상태에 이어 붙일 수 있는 일봉인지 확인합니다.
+        마지막 확정 봉이 df에 같은 종가로 있어야 하며, 과거 봉이 수정됐거나(액면분할 등) 공백이 생기면 False입니다.
+        """
+        if self.committed_date is None:
+            return False
+        if isinstance(df, Bars):
+            pos = df.locate(self.committed_date)
+            return pos >= 0 and float(df.close[pos]) == self._close_at(self.count - 1)
+        if self.committed_date not in df.index:
+            return False
+        return float(df.loc[self.committed_date, 'Close']) == self._close_at(self.count - 1)
+
+    def _commit(self, bar):
+        """임시 봉을 확정 봉 목록의 끝(번호 count)에 붙입니다."""
+        date, _, high, low, close, volume = bar
+        i = self.count
+        prev_close = self._close_at(i - 1)
+
+        # 이동평균 누적 합: 임시 봉 번호 n 기준 창 길이 w인 이평선의 확정 부분은 n-w+1 ~ n-1
+        for w in MA_WINDOWS:
+            self._sums[w] += close - self._close_at(i - w + 1)
+        # 3봉 전 MA5의 확정 종가 5개: 임시 봉 번호 n 기준 n-7 ~ n-3 이므로 n=i+1이 되면 i-2가 들어오고 i-7이 빠짐
+        self._ma5_prev_sum += self._close_at(i - MA5_ANGLE_LAG + 1) - self._close_at(i - MA5_ANGLE_LAG - 4)
+        self._closes[i % CLOSE_BUFFER] = close
+
+        self._trade.push(i, volume * close, (date, close))
+        if prev_close > 0:
+            self._spike.push(i, high / prev_close, (date, high))
+        self._high.push(i, high)
+        self._pending_lows.append((i, low, date))
+
+        self.committed_date = date
+        self.count = i + 1
+        n = self.count
+        # C 창은 임시 봉 번호 n 기준 n-24 ~ n-5 (score_history의 iloc[-25:-5])
+        while self._pending_lows and self._pending_lows[0][0] <= n - LOW_DELAY:
+            j, value, day = self._pending_lows.popleft()
+            self._low.push(j, value, day)
+        self._trade.expire(n - TRADE_WINDOW + 1)
+        self._spike.expire(n - SPIKE_WINDOW + 1)
+        self._high.expire(n - HIGH_WINDOW + 1)
+        self._low.expire(n - LOW_DELAY - LOW_WINDOW + 1)
+
+        if n % RESYNC_EVERY == 0:
+            self._resync()
+
+    def _resync(self):
+        """누적 합을 보관 중인 종가로 다시 더해 부동소수 오차가 쌓이지 않게 합니다."""
+        n = self.count
+        for w in MA_WINDOWS:
+            self._sums[w] = math.fsum(self._close_at(j) for j in range(n - w + 1, n))
+        self._ma5_prev_sum = math.fsum(self._close_at(j) for j in range(n - MA5_ANGLE_LAG - 4, n - MA5_ANGLE_LAG + 1))
+
+    @staticmethod
+    def _combine(committed, value, payload):
+        """확정 봉 창의 최댓값과 임시 봉 값을 합칩니다. 값이 같으면 먼저 나온 확정 봉이 이깁니다."""
+        if committed is not None and not value > committed[1]:
+            return committed[1], committed[2]
+        return value, payload
+
+    def _inputs(self):
+        """(panel.compute_indicators와 같은 키의 길이 1 배열 딕셔너리, 마커 좌표 딕셔너리)"""
+        date, _, high, low, close, volume = self.last_bar
+        n = self.count
+        prev_close = self._close_at(n - 1)
+
+        max_trade_val, b_point = self._combine(self._trade.front(), volume * close, (date, close))
+        spike = high / prev_close if prev_close > 0 else 0.0
+        max_spike, d_point = self._combine(self._spike.front(), spike, (date, high))
+        high_front = self._high.front()
+        max_high_10 = max(high, high_front[1]) if high_front is not None else high
+        low_front = self._low.front()
+        min_low, c_point = (low_front[1], (low_front[2], low_front[1])) if low_front is not None else (math.nan, None)
+
+        def arr(value):
+            return np.array([value], dtype=float)
+
+        current_close = np.trunc(arr(close))
+        ma5, ma20, ma60 = (arr((self._sums[w] + close) / w) for w in MA_WINDOWS)
+        ma5_prev = arr(self._ma5_prev_sum / 5)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ind = {
+                'current_close': current_close, 'prev_close': np.trunc(arr(prev_close)),
+                'ma5': ma5, 'ma20': ma20, 'ma60': ma60, 'ma5_prev': ma5_prev,
+                'ma5_angle': (ma5 - ma5_prev) / ma5_prev * 100,
+                'max_trade_val': arr(max_trade_val),
+                'min_low': arr(min_low), 'rise_ratio': (current_close - min_low) / min_low,
+                'max_spike': arr(max_spike),
+                'max_high_10': arr(max_high_10), 'retention': current_close / max_high_10,
+                'ma5_ratio': current_close / ma5,
+            }
+        return ind, {'B': b_point, 'C': c_point, 'D': d_point}
+
+    def indicators(self):
+        """panel.compute_indicators와 같은 키의 지표 딕셔너리 (값은 길이 1 배열)"""
+        return self._inputs()[0]
+
+    def score(self):
+        """engine.score_history와 같은 (점수, details, 현재가, 등락률, 조건만족, markers)를 리턴합니다."""
+        if self.length < MIN_BARS:
+            return 0, {}, 0, 0, "None", {} # 데이터 너무 적음
+
+        ind, points = self._inputs()
+        total, scores, passes = compute_scores(ind)
+        details, pass_str = result_details(scores, passes, 0)
+
+        current_close = int(ind['current_close'][0])
+        prev_close = int(ind['prev_close'][0])
+        current_chg_pct = round(((current_close - prev_close) / prev_close) * 100, 2) if prev_close > 0 else 0
+
+        # 차트 오버레이 마커 (score_history와 동일한 좌표)
+        markers = {}
+        if passes['B'][0]:
+            day, price = points['B']
+            markers['B_Vol'] = (day, price, "최대거래량")
+        if passes['C'][0]:
+            day, price = points['C']
+            markers['C_Low'] = (day, price, "기간최저가")
+        if passes['D'][0] and ind['max_spike'][0] >= 1.15:
+            day, price = points['D']
+            markers['D_Spike'] = (day, price, f"{((ind['max_spike'][0]-1)*100):.1f}%급등")
+        if passes['G'][0]:
+            markers['G_MA5'] = (self.last_bar[0], current_close, "5일선 밀착")
+
+        return round(total[0], 1), details, current_close, current_chg_pct, pass_str, markers
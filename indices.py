@@ -0,0 +1,148 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+import bar_store
+import market_calendar
+
+# 표시 이름 -> fdr 코드. 업종 지수(예: 'KS200'), 환율('USD/KRW'), 금리 등도 여기에 추가하면 됩니다.
+INDICES = {
+    'KOSPI': 'KS11',
+    'KOSDAQ': 'KQ11',
+    'S&P 500': 'US500',
+    'NASDAQ': 'IXIC'
+}
+
+# 스파크라인용 최근 조회 기간 (주말/휴일 고려 7일치)
+HISTORY_DAYS = 7
+
+# 장중에는 짧게, 장 마감 후에는 길게 메모리 값을 재사용 (초)
+LIVE_TTL = 60
+CLOSED_TTL = 1800
+
+# 지수 조회 전체 마감 시간(초): 늦는 지수는 이전 값으로 대체
+FETCH_DEADLINE = 10
+
+
+class IndexService:
+    """
+    설정한 지수들의 최근 일봉을 동시에 조회해 메모리와 디스크(bar_store)에 보관하는 스냅샷 서비스입니다.
+    TTL 안에서는 메모리 값을 그대로 쓰고, 만료되면 저장소 경유로 마지막 봉 부근만 다시 받아옵니다.
+    조회에 실패한 지수는 마지막으로 성공한 값을 'stale' 표시와 함께 돌려줍니다.
+    """
+
+    def __init__(self, indices=None, store=None, max_workers=8):
+        self.indices = dict(indices or INDICES)
+        self.store = store
+        self.max_workers = max_workers
+        self._frames = {}      # 코드 -> 최근 일봉 DataFrame
+        self._fetched_at = {}  # 코드 -> 마지막 성공 시각 (monotonic)
+        self._errors = {}      # 코드 -> 마지막 실패 메시지
+        self._inflight = {}    # 코드 -> 진행 중인 조회 Future (마감 시간을 넘겨도 끝날 때까지 유지)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def add_index(self, name, code):
+        """조회 대상 지수를 추가합니다. 동시에 조회하므로 지수를 늘려도 대기 시간은 거의 늘지 않습니다."""
+        with self._lock:
+            self.indices[name] = code
+
+    def _ttl(self):
+        return LIVE_TTL if market_calendar.is_market_open() else CLOSED_TTL
+
+    def _fetch(self, code):
+        today = datetime.today()
+        start_date = today - timedelta(days=HISTORY_DAYS)
+        store = self.store or bar_store.get_store()
+        df = store.load(code, start_date, today)
+        with self._lock:
+            self._frames[code] = df
+            self._fetched_at[code] = time.monotonic()
+            self._errors.pop(code, None)
+
+    def _forget(self, code, future):
+        with self._lock:
+            if self._inflight.get(code) is future:
+                del self._inflight[code]
+
+    def refresh(self, force=False):
+        """
+        TTL이 지난 지수만 동시에 다시 조회합니다.
+        이전 호출에서 마감 시간을 넘겨 아직 진행 중인 지수는 새로 조회하지 않고 그 조회를 다시 기다립니다.
+        (느린 업스트림에서 같은 지수 조회가 풀에 계속 쌓이지 않도록)
+        """
+        ttl = self._ttl()
+        now = time.monotonic()
+        submitted = []
+        with self._lock:
+            codes = list(dict.fromkeys(self.indices.values()))
+            due = [c for c in codes if force or now - self._fetched_at.get(c, float('-inf')) >= ttl]
+            if not due:
+                return
+            futures = {}
+            for code in due:
+                future = self._inflight.get(code)
+                if future is None:
+                    future = self._inflight[code] = self._pool.submit(self._fetch, code)
+                    submitted.append((code, future))
+                futures[future] = code
+        # 완료 콜백은 이미 끝난 Future면 이 스레드에서 바로 불리므로 잠금 밖에서 등록
+        for code, future in submitted:
+            future.add_done_callback(lambda f, code=code: self._forget(code, f))
+
+        done, not_done = wait(futures, timeout=FETCH_DEADLINE)
+        for future in done:
+            code = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"지수 데이터 수집 실패 ({code}): {e}")
+                with self._lock:
+                    self._errors[code] = str(e)
+        for future in not_done:
+            code = futures[future]
+            print(f"지수 데이터 수집 지연 ({code}): {FETCH_DEADLINE}초 초과")
+            with self._lock:
+                self._errors[code] = "timeout"
+
+    def snapshot(self):
+        """
+        지수별 {"close", "diff", "pct", "history", "stale", "error"} 딕셔너리를 리턴합니다.
+        데이터가 전혀 없으면 값은 0, error에 실패 사유가 들어갑니다.
+        """
+        self.refresh()
+        results = {}
+        with self._lock:
+            for name, code in self.indices.items():
+                df = self._frames.get(code)
+                error = self._errors.get(code)
+                if df is not None and len(df) >= 2:
+                    curr = df['Close'].iloc[-1]
+                    prev = df['Close'].iloc[-2]
+                    diff = curr - prev
+                    pct = (diff / prev) * 100
+                    history = df['Close'].tolist()
+                    results[name] = {"close": curr, "diff": diff, "pct": pct, "history": history,
+                                     "stale": error is not None, "error": error}
+                else:
+                    results[name] = {"close": 0, "diff": 0, "pct": 0, "history": [],
+                                     "stale": True, "error": error or "데이터 부족"}
+        return results
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """프로세스 전역에서 공유하는 기본 지수 서비스"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = IndexService()
+        return _service
+
+
+def get_snapshot():
+    return get_service().snapshot()
@@ -0,0 +1,109 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone, time as dtime
+
+# 한국 표준시 (KST = UTC + 9)
+KST = timezone(timedelta(hours=9))
+
+# KRX 정규장 시간
+MARKET_OPEN = dtime(9, 0)
+MARKET_CLOSE = dtime(15, 30)
+
+# 주말 외 KRX 휴장일 (공휴일, 대체공휴일, 선거일, 근로자의 날, 연말 휴장일)
+# 2027년은 공휴일/대체공휴일 규정 기준이므로 KRX 휴장일 공지가 나오면 확인합니다.
+KRX_HOLIDAYS = {
+    2024: ['01-01', '02-09', '02-12', '03-01', '04-10', '05-01', '05-06', '05-15', '06-06', '08-15',
+           '09-16', '09-17', '09-18', '10-01', '10-03', '10-09', '12-25', '12-31'],
+    2025: ['01-01', '01-27', '01-28', '01-29', '01-30', '03-03', '05-01', '05-05', '05-06', '06-03',
+           '06-06', '08-15', '10-03', '10-06', '10-07', '10-08', '10-09', '12-25', '12-31'],
+    2026: ['01-01', '02-16', '02-17', '02-18', '03-02', '05-01', '05-05', '05-25', '06-03', '08-17',
+           '09-24', '09-25', '10-05', '10-09', '12-25', '12-31'],
+    2027: ['01-01', '02-08', '02-09', '03-01', '05-05', '05-13', '08-16', '09-14', '09-15', '09-16',
+           '10-04', '10-11', '12-27', '12-31'],
+}
+
+# 임시공휴일처럼 나중에 정해진 휴장일은 이 파일(한 줄에 YYYY-MM-DD 하나, #은 주석)에 적으면 함께 반영됩니다.
+HOLIDAYS_FILE = os.environ.get("STOCK_HOLIDAYS_FILE", "krx_holidays.txt")
+
+
+def _load_holidays(path=HOLIDAYS_FILE):
+    days = {f"{year}-{md}" for year, dates in KRX_HOLIDAYS.items() for md in dates}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.split("#", 1)[0].strip()
+                    if line:
+                        days.add(datetime.strptime(line, "%Y-%m-%d").strftime("%Y-%m-%d"))
+        except Exception as e:
+            print(f"휴장일 파일 읽기 실패 ({path}): {e}")
+    return days
+
+
+# 주말 외 휴장일 (YYYY-MM-DD)
+HOLIDAYS = _load_holidays()
+HOLIDAY_YEARS = {int(day[:4]) for day in HOLIDAYS}
+
+_warned_years = set()
+_warn_lock = threading.Lock()
+
+
+def _check_year(year):
+    """휴장일 데이터가 없는 해를 물으면 한 번 경고합니다. (주말만 빼고 모두 거래일로 취급됨)"""
+    if year in HOLIDAY_YEARS:
+        return
+    with _warn_lock:
+        if year in _warned_years:
+            return
+        _warned_years.add(year)
+    print(f"경고: {year}년 KRX 휴장일 데이터가 없습니다. market_calendar.KRX_HOLIDAYS 또는 {HOLIDAYS_FILE}에 추가하세요.")
+
+
+def now_kst():
+    """현재 한국 시간을 리턴합니다."""
+    return datetime.now(KST)
+
+
+def is_trading_day(day):
+    """주말과 휴장일을 제외한 거래일 여부"""
+    _check_year(day.year)
+    return day.weekday() < 5 and day.strftime('%Y-%m-%d') not in HOLIDAYS
+
+
+def previous_trading_day(day):
+    """day 이전의 가장 가까운 거래일"""
+    day = day - timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def trading_date(now=None):
+    """
+    현재 시세/상장 목록이 기준으로 삼는 거래일을 리턴합니다.
+    장 시작 전이거나 휴장일이면 직전 거래일입니다.
+    """
+    now = now or now_kst()
+    today = now.date()
+    if is_trading_day(today) and now.time() >= MARKET_OPEN:
+        return today
+    return previous_trading_day(today)
+
+
+def is_market_open(now=None):
+    """정규장(09:00~15:30) 진행 중 여부"""
+    now = now or now_kst()
+    return is_trading_day(now.date()) and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+def next_run_time(times, now=None):
+    """now 이후 가장 가까운 거래일의 실행 시각(times 중 하나)을 KST datetime으로 리턴합니다."""
+    now = now or now_kst()
+    day = now.date()
+    while True:
+        if is_trading_day(day):
+            for t in sorted(times):
+                candidate = datetime.combine(day, t, KST)
+                if candidate > now:
+                    return candidate
+        day += timedelta(days=1)
@@ -0,0 +1,140 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# STOCK_METRICS=0 이면 계측을 끔 (기본은 켜짐: 단계당 perf_counter 두 번과 잠금 한 번 정도의 비용)
+ENABLED = os.environ.get("STOCK_METRICS", "1") != "0"
+
+# 지연 히스토그램 버킷 상한(초): 0.1ms부터 2배씩, 마지막 버킷은 약 105초 초과 전부
+BUCKETS = tuple(0.0001 * 2 ** i for i in range(21))
+
+PERCENTILES = (50, 90, 99)
+
+
+class Metrics:
+    """
+    스캔 파이프라인의 단계별 소요 시간 히스토그램과 카운터(캐시 적중/미적중, 재시도 등)를 모으는 계측기입니다.
+    여러 스레드에서 동시에 기록해도 안전하며, export()/merge()로 작업자 프로세스의 계측을 부모에 합칠 수 있습니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """모든 기록을 지우고 측정 시작 시각을 지금으로 맞춥니다."""
+        with self._lock:
+            self._timers = {}     # 단계 이름 -> [횟수, 합계(초), 최댓값(초), 버킷별 횟수]
+            self._counters = {}
+            self.started_at = datetime.now()
+
+    def observe(self, name, seconds):
+        """단계 name에 걸린 시간(초)을 하나 기록합니다."""
+        slot = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = [0, 0.0, 0.0, [0] * (len(BUCKETS) + 1)]
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+            timer[3][slot] += 1
+
+    @contextmanager
+    def timer(self, name):
+        """with 블록의 소요 시간을 단계 name으로 기록합니다. (예외로 빠져나가도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def export(self):
+        """다른 프로세스로 넘겨 merge()할 수 있는 원시 기록 (피클 가능한 dict)"""
+        with self._lock:
+            return {
+                "timers": {name: [t[0], t[1], t[2], list(t[3])] for name, t in self._timers.items()},
+                "counters": dict(self._counters),
+            }
+
+    def merge(self, raw):
+        """export()로 받은 다른 계측기의 기록을 더합니다."""
+        if not raw:
+            return
+        with self._lock:
+            for name, (count, total, peak, buckets) in raw.get("timers", {}).items():
+                timer = self._timers.get(name)
+                if timer is None:
+                    timer = self._timers[name] = [0, 0.0, 0.0, [0] * (len(BUCKETS) + 1)]
+                timer[0] += count
+                timer[1] += total
+                timer[2] = max(timer[2], peak)
+                timer[3] = [a + b for a, b in zip(timer[3], buckets)]
+            for name, n in raw.get("counters", {}).items():
+                self._counters[name] = self._counters.get(name, 0) + n
+
+    @staticmethod
+    def _percentile(buckets, count, peak, q):
+        """버킷 횟수로 추정한 q 백분위(초): 해당 순위가 들어 있는 버킷의 상한 (최댓값을 넘지 않음)"""
+        rank = count * q / 100
+        seen = 0
+        for bound, n in zip(BUCKETS, buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, peak)
+        return peak
+
+    def report(self):
+        """
+        JSON으로 저장할 수 있는 계측 보고서를 리턴합니다.
+        {"started_at", "elapsed_sec", "stages": {단계: {"count", "total_ms", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"}},
+         "counters": {이름: 값}}  (단계는 총 소요 시간이 큰 순서)
+        total_ms는 여러 스레드/프로세스에서 걸린 시간을 모두 더한 값이라 동시 스캔에서는 elapsed_sec보다 클 수 있습니다.
+        """
+        raw = self.export()
+        stages = {}
+        for name, (count, total, peak, buckets) in sorted(raw["timers"].items(), key=lambda item: -item[1][1]):
+            stage = {"count": count, "total_ms": round(total * 1000, 1), "mean_ms": round(total / count * 1000, 3)}
+            for q in PERCENTILES:
+                stage[f"p{q}_ms"] = round(self._percentile(buckets, count, peak, q) * 1000, 3)
+            stage["max_ms"] = round(peak * 1000, 3)
+            stages[name] = stage
+        return {
+            "started_at": self.started_at.isoformat(timespec='seconds'),
+            "elapsed_sec": round((datetime.now() - self.started_at).total_seconds(), 3),
+            "stages": stages,
+            "counters": dict(sorted(raw["counters"].items())),
+        }
+
+
+_default_metrics = Metrics()
+
+
+def get_metrics():
+    """프로세스 전역에서 공유하는 기본 계측기"""
+    return _default_metrics
+
+
+def timer(name):
+    """기본 계측기에 단계 name의 소요 시간을 기록하는 with 블록 (계측이 꺼져 있으면 아무것도 안 함)"""
+    if not ENABLED:
+        return nullcontext()
+    return _default_metrics.timer(name)
+
+
+def observe(name, seconds):
+    if ENABLED:
+        _default_metrics.observe(name, seconds)
+
+
+def incr(name, n=1):
+    if ENABLED:
+        _default_metrics.incr(name, n)
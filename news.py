@@ -0,0 +1,318 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+import metrics
+import translation
+from bar_store import CACHE_DIR
+
+# Google News RSS 검색 주소 (로컬 테스트 서버로 바꿔 끼울 수 있도록 분리)
+NEWS_URL = "https://news.google.com/rss/search"
+
+# 카테고리별 검색어 (검색어, hl, gl, ceid) - 주요 기사 및 퀄리티 위주로 큐레이션 개선
+NEWS_QUERIES = {
+    "🇰🇷 국내 증시 주요뉴스": ("국내 증시 주요뉴스 OR 코스피 시황", "ko", "KR", "KR:ko"),
+    "🇰🇷 국내 경제 핫이슈": ("한국 경제 주요기사 OR 경제 동향", "ko", "KR", "KR:ko"),
+    "🇺🇸 글로벌 증시 마감/시황": ("미국 증시 주요뉴스 OR 뉴욕증시 마감", "ko", "KR", "KR:ko"),
+    "🇺🇸 연준/금리/거시경제": ("Fed 금리 주요뉴스 OR 연준 미국 경제", "ko", "KR", "KR:ko"),
+    "🌎 글로벌 경제 오피니언 (외신)": ("global economy major news OR Wall Street stock market analysis", "en-US", "US", "US:en")
+}
+
+# RSS 크롤링 안정성 확보를 위한 헤더 위장
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Referer': 'https://www.google.com/'
+}
+
+# 요청 하나의 타임아웃과 전체 뉴스 수집 마감 시간(초)
+REQUEST_TIMEOUT = 7
+NEWS_DEADLINE = 8
+
+# 카테고리당 기사 수
+ITEMS_PER_CATEGORY = 5
+
+# 피드별 ETag/Last-Modified 와 기사 저장소
+DB_FILE = "news.sqlite"
+
+# 보관할 최대 기사 수 (초과 시 오래 전에 본 기사부터 삭제)
+MAX_STORED_ITEMS = 2000
+
+# RSS 본문을 나눠서 파싱하는 단위 (상위 기사만 찾으면 나머지는 파싱하지 않음)
+PARSE_CHUNK = 16 * 1024
+
+_session = None
+_store = None
+_lock = threading.Lock()
+
+
+class FeedStore:
+    """
+    피드 주소별 조건부 요청 헤더(ETag, Last-Modified)와 상위 기사 링크 목록,
+    링크를 키로 한 기사 본문을 SQLite에 보관합니다.
+    """
+
+    def __init__(self, path=None, max_items=MAX_STORED_ITEMS):
+        self.path = path or os.path.join(CACHE_DIR, DB_FILE)
+        self.max_items = max_items
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feeds (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    links TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    link TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    seen_at REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_feed(self, url):
+        """(etag, last_modified, 상위 링크 리스트) 또는 None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT etag, last_modified, links FROM feeds WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def get_items(self, links):
+        """링크 순서대로 저장된 기사를 리턴합니다. (저장소에 없는 링크는 제외)"""
+        if not links:
+            return []
+        with self._connect() as conn:
+            placeholders = ",".join("?" * len(links))
+            rows = conn.execute(
+                f"SELECT link, title, source, date FROM items WHERE link IN ({placeholders})", links
+            ).fetchall()
+        by_link = {r[0]: {"title": r[1], "title_ko": "", "link": r[0], "source": r[2], "date": r[3]} for r in rows}
+        return [by_link[link] for link in links if link in by_link]
+
+    def save(self, url, etag, last_modified, items, new_items):
+        """피드 상태와 새 기사를 저장합니다."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)",
+                [(it["link"], it["title"], it["source"], it["date"], now) for it in new_items]
+            )
+            links = [it["link"] for it in items]
+            if links:
+                placeholders = ",".join("?" * len(links))
+                conn.execute(f"UPDATE items SET seen_at = ? WHERE link IN ({placeholders})", [now, *links])
+            conn.execute(
+                "INSERT OR REPLACE INTO feeds VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(links), now)
+            )
+            count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            if count > self.max_items:
+                conn.execute(
+                    "DELETE FROM items WHERE link IN (SELECT link FROM items ORDER BY seen_at LIMIT ?)",
+                    (count - self.max_items,)
+                )
+
+
+def get_session():
+    """모든 뉴스 요청이 공유하는 커넥션 풀 세션"""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=len(NEWS_QUERIES))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+
+def get_store():
+    """프로세스 전역에서 공유하는 기본 피드 저장소"""
+    global _store
+    with _lock:
+        if _store is None:
+            _store = FeedStore()
+        return _store
+
+
+def _needs_translation(title, gl):
+    """외신 채널의 경우 한국어 번역본 제공"""
+    return "외신" in title or "US" in gl
+
+
+def _feed_url(q, hl, gl, ceid):
+    encoded_q = urllib.parse.quote(q)
+    return f"{NEWS_URL}?q={encoded_q}&hl={hl}&gl={gl}&ceid={ceid}"
+
+
+def _parse_item(item):
+    """RSS <item> 요소 하나를 기사 딕셔너리로 변환합니다."""
+    news_title = item.find('title').text
+    news_link = item.find('link').text
+
+    # 출처(source) 요소 찾기
+    source_node = item.find('source')
+    source_name = source_node.text if source_node is not None else "Unknown"
+
+    # 퍼블리시 시간
+    pub_date = item.find('pubDate')
+    pub_text = pub_date.text if pub_date is not None else ""
+
+    # ' - 출처' 형태가 제목에 붙어있는 경우 정리
+    if f" - {source_name}" in news_title:
+        news_title = news_title.replace(f" - {source_name}", "")
+
+    return {
+        "title": news_title,
+        "title_ko": "", # 외신 번역은 모든 카테고리 수집 후 한꺼번에 채움
+        "link": news_link,
+        "source": source_name,
+        "date": pub_text
+    }
+
+
+def _top_items(content, store, limit=ITEMS_PER_CATEGORY):
+    """
+    RSS 본문을 조금씩 파싱하면서 앞에서부터 limit개의 기사를 모읍니다.
+    이미 저장소에 있는 링크는 저장된 기사를 그대로 쓰고, 처음 보는 기사만 새로 변환합니다.
+    limit개를 채우면 나머지 본문은 파싱하지 않습니다.
+    (items, new_items)를 리턴합니다.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    raw = []
+    for start in range(0, len(content), PARSE_CHUNK):
+        parser.feed(content[start:start + PARSE_CHUNK])
+        for event, elem in parser.read_events():
+            if elem.tag == 'item':
+                raw.append(elem)
+                if len(raw) >= limit:
+                    break
+        if len(raw) >= limit:
+            break
+    else:
+        parser.close()
+
+    links = [elem.find('link').text for elem in raw]
+    known = store.get_items(links)
+    known_by_link = {it["link"]: it for it in known}
+
+    items, new_items = [], []
+    for elem, link in zip(raw, links):
+        if link in known_by_link:
+            items.append(known_by_link[link])
+        else:
+            item = _parse_item(elem)
+            items.append(item)
+            new_items.append(item)
+    return items, new_items
+
+
+def _fetch_category(title, q, hl, gl, ceid):
+    """
+    카테고리 하나의 RSS를 받아 기사 리스트를 리턴합니다.
+    ETag/Last-Modified 조건부 요청을 보내고, 304(변경 없음)이면 저장된 상위 기사를 그대로 씁니다.
+    """
+    url = _feed_url(q, hl, gl, ceid)
+    store = get_store()
+    state = store.get_feed(url)
+
+    headers = {}
+    if state is not None:
+        etag, last_modified, links = state
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    # verify=False 로 SSL 깐깐함 완화 (특정 환경 오류 방지)
+    with metrics.timer("news.fetch"):
+        res = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT, verify=False)
+
+    if res.status_code == 304 and state is not None:
+        items = store.get_items(state[2])
+        if len(items) == len(state[2]):
+            metrics.incr("news.not_modified")
+            return items
+        # 저장소에서 기사가 지워졌으면 조건 없이 다시 받음
+        res = get_session().get(url, timeout=REQUEST_TIMEOUT, verify=False)
+
+    res.raise_for_status() # 400, 500 에러 발생 시 except로 던짐
+
+    items, new_items = _top_items(res.content, store)
+    store.save(url, res.headers.get('ETag'), res.headers.get('Last-Modified'), items, new_items)
+    return items
+
+
+def get_latest_news(deadline=NEWS_DEADLINE):
+    """
+    Google News RSS를 활용하여 주요 키워드별 최신 기사를 5개씩 가져옵니다.
+    모든 카테고리를 하나의 커넥션 풀로 동시에 받아오며, deadline(초) 안에 끝나지 않은 카테고리는 빈 리스트로 채웁니다.
+    """
+    started = time.monotonic()
+    results = {title: [] for title in NEWS_QUERIES} # 에러/시간 초과 시 빈 리스트
+
+    pool = ThreadPoolExecutor(max_workers=len(NEWS_QUERIES))
+    futures = {pool.submit(_fetch_category, title, *params): title for title, params in NEWS_QUERIES.items()}
+    done, not_done = wait(futures, timeout=deadline)
+
+    for future in done:
+        title = futures[future]
+        try:
+            results[title] = future.result()
+        except Exception as e:
+            print(f"Error fetching news for {title}: {e}")
+    for future in not_done:
+        print(f"Error fetching news for {futures[future]}: {deadline}초 내에 응답 없음")
+
+    # 늦게 끝나는 요청은 기다리지 않음 (각 요청은 REQUEST_TIMEOUT 후 스스로 종료)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    # 외신 제목 번역: 여러 카테고리에 겹친 제목도 한 번만, 캐시에 없는 것만 묶어서 번역
+    # 멈춘 피드 요청이 풀을 차지하고 있어도 밀리지 않도록 번역은 따로 만든 풀에서 실행
+    foreign = [item for title, items in results.items()
+               if _needs_translation(title, NEWS_QUERIES[title][2]) for item in items]
+    if foreign:
+        titles = [item["title"] for item in foreign]
+        translate_pool = ThreadPoolExecutor(max_workers=1)
+        future = translate_pool.submit(translation.translate_titles, titles, 'ko')
+        translate_pool.shutdown(wait=False)
+        try:
+            translated = future.result(timeout=max(0.0, deadline - (time.monotonic() - started)))
+        except Exception as e:
+            print(f"뉴스 제목 번역 실패: {str(e) or f'{deadline}초 내에 끝나지 않음'}")
+            # 마감까지 못 끝내면 캐시에 있는 번역만 쓰고 나머지는 실패 표시 (번역은 끝나는 대로 캐시에 저장됨)
+            try:
+                translated = translation.get_cache().get_many(list(dict.fromkeys(titles)), 'ko')
+            except Exception:
+                translated = {}
+        for item in foreign:
+            item["title_ko"] = translated.get(item["title"], translation.FAILED)
+    return results
@@ -3,10 +3,34 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import json
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+import metrics
+from throttle import RateLimiter
 
 CONFIG_FILE = "config.json"
 
+# Telegram 봇 API 주소 (로컬 테스트 서버로 바꿔 끼울 수 있도록 분리)
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+# 봇 하나당 초당 발송 한도(Telegram 권장 30건/초), 동시 발송 스레드 수, 요청 하나의 타임아웃(초)
+TELEGRAM_MAX_RPS = 30
+TELEGRAM_WORKERS = 16
+TELEGRAM_TIMEOUT = 10
+
+# 429(요청 과다)/5xx/통신 오류 재시도: 최대 시도 횟수, 지수 백오프 기본 대기(초)와 상한
+TELEGRAM_MAX_ATTEMPTS = 4
+TELEGRAM_BACKOFF = 1.0
+TELEGRAM_MAX_BACKOFF = 30
+
+_session = None
+_limiters = {}
+_lock = threading.Lock()
+
 def load_config():
     if os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE, "r", encoding="utf-8") as f:
@@ -39,26 +63,96 @@ def send_email(subject, body, to_emails, sender_email, sender_password):
     except Exception as e:
         return False, f"이메일 발송 실패: {str(e)}"
 
-def send_telegram_message(text, bot_token, chat_ids):
-    """Telegram 봇 API를 이용해 메시지를 발송합니다."""
+def get_session():
+    """모든 Telegram 요청이 공유하는 커넥션 풀 세션"""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=TELEGRAM_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def _get_limiter(bot_token):
+    """봇 토큰별로 프로세스 전체가 공유하는 발송 속도 제한기"""
+    with _lock:
+        if bot_token not in _limiters:
+            _limiters[bot_token] = RateLimiter(TELEGRAM_MAX_RPS)
+        return _limiters[bot_token]
+
+def _retry_delay(res, attempt):
+    """
+    429면 Telegram이 알려준 retry_after, 그 외에는 지터를 섞은 지수 백오프 대기 시간(초)
+    어느 쪽이든 TELEGRAM_MAX_BACKOFF를 넘지 않습니다. (응답 하나가 발송 스레드를 오래 붙잡지 않도록, 남은 시도 횟수 안에서만 재시도)
+    """
+    if res is not None and res.status_code == 429:
+        try:
+            return min(TELEGRAM_MAX_BACKOFF, max(0.0, float(res.json()["parameters"]["retry_after"])))
+        except Exception:
+            pass
+    delay = min(TELEGRAM_MAX_BACKOFF, TELEGRAM_BACKOFF * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+def _send_one(url, payload, limiter):
+    """한 대화방에 메시지를 보내고 (성공 여부, 결과 메시지)를 리턴합니다. 429/5xx/통신 오류는 재시도합니다."""
+    detail = ""
+    for attempt in range(TELEGRAM_MAX_ATTEMPTS):
+        limiter.acquire()
+        res = None
+        try:
+            res = get_session().post(url, json=payload, timeout=TELEGRAM_TIMEOUT)
+            if res.status_code == 200:
+                return True, "발송 성공"
+            detail = f"HTTP {res.status_code}: {res.text[:200]}"
+            if res.status_code != 429 and res.status_code < 500:
+                return False, detail  # 잘못된 chat_id 등은 재시도해도 같음
+        except requests.RequestException as e:
+            detail = f"통신 오류: {e}"
+        if attempt < TELEGRAM_MAX_ATTEMPTS - 1:
+            metrics.incr("telegram.retry")
+            time.sleep(_retry_delay(res, attempt))
+    return False, f"{detail} ({TELEGRAM_MAX_ATTEMPTS}회 시도)"
+
+def deliver_telegram(text, bot_token, chat_ids, api_url=None):
+    """
+    여러 대화방에 같은 메시지를 동시에 보내고 {chat_id: (성공 여부, 결과 메시지)}를 리턴합니다.
+    하나의 커넥션 풀을 재사용하고, 봇별 초당 한도(TELEGRAM_MAX_RPS) 안에서 TELEGRAM_WORKERS개씩 동시에 보냅니다.
+    """
+    url = f"{api_url or TELEGRAM_API_URL}/bot{bot_token}/sendMessage"
+    limiter = _get_limiter(bot_token)
+    chat_ids = list(dict.fromkeys(chat_ids))
+
+    def send(chat_id):
+        payload = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "HTML"
+        }
+        try:
+            return _send_one(url, payload, limiter)
+        except Exception as e:
+            return False, f"텔레그램 통신 오류: {str(e)}"
+
+    with ThreadPoolExecutor(max_workers=max(1, min(TELEGRAM_WORKERS, len(chat_ids)))) as pool:
+        results = list(pool.map(send, chat_ids))
+    return dict(zip(chat_ids, results))
+
+def send_telegram_message(text, bot_token, chat_ids, api_url=None):
+    """Telegram 봇 API를 이용해 메시지를 발송합니다. (대화방별 결과는 deliver_telegram 참고)"""
     if not bot_token or not chat_ids:
         return False, "텔레그램 설정이 비어있습니다."
         
     try:
-        success_count = 0
-        for chat_id in chat_ids:
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-            payload = {
-                "chat_id": chat_id,
-                "text": text,
-                "parse_mode": "HTML"
-            }
-            res = requests.post(url, json=payload)
-            if res.status_code == 200:
-                success_count += 1
+        results = deliver_telegram(text, bot_token, chat_ids, api_url)
+        success_count = sum(1 for ok, _ in results.values() if ok)
+        failed = [f"{chat_id}({detail})" for chat_id, (ok, detail) in results.items() if not ok]
+        if failed:
+            print(f"텔레그램 발송 실패: {', '.join(failed)}")
                 
         if success_count > 0:
-            return True, f"텔레그램 발송 성공 ({success_count}건)"
+            return True, f"텔레그램 발송 성공 ({success_count}건)" + (f", 실패 {len(failed)}건" if failed else "")
         return False, "텔레그램 발송 요청 실패"
     except Exception as e:
         return False, f"텔레그램 통신 오류: {str(e)}"
@@ -0,0 +1,235 @@
+import hashlib
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from bar_store import CACHE_DIR
+
+DB_FILE = "outbox.sqlite"
+
+# 기본 SMTP 서버 (config.json의 "smtp": {"host", "port", "starttls"}로 바꿀 수 있음)
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 587
+SMTP_TIMEOUT = 30
+
+# 재시도: 최대 시도 횟수, 지수 백오프 기본 대기와 상한(초)
+MAX_ATTEMPTS = 6
+BACKOFF = 30
+MAX_BACKOFF = 3600
+
+# 발송 중 표시(임대)의 유효 시간(초): 발송 도중 프로세스가 죽으면 이 시간 뒤 다른 발송기가 다시 가져감
+LEASE_SECONDS = 300
+
+# 보낸 메일 기록 보관 기간(초) - 같은 키의 중복 발송을 막는 기간이기도 함
+KEEP_SENT = 7 * 24 * 3600
+
+
+def make_key(*parts):
+    """메시지 내용으로 만든 멱등 키 (같은 알림을 다시 넣어도 한 번만 발송)"""
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class Outbox:
+    """
+    발송할 이메일을 SQLite에 쌓아 두는 영속 발송함입니다.
+    - enqueue: 수신자별로 한 건씩, 멱등 키가 같은 메일은 다시 넣지 않음
+    - dispatch: 발송할 때가 된 메일을 인증된 SMTP 세션 하나로 몰아서 보내고, 실패하면 백오프 후 재시도
+    발송 직후 바로 'sent'로 기록하므로 재시작해도 이미 보낸 메일은 다시 보내지 않습니다.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, DB_FILE)
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS emails (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT NOT NULL UNIQUE,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    lease_until REAL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    sent_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_emails_due ON emails (status, next_attempt_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, subject, body, recipients, key=None):
+        """
+        수신자별 메일을 발송함에 넣고 새로 들어간 건수를 리턴합니다.
+        key를 주지 않으면 제목/본문으로 멱등 키를 만들며, 같은 키와 수신자의 메일이 이미 있으면 건너뜁니다.
+        """
+        base = key or make_key(subject, body)
+        now = time.time()
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO emails (key, recipient, subject, body, status, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, 'pending', ?, ?)",
+                [(make_key(base, r), r, subject, body, now, now) for r in dict.fromkeys(recipients)]
+            )
+            return conn.total_changes - before
+
+    def _claim(self, limit=None):
+        """발송할 때가 된 메일을 임대 표시하고 가져옵니다. (여러 발송기가 동시에 돌아도 한 건은 한 곳에서만 보냄)"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, key, recipient, subject, body, attempts FROM emails "
+                "WHERE (status = 'pending' AND next_attempt_at <= ?) OR (status = 'sending' AND lease_until < ?) "
+                "ORDER BY id LIMIT ?",
+                (now, now, -1 if limit is None else limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE emails SET status = 'sending', lease_until = ? WHERE id = ?",
+                [(now + LEASE_SECONDS, r[0]) for r in rows]
+            )
+        return rows
+
+    def _mark_sent(self, row_id):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE emails SET status = 'sent', sent_at = ?, lease_until = NULL, last_error = NULL WHERE id = ?",
+                (time.time(), row_id)
+            )
+
+    def _mark_failed(self, row_id, attempts, error):
+        """실패를 기록하고 남은 시도가 있으면 백오프 후 다시 보낼 수 있게 둡니다. 'failed'가 되면 True"""
+        attempts += 1
+        give_up = attempts >= MAX_ATTEMPTS
+        delay = min(MAX_BACKOFF, BACKOFF * (2 ** (attempts - 1))) * random.uniform(0.8, 1.2)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE emails SET status = ?, attempts = ?, next_attempt_at = ?, lease_until = NULL, last_error = ? "
+                "WHERE id = ?",
+                ('failed' if give_up else 'pending', attempts, time.time() + delay, str(error)[:500], row_id)
+            )
+        return give_up
+
+    def _release(self, rows):
+        """보내지 못한 채 가져온 메일을 시도 횟수 변경 없이 되돌립니다."""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE emails SET status = 'pending', lease_until = NULL WHERE id = ? AND status = 'sending'",
+                [(r[0],) for r in rows]
+            )
+
+    def counts(self):
+        """상태별 메일 수 {'pending': n, 'sent': n, ...}"""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM emails GROUP BY status").fetchall())
+
+    def purge(self, keep_seconds=KEEP_SENT):
+        """오래전에 보낸 메일 기록을 지웁니다."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM emails WHERE status = 'sent' AND sent_at < ?", (time.time() - keep_seconds,))
+
+    def dispatch(self, sender_email, sender_password, host=SMTP_HOST, port=SMTP_PORT, starttls=True, limit=None):
+        """
+        발송할 때가 된 메일을 SMTP 세션 하나(접속/STARTTLS/로그인 한 번)로 모두 보내고
+        {"sent": n, "retry": n, "failed": n} 을 리턴합니다.
+        세션이 중간에 끊기면 한 번 다시 접속해 이어서 보내고, 접속 자체가 안 되면 가져온 메일 모두 재시도로 돌립니다.
+        sender_password가 비어 있으면 로그인하지 않습니다. (로컬 테스트 서버용)
+        """
+        stats = {"sent": 0, "retry": 0, "failed": 0}
+        rows = self._claim(limit)
+        if not rows:
+            return stats
+
+        def connect():
+            server = smtplib.SMTP(host, port, timeout=SMTP_TIMEOUT)
+            server.ehlo()
+            if starttls:
+                server.starttls()
+                server.ehlo()
+            if sender_password:
+                # 앱 비밀번호 사용 필요 (계정 비밀번호 X)
+                server.login(sender_email, sender_password)
+            return server
+
+        def record_failure(row, error):
+            if self._mark_failed(row[0], row[5], error):
+                stats["failed"] += 1
+            else:
+                stats["retry"] += 1
+
+        server = None
+        reconnected = False
+        try:
+            for i, row in enumerate(rows):
+                row_id, key, recipient, subject, body, attempts = row
+                msg = MIMEMultipart()
+                msg['From'] = sender_email
+                msg['To'] = recipient
+                msg['Subject'] = subject
+                # 재발송되더라도 수신 서버가 같은 메일로 알아보도록 키에서 만든 고정 Message-ID 사용
+                msg['Message-ID'] = f"<{key[:32]}@stock-chart.outbox>"
+                msg.attach(MIMEText(body, 'html'))
+
+                while True:
+                    try:
+                        if server is None:
+                            server = connect()
+                        server.send_message(msg)
+                        self._mark_sent(row_id)
+                        stats["sent"] += 1
+                    except smtplib.SMTPServerDisconnected as e:
+                        server = None
+                        if not reconnected:
+                            reconnected = True
+                            continue
+                        record_failure(row, e)
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                        # 이 메일만의 문제: 세션은 그대로 쓰고 다음 메일로
+                        record_failure(row, e)
+                    except (smtplib.SMTPException, OSError) as e:
+                        # 접속/인증 실패: 남은 메일은 시도 횟수를 올려 재시도로 돌림
+                        for rest in rows[i:]:
+                            record_failure(rest, e)
+                        print(f"이메일 발송 세션 실패: {e}")
+                        return stats
+                    break
+        finally:
+            if server is not None:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
+            self._release(rows)
+        return stats
+
+
+_outbox = None
+_lock = threading.Lock()
+
+
+def get_outbox():
+    """프로세스 전역에서 공유하는 기본 발송함"""
+    global _outbox
+    with _lock:
+        if _outbox is None:
+            _outbox = Outbox()
+        return _outbox
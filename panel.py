@@ -0,0 +1,241 @@
+import numpy as np
+import pandas as pd
+
+from bars import Bars
+
+# run_strategy와 같은 최소 봉 개수 (MA60 계산 가능해야 채점)
+MIN_BARS = 60
+
+
+class Panel:
+    """
+    여러 종목의 일봉을 (종목 x 봉) 2차원 NumPy 배열로 정렬해 둔 묶음입니다.
+    각 행은 오른쪽 정렬되어 마지막 열이 그 종목의 최신 봉이고, 봉이 모자란 앞부분은 NaN(NaT)으로 채웁니다.
+    (run_strategy의 iloc 위치 기반 계산과 같은 창을 보도록 날짜가 아니라 봉 순서로 맞춥니다.)
+    """
+
+    def __init__(self, tickers, dates, open_, high, low, close, volume, lengths):
+        self.tickers = list(tickers)
+        self.dates = dates
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.tickers)
+
+    @classmethod
+    def from_frames(cls, frames, width=None):
+        """{종목코드: OHLCV DataFrame 또는 Bars} 딕셔너리로부터 패널을 만듭니다."""
+        tickers = list(frames.keys())
+        lengths = np.array([len(frames[tk]) for tk in tickers], dtype=np.int64)
+        if width is None:
+            width = int(lengths.max()) if len(lengths) else 0
+
+        shape = (len(tickers), width)
+        dates = np.full(shape, np.datetime64('NaT'), dtype='datetime64[ns]')
+        arrays = {col: np.full(shape, np.nan) for col in ['Open', 'High', 'Low', 'Close', 'Volume']}
+
+        for row, tk in enumerate(tickers):
+            df = frames[tk]
+            n = min(len(df), width)
+            if n == 0:
+                continue
+            if isinstance(df, Bars):
+                dates[row, width - n:] = df.datetimes()[-n:]
+                for col, arr in arrays.items():
+                    arr[row, width - n:] = df.column(col)[-n:]
+                continue
+            dates[row, width - n:] = df.index.values[-n:]
+            for col, arr in arrays.items():
+                arr[row, width - n:] = df[col].values[-n:]
+        lengths = np.minimum(lengths, width)
+
+        return cls(tickers, dates, arrays['Open'], arrays['High'], arrays['Low'],
+                   arrays['Close'], arrays['Volume'], lengths)
+
+    def visible(self, date):
+        """종목별로 date(포함)까지 나온 봉 개수"""
+        return (self.dates <= np.datetime64(pd.Timestamp(date), 'ns')).sum(axis=1)
+
+    def asof(self, date, width, visible=None):
+        """
+        각 종목을 date(포함) 이전 마지막 봉에서 끝나도록 잘라 width봉짜리 새 패널을 만듭니다.
+        그날 장 마감 시점에 스캔했다면 보였을 창과 같으므로, 긴 이력을 한 번만 읽어 두고 날짜별로 채점할 때 씁니다.
+        """
+        total = self.close.shape[1]
+        if visible is None:
+            visible = self.visible(date)
+        first = total - self.lengths                       # 종목별 첫 봉 열
+        cols = (first + visible)[:, None] - width + np.arange(width)
+        inside = cols >= first[:, None]
+        cols = np.clip(cols, 0, max(total - 1, 0))
+
+        def take(arr, fill):
+            return np.where(inside, np.take_along_axis(arr, cols, axis=1), fill)
+
+        return Panel(self.tickers, take(self.dates, np.datetime64('NaT')), take(self.open, np.nan),
+                     take(self.high, np.nan), take(self.low, np.nan), take(self.close, np.nan),
+                     take(self.volume, np.nan), np.minimum(visible, width))
+
+
+def _first_arg(values, func):
+    """NaN을 무시하고 행별 최댓값/최솟값의 첫 위치(pandas idxmax/idxmin과 동일)를 구합니다."""
+    fill = -np.inf if func is np.argmax else np.inf
+    return func(np.where(np.isnan(values), fill, values), axis=1)
+
+
+def compute_indicators(panel):
+    """
+    A~G 채점에 필요한 지표를 모든 종목에 대해 한 번에 계산합니다.
+    (MA5/MA20/MA60, 5일 거래대금, 20봉 최저가 창, 10봉 급등률, 상단 지지율, 5일선 이격도)
+    """
+    C, H, L, V = panel.close, panel.high, panel.low, panel.volume
+    rows = np.arange(len(panel))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_close = np.trunc(C[:, -1])
+        prev_close = np.trunc(C[:, -2])
+
+        # 이동평균 (run_strategy의 iloc[-1], iloc[-4] 위치 값)
+        ma5 = C[:, -5:].mean(axis=1)
+        ma20 = C[:, -20:].mean(axis=1)
+        ma60 = C[:, -60:].mean(axis=1)
+        ma5_prev = C[:, -8:-3].mean(axis=1)
+
+        # [B] 최근 5봉 거래대금 최댓값
+        trade_vals = V[:, -5:] * C[:, -5:]
+        b_arg = _first_arg(trade_vals, np.argmax)
+        max_trade_val = trade_vals[rows, b_arg]
+
+        # [C] 5봉전~25봉전 20봉 최저가
+        lows = L[:, -25:-5]
+        c_arg = _first_arg(lows, np.argmin)
+        min_low = lows[rows, c_arg]
+        rise_ratio = (current_close - min_low) / min_low
+
+        # [D] 최근 10봉의 (당일 고가 / 전일 종가) 최대 급등률
+        prev_c = C[:, -11:-1]
+        spikes = np.where(prev_c > 0, H[:, -10:] / prev_c, 0.0)
+        d_arg = _first_arg(spikes, np.argmax)
+        max_spike = spikes[rows, d_arg]
+
+        # [E] 10봉 고가 대비 현재가 지지율
+        max_high_10 = np.nanmax(H[:, -10:], axis=1)
+        retention = current_close / max_high_10
+
+        # [F] 5일선 3일 전 대비 상승 각도, [G] 5일선 이격도
+        ma5_angle = (ma5 - ma5_prev) / ma5_prev * 100
+        ma5_ratio = current_close / ma5
+
+    return {
+        'current_close': current_close, 'prev_close': prev_close,
+        'ma5': ma5, 'ma20': ma20, 'ma60': ma60, 'ma5_prev': ma5_prev, 'ma5_angle': ma5_angle,
+        'max_trade_val': max_trade_val, 'b_pos': b_arg - 5,
+        'min_low': min_low, 'c_pos': c_arg - 25, 'rise_ratio': rise_ratio,
+        'max_spike': max_spike, 'd_pos': d_arg - 10,
+        'max_high_10': max_high_10, 'retention': retention, 'ma5_ratio': ma5_ratio,
+    }
+
+
+def compute_scores(ind):
+    """지표 배열로부터 조건별 점수와 통과 여부 배열을 계산합니다. (run_strategy와 같은 공식)"""
+    cc = ind['current_close']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a_score = np.minimum(10, np.where(cc > 50000, 10 - ((cc - 50000) / 5000), 10))
+        a_pass = (cc >= 1000) & (a_score > 0)
+
+        b_pass = ind['max_trade_val'] >= 10_000_000_000
+        b_score = 15.0 * np.minimum(1.0, ind['max_trade_val'] / 20_000_000_000)
+
+        c_pass = ind['rise_ratio'] <= 0.35
+        c_score = 15.0 * (1.0 - (ind['rise_ratio'] / 0.35))
+
+        d_pass = ind['max_spike'] >= 1.10
+        d_score = 15.0 * np.minimum(1.0, (ind['max_spike'] - 1.10) / 0.15)
+
+        e_pass = ind['retention'] > 0.85
+        e_score = 15.0 * np.minimum(1.0, (ind['retention'] - 0.85) / 0.15)
+
+        aligned = (ind['ma5'] > ind['ma20']) & (ind['ma20'] > ind['ma60'])
+        angle = ind['ma5_angle']
+        f_score = np.where(aligned, 10.0, 0.0) + np.where(angle > 0, np.minimum(5.0, angle), 0.0)
+        f_pass = f_score > 0
+
+        diff_from_center = np.abs(1.0 - ind['ma5_ratio'])
+        g_pass = diff_from_center <= 0.05
+        g_score = 15.0 * (1.0 - (diff_from_center / 0.05))
+
+    passes = {'A': a_pass, 'B': b_pass, 'C': c_pass, 'D': d_pass, 'E': e_pass, 'F': f_pass, 'G': g_pass}
+    scores = {'A': a_score, 'B': b_score, 'C': c_score, 'D': d_score, 'E': e_score, 'F': f_score, 'G': g_score}
+    total = sum(np.where(passes[k], scores[k], 0.0) for k in passes)
+    return total, scores, passes
+
+
+FAIL_LABELS = {'C': "Fail(너무오름)"}
+
+
+def result_details(scores, passes, row, fail_labels=None):
+    """row번째 종목의 조건별 details 딕셔너리와 조건만족 문자열 (run_strategy와 같은 표기)"""
+    if fail_labels is None:
+        fail_labels = FAIL_LABELS
+    details = {}
+    pass_points = []
+    for key in passes:
+        if passes[key][row]:
+            details[key] = f"Pass({scores[key][row]:.1f}점)"
+            pass_points.append(key)
+        else:
+            details[key] = fail_labels.get(key, "Fail")
+    pass_str = ",".join(pass_points) if pass_points else "None"
+    return details, pass_str
+
+
+def score_panel(panel):
+    """
+    패널 전체를 채점해 종목별로 run_strategy와 같은 형태의
+    (점수, details, 현재가, 등락률, 조건만족, markers) 튜플 리스트를 리턴합니다.
+    """
+    if len(panel) == 0:
+        return []
+    if panel.close.shape[1] < MIN_BARS:
+        # 모든 종목의 데이터가 너무 적음
+        return [(0, {}, 0, 0, "None", {}) for _ in panel.tickers]
+
+    ind = compute_indicators(panel)
+    total, scores, passes = compute_scores(ind)
+
+    results = []
+    for row in range(len(panel)):
+        if panel.lengths[row] < MIN_BARS:
+            results.append((0, {}, 0, 0, "None", {}))
+            continue
+
+        current_close = int(ind['current_close'][row])
+        prev_close = int(ind['prev_close'][row])
+        current_chg_pct = round(((current_close - prev_close) / prev_close) * 100, 2) if prev_close > 0 else 0
+
+        details, pass_str = result_details(scores, passes, row)
+
+        # 차트 오버레이 마커 (run_strategy와 동일한 좌표)
+        dates = panel.dates[row]
+        markers = {}
+        if passes['B'][row]:
+            pos = ind['b_pos'][row]
+            markers['B_Vol'] = (pd.Timestamp(dates[pos]), panel.close[row, pos], "최대거래량")
+        if passes['C'][row]:
+            pos = ind['c_pos'][row]
+            markers['C_Low'] = (pd.Timestamp(dates[pos]), ind['min_low'][row], "기간최저가")
+        if passes['D'][row] and ind['max_spike'][row] >= 1.15:
+            pos = ind['d_pos'][row]
+            markers['D_Spike'] = (pd.Timestamp(dates[pos]), panel.high[row, pos],
+                                  f"{((ind['max_spike'][row]-1)*100):.1f}%급등")
+        if passes['G'][row]:
+            markers['G_MA5'] = (pd.Timestamp(dates[-1]), current_close, "5일선 밀착")
+
+        results.append((round(total[row], 1), details, current_close, current_chg_pct, pass_str, markers))
+
+    return results
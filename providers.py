@@ -0,0 +1,222 @@
+"""
+시세 데이터 제공자 계층입니다. 일봉/상장 목록 조회는 모두 get_provider()를 거칩니다.
+- FdrProvider: FinanceDataReader 실시간 조회
+- ResilientProvider: 같은 요청이 동시에 들어오면 한 번만 조회(요청 병합)하고, 일시 오류는 지터 백오프로 재시도
+- RecordingProvider / ReplayProvider: 응답을 디스크에 기록해 두었다가 네트워크 없이 그대로 재생
+
+STOCK_DATA_MODE 환경 변수로 기본 제공자를 고릅니다. (live: 기본, record: 조회하면서 기록, replay: 기록만 사용)
+"""
+import os
+import random
+import re
+import threading
+import time
+
+import pandas as pd
+import FinanceDataReader as fdr
+
+import metrics
+
+DATA_MODE = os.environ.get("STOCK_DATA_MODE", "live")
+
+# 기록 폴더 (bar_store.CACHE_DIR와 같은 기본 위치 아래)
+RECORD_DIR = os.environ.get("STOCK_RECORD_DIR", os.path.join(os.environ.get("STOCK_CACHE_DIR", ".cache"), "recordings"))
+
+# 재시도: 최대 시도 횟수, 지수 백오프 기본 대기와 상한(초) - 실제 대기는 0 ~ 백오프 사이 임의 값 (full jitter)
+FETCH_ATTEMPTS = 3
+FETCH_BACKOFF = 0.5
+FETCH_MAX_BACKOFF = 8.0
+
+
+class DataFetchError(Exception):
+    """
+    업스트림 조회 자체가 실패했음을 나타냅니다. (재시도 후에도 실패, 재생할 기록 없음 등)
+    조회는 성공했지만 해당 구간에 봉이 없는 경우는 예외 대신 빈 DataFrame을 리턴합니다.
+    """
+
+
+class Provider:
+    """시세 데이터 제공자 인터페이스"""
+
+    def daily_bars(self, ticker, start, end):
+        """start~end 구간의 일봉 DataFrame (날짜 인덱스, Open/High/Low/Close/Volume 컬럼)"""
+        raise NotImplementedError
+
+    def listing(self, market='KRX'):
+        """시장 전체 상장 목록 DataFrame (fdr.StockListing 형식)"""
+        raise NotImplementedError
+
+
+class FdrProvider(Provider):
+    """FinanceDataReader로 실시간 조회합니다."""
+
+    def daily_bars(self, ticker, start, end):
+        return fdr.DataReader(ticker, start, end)
+
+    def listing(self, market='KRX'):
+        return fdr.StockListing(market)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResilientProvider(Provider):
+    """
+    다른 제공자를 감싸 요청 병합과 재시도를 더합니다.
+    - 같은 요청(종목, 구간)이 진행 중이면 새로 조회하지 않고 그 결과를 기다려 복사본을 받음
+    - 예외가 나면 FETCH_ATTEMPTS번까지 지터를 섞은 지수 백오프로 재시도하고, 끝내 실패하면 DataFetchError
+    - 안쪽 제공자가 DataFetchError를 던지면(재생 기록 없음 등) 재시도하지 않음
+    """
+
+    def __init__(self, inner, attempts=FETCH_ATTEMPTS, backoff=FETCH_BACKOFF, max_backoff=FETCH_MAX_BACKOFF):
+        self.inner = inner
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _retry(self, what, func):
+        for attempt in range(self.attempts):
+            try:
+                return func()
+            except DataFetchError:
+                raise
+            except Exception as e:
+                if attempt == self.attempts - 1:
+                    raise DataFetchError(f"{what} 조회 실패 ({self.attempts}회 시도): {e}") from e
+                metrics.incr("fetch.retry")
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt))))
+
+    def _coalesce(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.incr("fetch.coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # 받아간 쪽에서 컬럼을 추가해도 서로 영향이 없도록 복사본을 돌려줌
+            return call.result.copy()
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def daily_bars(self, ticker, start, end):
+        key = ("bars", ticker, pd.Timestamp(start).strftime('%Y-%m-%d'), pd.Timestamp(end).strftime('%Y-%m-%d'))
+        return self._coalesce(key, lambda: self._retry(ticker, lambda: self.inner.daily_bars(ticker, start, end)))
+
+    def listing(self, market='KRX'):
+        return self._coalesce(("listing", market), lambda: self._retry(f"{market} 상장 목록", lambda: self.inner.listing(market)))
+
+
+def _record_path(folder, kind, name):
+    # 'USD/KRW' 같은 코드도 파일 이름으로 쓸 수 있게 바꿈
+    return os.path.join(folder, kind, re.sub(r'[^0-9A-Za-z._-]', '_', str(name)) + ".pkl")
+
+
+class ReplayProvider(Provider):
+    """
+    RecordingProvider가 남긴 기록만으로 응답합니다. (네트워크 없음, 같은 기록이면 항상 같은 결과)
+    일봉은 종목별로 기록된 전체 봉에서 요청 구간을 잘라 주고, 기록이 없는 종목/시장은 DataFetchError입니다.
+    """
+
+    def __init__(self, folder=RECORD_DIR):
+        self.folder = folder
+
+    def _read(self, kind, name):
+        path = _record_path(self.folder, kind, name)
+        if not os.path.exists(path):
+            raise DataFetchError(f"재생할 기록이 없습니다: {path}")
+        return pd.read_pickle(path)
+
+    def daily_bars(self, ticker, start, end):
+        df = self._read("bars", ticker)
+        return df[(df.index >= pd.Timestamp(start).normalize()) & (df.index <= pd.Timestamp(end))].copy()
+
+    def listing(self, market='KRX'):
+        return self._read("listing", market)
+
+
+class RecordingProvider(ReplayProvider):
+    """
+    안쪽 제공자로 조회하면서 응답을 기록합니다.
+    일봉은 종목별 파일 하나에 지금까지 받은 봉을 합쳐(같은 날짜는 새로 받은 값) 저장하고, 상장 목록은 마지막 응답을 저장합니다.
+    """
+
+    def __init__(self, inner, folder=RECORD_DIR):
+        super().__init__(folder)
+        self.inner = inner
+        self._lock = threading.Lock()
+
+    def _write(self, kind, name, df):
+        path = _record_path(self.folder, kind, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        df.to_pickle(tmp)
+        os.replace(tmp, path)
+
+    def daily_bars(self, ticker, start, end):
+        df = self.inner.daily_bars(ticker, start, end)
+        if not df.empty:
+            with self._lock:
+                try:
+                    merged = pd.concat([self._read("bars", ticker), df])
+                    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                except DataFetchError:
+                    merged = df
+                self._write("bars", ticker, merged)
+        return df
+
+    def listing(self, market='KRX'):
+        df = self.inner.listing(market)
+        with self._lock:
+            self._write("listing", market, df)
+        return df
+
+
+def make_provider(mode=DATA_MODE, folder=RECORD_DIR):
+    """모드(live/record/replay)에 맞는 제공자를 만듭니다. 모두 요청 병합/재시도 계층으로 감쌉니다."""
+    if mode == "replay":
+        return ResilientProvider(ReplayProvider(folder))
+    if mode == "record":
+        return ResilientProvider(RecordingProvider(FdrProvider(), folder))
+    if mode != "live":
+        raise ValueError(f"알 수 없는 STOCK_DATA_MODE: {mode} (live/record/replay)")
+    return ResilientProvider(FdrProvider())
+
+
+_provider = None
+_lock = threading.Lock()
+
+
+def get_provider():
+    """프로세스 전역에서 공유하는 기본 제공자 (STOCK_DATA_MODE에 따라 생성)"""
+    global _provider
+    with _lock:
+        if _provider is None:
+            _provider = make_provider()
+        return _provider
+
+
+def set_provider(provider):
+    """기본 제공자를 바꿔 끼웁니다. (벤치마크/재현 실행용)"""
+    global _provider
+    with _lock:
+        _provider = provider
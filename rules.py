@@ -0,0 +1,417 @@
+"""
+조건 규칙 파일(JSON, PyYAML이 있으면 YAML도)을 읽어 패널 전체에 한 번에 적용하는 NumPy 연산으로 컴파일합니다.
+
+규칙 파일 형식:
+    {
+      "name": "default",
+      "min_bars": 60,
+      "params": {"b_min_value": 10000000000, ...},           # 식에서 이름으로 쓰는 상수 (변형마다 바꿀 수 있음)
+      "indicators": {"ma5": "mean(Close, 5)", ...},          # 종목별 지표 식 (앞에서 정의한 지표 참조 가능)
+      "conditions": {                                        # 조건 순서대로 채점 (총점 = 통과한 조건 점수의 합)
+        "B": {"score": "b_max * minimum(1.0, max_trade_val / b_full_value)", "pass": "max_trade_val >= b_min_value"},
+        ...
+      },
+      "variants": {"strict_value": {"b_min_value": 20000000000}}  # 기본 params에서 바꿀 값만
+    }
+
+식은 파이썬 문법의 일부만 허용합니다. (숫자, 이름, + - * / **, 비교, and/or/not, a if 조건 else b, 아래 함수)
+- 시계열: Open, High, Low, Close, Volume (종목 x 봉 배열, 마지막 열이 최신 봉)
+- 창 함수: last(x, lag=0), shift(x, n), mean/max/min/sum(x, n, lag=0)  - lag봉 전에서 끝나는 n봉 창
+- 원소별: abs, trunc, minimum, maximum, where, clip, ramp(x, lo, hi), interp(x, [xs], [ys])
+- pass 식에서는 같은 조건의 score를 이름으로 쓸 수 있습니다.
+"""
+import ast
+import json
+import os
+import warnings
+
+import numpy as np
+
+from panel import result_details
+
+DEFAULT_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "default_rules.json")
+
+SERIES = ('Open', 'High', 'Low', 'Close', 'Volume')
+BASE_VARIANT = "base"
+
+
+class RuleError(ValueError):
+    """규칙 파일 형식이나 식이 잘못됨"""
+
+
+def _window(x, n, lag=0):
+    if np.ndim(x) != 2:
+        raise RuleError("창 함수에는 시계열(Open/High/Low/Close/Volume 또는 그 연산 결과)이 필요합니다.")
+    width = x.shape[1]
+    n, lag = int(n), int(lag)
+    return x[:, max(0, width - n - lag):width - lag]
+
+
+def _last(x, lag=0):
+    return _window(x, 1, lag)[:, 0]
+
+
+def _shift(x, n):
+    n = int(n)
+    out = np.full(np.shape(x), np.nan)
+    out[:, n:] = _window(x, x.shape[1] - n, n)
+    return out
+
+
+def _ramp(x, lo, hi):
+    """lo에서 0, hi에서 1로 올라가는 선형 점수 곡선 (범위 밖은 0/1)"""
+    return np.clip((np.asarray(x, dtype=float) - lo) / (hi - lo), 0.0, 1.0)
+
+
+def _interp(x, xs, ys):
+    """(xs, ys) 꺾은선 점수 곡선 (양 끝 밖은 끝 값, NaN은 NaN)"""
+    x = np.asarray(x, dtype=float)
+    return np.where(np.isnan(x), np.nan, np.interp(x, xs, ys))
+
+
+FUNCTIONS = {
+    'last': _last,
+    'shift': _shift,
+    'mean': lambda x, n, lag=0: _window(x, n, lag).mean(axis=1),
+    'sum': lambda x, n, lag=0: _window(x, n, lag).sum(axis=1),
+    # 결측은 무시 (전부 결측이면 NaN) - panel.compute_indicators의 _first_arg와 같은 값
+    'max': lambda x, n, lag=0: np.nanmax(_window(x, n, lag), axis=1),
+    'min': lambda x, n, lag=0: np.nanmin(_window(x, n, lag), axis=1),
+    'abs': np.abs,
+    'trunc': np.trunc,
+    'minimum': np.minimum,
+    'maximum': np.maximum,
+    'where': np.where,
+    'clip': np.clip,
+    'ramp': _ramp,
+    'interp': _interp,
+}
+
+_BINOPS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide, ast.Pow: np.power}
+_COMPARE = {ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal,
+            ast.Eq: np.equal, ast.NotEq: np.not_equal}
+
+
+def _align(a, b):
+    """종목별 값(1차원)과 시계열(2차원)을 섞어 계산할 수 있도록 1차원 쪽을 열 방향으로 늘립니다."""
+    if np.ndim(a) == 1 and np.ndim(b) == 2:
+        return a[:, None], b
+    if np.ndim(a) == 2 and np.ndim(b) == 1:
+        return a, b[:, None]
+    return a, b
+
+
+class Expr:
+    """
+    허용된 문법만으로 된 식 하나를 파싱해 (이름 조회 함수 -> 배열) 함수로 컴파일합니다.
+    names는 식에서 쓰인 이름들입니다. (시계열/파라미터/지표 구분은 RuleSet이 함)
+    """
+
+    def __init__(self, source, where=""):
+        self.source = str(source)
+        self.where = where
+        self.names = set()
+        try:
+            tree = ast.parse(self.source, mode='eval')
+        except SyntaxError as e:
+            raise RuleError(f"{where}: 식을 해석할 수 없습니다: {self.source} ({e.msg})") from None
+        self._fn = self._compile(tree.body)
+
+    def __call__(self, resolve):
+        return self._fn(resolve)
+
+    def _error(self, message):
+        return RuleError(f"{self.where}: {message} - {self.source}")
+
+    def _compile(self, node):
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise self._error(f"숫자만 쓸 수 있습니다: {node.value!r}")
+            value = node.value
+            return lambda resolve: value
+
+        if isinstance(node, ast.Name):
+            name = node.id
+            self.names.add(name)
+            return lambda resolve: resolve(name)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+            op, left, right = _BINOPS[type(node.op)], self._compile(node.left), self._compile(node.right)
+            return lambda resolve: op(*_align(left(resolve), right(resolve)))
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd, ast.Not)):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda resolve: np.logical_not(operand(resolve))
+            if isinstance(node.op, ast.USub):
+                return lambda resolve: np.negative(operand(resolve))
+            return operand
+
+        if isinstance(node, ast.BoolOp):
+            op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            values = [self._compile(v) for v in node.values]
+
+            def boolop(resolve):
+                result = values[0](resolve)
+                for value in values[1:]:
+                    result = op(*_align(result, value(resolve)))
+                return result
+            return boolop
+
+        if isinstance(node, ast.Compare):
+            if any(type(op) not in _COMPARE for op in node.ops):
+                raise self._error("비교는 <, <=, >, >=, ==, != 만 쓸 수 있습니다.")
+            ops = [_COMPARE[type(op)] for op in node.ops]
+            operands = [self._compile(node.left)] + [self._compile(c) for c in node.comparators]
+
+            def compare(resolve):
+                # a < b < c 는 (a < b) and (b < c)
+                values = [operand(resolve) for operand in operands]
+                result = None
+                for op, a, b in zip(ops, values, values[1:]):
+                    part = op(*_align(a, b))
+                    result = part if result is None else np.logical_and(*_align(result, part))
+                return result
+            return compare
+
+        if isinstance(node, ast.IfExp):
+            test, body, orelse = self._compile(node.test), self._compile(node.body), self._compile(node.orelse)
+            return lambda resolve: np.where(test(resolve), body(resolve), orelse(resolve))
+
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                name = node.func.id if isinstance(node.func, ast.Name) else ast.dump(node.func)
+                raise self._error(f"허용되지 않은 함수입니다: {name} (사용 가능: {', '.join(FUNCTIONS)})")
+            if node.keywords:
+                raise self._error("함수 인자는 위치 인자만 쓸 수 있습니다.")
+            func = FUNCTIONS[node.func.id]
+            args = [self._compile_arg(a) for a in node.args]
+            return lambda resolve: func(*(arg(resolve) for arg in args))
+
+        raise self._error(f"허용되지 않은 문법입니다: {type(node).__name__}")
+
+    def _compile_arg(self, node):
+        # interp의 꺾은선 좌표 같은 숫자 리스트는 인자로만 허용
+        if isinstance(node, ast.List):
+            items = [self._compile(e) for e in node.elts]
+            return lambda resolve: np.array([item(resolve) for item in items], dtype=float)
+        return self._compile(node)
+
+
+def _as_rows(value, dtype, shape):
+    """식 결과를 종목별 배열로 맞춥니다. (상수 식이면 모든 종목에 같은 값)"""
+    value = np.asarray(value, dtype=dtype)
+    return value if value.shape == shape else np.broadcast_to(value, shape)
+
+
+class VariantResult:
+    """변형 하나의 채점 결과: total(종목별 총점), scores/passes(조건별 점수/통과 배열)"""
+
+    __slots__ = ('name', 'params', 'total', 'scores', 'passes', 'valid')
+
+    def __init__(self, name, params, total, scores, passes, valid):
+        self.name = name
+        self.params = params
+        self.total = total
+        self.scores = scores
+        self.passes = passes
+        self.valid = valid      # 봉 개수가 min_bars 이상이라 채점 대상인 종목
+
+    def details(self, row, fail_labels=None):
+        """row번째 종목의 (details, 조건만족 문자열) - panel.result_details와 같은 표기"""
+        return result_details(self.scores, self.passes, row, fail_labels)
+
+
+class RuleSet:
+    """
+    컴파일된 조건 규칙 묶음입니다. evaluate(panel)로 여러 변형을 한 번에 채점하며,
+    변형끼리 값이 같은 파라미터만 쓰는 지표/조건은 한 번만 계산해 공유합니다.
+    """
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict) or not spec.get("conditions"):
+            raise RuleError("규칙에는 conditions가 있어야 합니다.")
+        self.name = spec.get("name", "rules")
+        self.min_bars = int(spec.get("min_bars", 60))
+        self.params = {k: self._number(k, v) for k, v in spec.get("params", {}).items()}
+
+        self.indicators = {}
+        for name, source in spec.get("indicators", {}).items():
+            self._check_name(name)
+            self.indicators[name] = Expr(source, f"indicators.{name}")
+
+        self.conditions = {}
+        self.fail_labels = {}
+        for key, cond in spec["conditions"].items():
+            if not isinstance(cond, dict) or "score" not in cond or "pass" not in cond:
+                raise RuleError(f"conditions.{key}: score와 pass 식이 필요합니다.")
+            self.conditions[key] = (Expr(cond["score"], f"conditions.{key}.score"),
+                                    Expr(cond["pass"], f"conditions.{key}.pass"))
+            if "fail_label" in cond:
+                self.fail_labels[key] = str(cond["fail_label"])
+
+        self.variants = {BASE_VARIANT: {}}
+        for name, overrides in spec.get("variants", {}).items():
+            unknown = set(overrides) - set(self.params)
+            if unknown:
+                raise RuleError(f"variants.{name}: 정의되지 않은 파라미터 {sorted(unknown)}")
+            self.variants[name] = {k: self._number(k, v) for k, v in overrides.items()}
+
+        self._deps = {}
+        for name in self.indicators:
+            self._param_deps(name, ())
+        # 조건별로 점수/통과 식이 (지표를 거쳐) 쓰는 파라미터 - 캐시 키에 그 값만 넣어 변형끼리 결과를 공유
+        self._cond_deps = {}
+        for key, (score, passed) in self.conditions.items():
+            self._check_names(score, allow_score=False)
+            self._check_names(passed, allow_score=True)
+            score_deps = self._expr_deps(score)
+            self._cond_deps[key] = (tuple(sorted(score_deps)), tuple(sorted(score_deps | self._expr_deps(passed))))
+
+    @staticmethod
+    def _number(name, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RuleError(f"params.{name}: 숫자가 아닙니다: {value!r}")
+        return value
+
+    def _check_name(self, name):
+        if name in SERIES or name in FUNCTIONS or name == "score":
+            raise RuleError(f"indicators.{name}: 예약된 이름은 지표 이름으로 쓸 수 없습니다.")
+        if name in self.params:
+            raise RuleError(f"indicators.{name}: 파라미터와 이름이 겹칩니다.")
+
+    def _check_names(self, expr, allow_score):
+        for name in expr.names:
+            if name in SERIES or name in self.params or name in self.indicators or (allow_score and name == "score"):
+                continue
+            raise RuleError(f"{expr.where}: 정의되지 않은 이름입니다: {name}")
+
+    def _param_deps(self, name, stack):
+        """지표 name이 (다른 지표를 거쳐서라도) 참조하는 파라미터 집합 - 변형 간 계산 공유의 기준"""
+        if name in self._deps:
+            return set(self._deps[name])
+        if name in stack:
+            raise RuleError(f"indicators: 순환 참조 {' -> '.join(stack + (name,))}")
+        expr = self.indicators[name]
+        self._check_names(expr, allow_score=False)
+        deps = set()
+        for ref in expr.names:
+            if ref in self.params:
+                deps.add(ref)
+            elif ref in self.indicators:
+                deps |= self._param_deps(ref, stack + (name,))
+        self._deps[name] = tuple(sorted(deps))
+        return set(deps)
+
+    def _expr_deps(self, expr):
+        deps = set()
+        for ref in expr.names:
+            if ref in self.params:
+                deps.add(ref)
+            elif ref in self.indicators:
+                deps.update(self._deps[ref])
+        return deps
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_RULES):
+        """JSON 규칙 파일(확장자가 .yaml/.yml이면 YAML)을 읽어 컴파일합니다."""
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError:
+                    raise RuleError("YAML 규칙 파일을 읽으려면 PyYAML이 필요합니다. (pip install pyyaml)") from None
+                return cls(yaml.safe_load(f))
+            return cls(json.load(f))
+
+    def variant_params(self, name):
+        params = dict(self.params)
+        params.update(self.variants[name])
+        return params
+
+    def evaluate(self, panel, variants=None, overrides=None):
+        """
+        패널의 모든 종목을 변형별로 채점해 {변형 이름: VariantResult}를 리턴합니다.
+        variants를 주면 그 변형들만(빈 리스트면 overrides만), overrides({이름: {파라미터: 값}})를 주면 규칙 파일에 없는 변형도 함께 채점합니다.
+        """
+        settings = {name: self.variant_params(name) for name in (self.variants if variants is None else variants)}
+        for name, values in (overrides or {}).items():
+            unknown = set(values) - set(self.params)
+            if unknown:
+                raise RuleError(f"{name}: 정의되지 않은 파라미터 {sorted(unknown)}")
+            settings[name] = {**self.params, **values}
+
+        series = {'Open': panel.open, 'High': panel.high, 'Low': panel.low, 'Close': panel.close,
+                  'Volume': panel.volume}
+        valid = panel.lengths >= self.min_bars
+        cache = {}  # (이름, 그 식이 쓰는 파라미터 값) -> 배열: 변형 사이에서 공유
+
+        def evaluate_one(params):
+            def resolve(name):
+                if name in series:
+                    return series[name]
+                if name in params:
+                    return params[name]
+                k = (name, tuple(params[p] for p in self._deps[name]))
+                if k not in cache:
+                    cache[k] = self.indicators[name](resolve)
+                return cache[k]
+
+            scores, passes, total = {}, {}, 0.0
+            for cond, (score_expr, pass_expr) in self.conditions.items():
+                score_deps, pass_deps = self._cond_deps[cond]
+                k = (("score", cond), tuple(params[p] for p in score_deps))
+                if k not in cache:
+                    cache[k] = _as_rows(score_expr(resolve), float, valid.shape)
+                score = cache[k]
+
+                def resolve_pass(name, score=score):
+                    return score if name == "score" else resolve(name)
+
+                k = (("pass", cond), tuple(params[p] for p in pass_deps))
+                if k not in cache:
+                    passed = _as_rows(pass_expr(resolve_pass), bool, valid.shape) & valid
+                    cache[k] = passed, np.where(passed, score, 0.0)
+                passes[cond], points = cache[k]
+                scores[cond] = score
+                total = total + points
+            return scores, passes, total
+
+        results = {}
+        # 0 나누기와 전부 결측인 창(봉이 모자란 종목)은 경고 없이 inf/NaN으로 둠
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for name, params in settings.items():
+                scores, passes, total = evaluate_one(params)
+                results[name] = VariantResult(name, params, np.where(valid, total, 0.0), scores, passes, valid)
+        return results
+
+    def score_panel(self, panel, variants=None, overrides=None):
+        """
+        panel.score_panel과 같은 형태로 {변형 이름: [(점수, details, 현재가, 등락률, 조건만족, markers), ...]}를 리턴합니다.
+        차트 마커는 A~G 고정 공식에만 있으므로 비워 둡니다.
+        """
+        if len(panel) == 0:
+            return {name: [] for name in list(self.variants if variants is None else variants) + list(overrides or {})}
+        evaluated = self.evaluate(panel, variants, overrides)
+        current = np.trunc(panel.close[:, -1])
+        prev = np.trunc(panel.close[:, -2]) if panel.close.shape[1] > 1 else current
+
+        scored = {}
+        for name, result in evaluated.items():
+            rows = []
+            for row in range(len(panel)):
+                if not result.valid[row]:
+                    rows.append((0, {}, 0, 0, "None", {}))
+                    continue
+                price, prev_close = int(current[row]), int(prev[row])
+                chg_pct = round(((price - prev_close) / prev_close) * 100, 2) if prev_close > 0 else 0
+                details, pass_str = result.details(row, self.fail_labels)
+                rows.append((round(result.total[row], 1), details, price, chg_pct, pass_str, {}))
+            scored[name] = rows
+        return scored
+
+
+def load_rules(path=None):
+    """규칙 파일을 읽어 RuleSet을 리턴합니다. (기본: 저장소의 default_rules.json = 기존 A~G 조건)"""
+    return RuleSet.from_file(path or DEFAULT_RULES)
@@ -0,0 +1,129 @@
+"""
+Panel 배열을 multiprocessing.shared_memory 블록 하나에 올려 두고, 작업자 프로세스가 이름으로 붙어 복사 없이 읽게 합니다.
+
+    with SharedPanel.create(panel) as shared:                    # 만든 쪽: 블록 생성 + 배열 복사 (블록을 벗어나면 close + unlink)
+        pool = ProcessPoolExecutor(initializer=init, initargs=(shared.handle,))
+        ...
+    def init(handle):
+        worker_shared = SharedPanel.attach(handle)               # 작업자: 이름으로 붙음 (복사 없음, 읽기 전용)
+        panel = worker_shared.panel
+
+handle은 블록 이름과 배열 배치만 담은 작은 dict라 작업자 수와 상관없이 패널 데이터는 메모리에 한 벌만 있습니다.
+블록은 만든 쪽이 unlink()해야 사라지므로 create()는 with 블록이나 try/finally로 감싸 쓰세요.
+"""
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from panel import Panel
+
+FIELDS = ('dates', 'open', 'high', 'low', 'close', 'volume', 'lengths')
+
+# 배열 시작 위치 정렬 (캐시 라인)
+ALIGN = 64
+
+_attach_lock = threading.Lock()
+
+
+def _attach_untracked(name):
+    """
+    이미 있는 블록에 붙습니다. 붙기만 한 프로세스가 끝날 때 resource_tracker가 블록을 지우지 않도록 등록하지 않습니다.
+    (Python 3.13 이상은 track=False, 그 전 버전은 붙는 동안만 등록 함수를 비활성화)
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedPanel:
+    """
+    공유 메모리 블록 위의 Panel입니다. create()로 만든 쪽(owner)과 attach()로 붙은 쪽 모두 panel 속성으로
+    블록을 직접 가리키는 읽기 전용 배열의 Panel을 받습니다.
+    - close(): 이 프로세스의 매핑만 닫음 (panel에서 꺼낸 배열을 모두 놓은 뒤에 불러야 함)
+    - unlink(): 블록 자체를 지움 (owner만, 붙은 프로세스가 매핑을 닫으면 메모리가 반환됨)
+    """
+
+    def __init__(self, shm, handle, owner):
+        self._shm = shm
+        self._closed = False
+        self._unlinked = False
+        self.handle = handle
+        self.owner = owner
+        arrays = {}
+        for field, dtype, shape, offset in handle["layout"]:
+            arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            if not owner:
+                arr.flags.writeable = False
+            arrays[field] = arr
+        self.panel = Panel(handle["tickers"], arrays['dates'], arrays['open'], arrays['high'], arrays['low'],
+                           arrays['close'], arrays['volume'], arrays['lengths'])
+
+    @classmethod
+    def create(cls, panel, name=None):
+        """panel 배열을 새 공유 메모리 블록에 복사해 owner SharedPanel을 리턴합니다."""
+        layout, offset = [], 0
+        for field in FIELDS:
+            arr = np.ascontiguousarray(getattr(panel, field))
+            offset = -(-offset // ALIGN) * ALIGN
+            layout.append((field, arr.dtype.str, arr.shape, offset))
+            offset += arr.nbytes
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+        handle = {"name": shm.name, "tickers": list(panel.tickers), "layout": layout}
+        try:
+            shared = cls(shm, handle, owner=True)
+            for field in FIELDS:
+                getattr(shared.panel, field)[...] = getattr(panel, field)
+                getattr(shared.panel, field).flags.writeable = False
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        return shared
+
+    @classmethod
+    def attach(cls, handle):
+        """create()의 handle로 다른 프로세스에서 같은 블록에 붙습니다. (복사 없음)"""
+        return cls(_attach_untracked(handle["name"]), handle, owner=False)
+
+    @property
+    def name(self):
+        return self.handle["name"]
+
+    @property
+    def nbytes(self):
+        return self._shm.size
+
+    def close(self):
+        """이 프로세스의 매핑을 닫습니다. (panel 배열을 밖에서 아직 쓰고 있으면 BufferError - 놓은 뒤 다시 부르면 됨)"""
+        if self._closed:
+            return
+        self.panel = None
+        self._shm.close()
+        self._closed = True
+
+    def unlink(self):
+        """블록을 지웁니다. (owner만, 이미 붙어 있는 프로세스는 매핑을 닫을 때까지 계속 읽을 수 있음)"""
+        if not self.owner:
+            raise RuntimeError("공유 패널은 만든 프로세스에서만 지울 수 있습니다.")
+        if not self._unlinked:
+            self._shm.unlink()
+            self._unlinked = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.close()
+        finally:
+            if self.owner:
+                self.unlink()
@@ -0,0 +1,290 @@
+"""
+조건 규칙(rules.py)의 임계값/배점을 격자 또는 무작위로 바꿔 가며 과거 구간의 성과로 순위를 매기는 파라미터 스윕입니다.
+
+    python sweep.py --grid b_min_value=5e9,1e10,2e10 g_band=0.03,0.05,0.08
+    python sweep.py --random 1000 --range g_band=0.02:0.1 c_max_rise=0.2:0.5 --workers 8 --out sweep.csv
+    python sweep.py --rules my_rules.json --start 2025-01-01 --end 2025-06-30 --horizon 10 --rank-by hit_rate
+
+후보 종목 전체의 일봉은 저장소 경유로 한 번만 읽어 패널 하나로 묶고, 공유 메모리(shared_panel.py)에 올려
+평가일을 작업자 프로세스에 나눠 줍니다.
+평가일마다 그날까지 보이던 창(Panel.asof)으로 모든 설정을 한 번에 채점(RuleSet.evaluate)하므로
+설정이 늘어도 데이터 조회와 공통 지표 계산은 늘지 않습니다.
+그날 점수 상위 top_n 종목을 샀다고 보고 horizon봉 뒤 종가까지의 수익률로 설정별 지표를 냅니다.
+상장 목록은 현재 기준이라 그 사이 상장폐지된 종목은 빠져 있습니다. (생존 편향)
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+import engine
+from panel import Panel
+from rules import load_rules
+from shared_panel import SharedPanel
+from throttle import RateLimiter
+
+DEFAULT_HORIZON = 5
+DEFAULT_LOOKBACK_DAYS = 180
+
+# 평가일 창의 봉 개수 (규칙 식의 가장 긴 창 + lag보다 길어야 함, 기본 규칙은 60봉)
+PANEL_WIDTH = 120
+
+# 순위 기준으로 쓸 수 있는 설정별 지표 (summarize 참고)
+METRICS = ("mean_return", "excess_return", "hit_rate", "sharpe", "ic", "picks", "days")
+
+
+def grid_settings(grid):
+    """{파라미터: [값, ...]} 격자의 모든 조합"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def random_settings(ranges, n, seed=0):
+    """{파라미터: (하한, 상한)} 범위에서 균등하게 뽑은 n개 설정 (양 끝이 정수면 정수로 뽑음)"""
+    rng = np.random.default_rng(seed)
+    settings = []
+    for _ in range(n):
+        setting = {}
+        for name, (lo, hi) in ranges.items():
+            if isinstance(lo, int) and isinstance(hi, int):
+                setting[name] = int(rng.integers(lo, hi + 1))
+            else:
+                setting[name] = round(float(rng.uniform(lo, hi)), 6)
+        settings.append(setting)
+    return settings
+
+
+def load_universe_panel(tickers, start, end, workers=1, max_rps=None, progress_callback=None):
+    """start - 150일 ~ end 구간 일봉을 저장소 경유로 한 번씩만 읽어 패널 하나로 묶습니다. (조회 실패/빈 종목 제외)"""
+    limiter = RateLimiter(max_rps) if max_rps else None
+    fetch_from = pd.Timestamp(start) - timedelta(days=150)  # load_history와 같은 MA60 여유
+
+    def fetch(tk):
+        try:
+            return bar_store.load_bars(tk, fetch_from, pd.Timestamp(end), limiter, as_bars=True)
+        except Exception as e:
+            print(f"[{tk}] 일봉 조회 실패: {e}")
+            return None
+
+    frames = engine._map_tickers(fetch, tickers, {}, workers, progress_callback)
+    return Panel.from_frames({tk: bars for tk, bars in zip(tickers, frames) if bars is not None and len(bars)})
+
+
+def evaluation_dates(panel, start, end):
+    """패널에 봉이 있는 날짜 중 start~end 구간 (오름차순)"""
+    dates = np.unique(panel.dates[~np.isnat(panel.dates)])
+    return dates[(dates >= np.datetime64(pd.Timestamp(start), 'ns')) & (dates <= np.datetime64(pd.Timestamp(end), 'ns'))]
+
+
+def _average_ranks(values):
+    """동점은 평균 순위로 매긴 순위 배열 (스피어만 상관용)"""
+    order = np.argsort(values, kind='mergesort')
+    ordered = values[order]
+    starts = np.flatnonzero(np.concatenate([[True], ordered[1:] != ordered[:-1]]))
+    ends = np.concatenate([starts[1:], [len(values)]])
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat((starts + ends - 1) / 2, ends - starts)
+    return ranks
+
+
+def _correlation(a, b):
+    a, b = a - a.mean(), b - b.mean()
+    denom = np.sqrt((a * a).sum() * (b * b).sum())
+    return float((a * b).sum() / denom) if denom > 0 else np.nan
+
+
+def evaluate_dates(panel, ruleset, settings, dates, horizon, top_n, min_score, width=PANEL_WIDTH):
+    """
+    평가일마다 모든 설정을 채점해 (설정 수, 날짜 수, 5) 배열을 리턴합니다.
+    마지막 축은 (고른 종목 수, 평균 수익률, 그날 거래된 종목 평균 대비 초과 수익률, 상승 종목 수, 점수-수익률 순위 상관)입니다.
+    """
+    overrides = {i: setting for i, setting in enumerate(settings)}
+    out = np.full((len(settings), len(dates), 5), np.nan)
+    total_cols = panel.close.shape[1]
+    first = total_cols - panel.lengths
+    rows = np.arange(len(panel))
+
+    for j, date in enumerate(dates):
+        visible = panel.visible(date)
+        last = first + visible - 1
+        # 그날 봉이 있는 종목만 (거래정지/상장 전 종목 제외), horizon봉 뒤 종가가 있어야 평가 가능
+        traded = (visible > 0) & (panel.dates[rows, np.clip(last, 0, None)] == date)
+        ahead = last + horizon
+        eligible = traded & (ahead < total_cols)
+        if not eligible.any():
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fwd = panel.close[rows, np.clip(ahead, 0, total_cols - 1)] / panel.close[rows, np.clip(last, 0, None)] - 1
+        eligible &= np.isfinite(fwd)
+        if not eligible.any():
+            continue
+        fwd_eligible = fwd[eligible]
+        market_return = fwd_eligible.mean()
+        fwd_ranks = _average_ranks(fwd_eligible)
+
+        view = panel.asof(date, width, visible)
+        for i, result in ruleset.evaluate(view, variants=[], overrides=overrides).items():
+            total = result.total
+            picked = np.flatnonzero(eligible & (total > 0) & (total >= min_score))
+            if len(picked):
+                # 스캔 결과와 같은 순서: 점수 내림차순, 동점은 종목 순서
+                picked = picked[np.lexsort((picked, -total[picked]))][:top_n]
+                returns = fwd[picked]
+                out[i, j, :4] = (len(picked), returns.mean(), returns.mean() - market_return, (returns > 0).sum())
+            else:
+                out[i, j, 0] = 0
+            out[i, j, 4] = _correlation(_average_ranks(total[eligible]), fwd_ranks)
+    return out
+
+
+def summarize(daily, horizon):
+    """evaluate_dates 결과로 설정별 지표 DataFrame을 만듭니다. (수익률은 %)"""
+    picks = np.nansum(daily[:, :, 0], axis=1)
+    traded_days = (daily[:, :, 0] > 0).sum(axis=1)
+    weighted = np.nansum(daily[:, :, 0] * daily[:, :, 1], axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_return = np.where(picks > 0, weighted / picks, np.nan)
+        hit_rate = np.where(picks > 0, np.nansum(daily[:, :, 3], axis=1) / picks, np.nan)
+        day_mean = np.nanmean(daily[:, :, 1], axis=1)
+        day_std = np.nanstd(daily[:, :, 1], axis=1)
+        # 날짜별 평균 수익률의 평균/표준편차를 연율화 (보유 기간 horizon봉, 연 252 영업일)
+        sharpe = np.where(day_std > 0, day_mean / day_std * np.sqrt(252 / horizon), np.nan)
+        excess = np.nanmean(daily[:, :, 2], axis=1)
+        ic = np.nanmean(daily[:, :, 4], axis=1)
+    return pd.DataFrame({
+        "mean_return": np.round(mean_return * 100, 3),
+        "excess_return": np.round(excess * 100, 3),
+        "hit_rate": np.round(hit_rate * 100, 1),
+        "sharpe": np.round(sharpe, 3),
+        "ic": np.round(ic, 4),
+        "picks": picks.astype(int),
+        "days": traded_days,
+    })
+
+
+# 작업자 프로세스 전역 상태: 초기화 때 한 번 받아 두고 날짜 묶음마다 재사용
+_worker = {}
+
+
+def _init_worker(handle, rules_path, settings, horizon, top_n, min_score, width):
+    # 패널은 공유 메모리에 붙어 복사 없이 읽음 (매핑은 작업자 프로세스가 끝날 때 같이 닫힘)
+    shared = SharedPanel.attach(handle)
+    _worker.update(shared=shared, panel=shared.panel, ruleset=load_rules(rules_path), settings=settings,
+                   horizon=horizon, top_n=top_n, min_score=min_score, width=width)
+
+
+def _evaluate_chunk(dates):
+    w = _worker
+    return evaluate_dates(w["panel"], w["ruleset"], w["settings"], dates, w["horizon"], w["top_n"],
+                          w["min_score"], w["width"])
+
+
+def run_sweep(settings, start, end, rules_path=None, tickers=None, horizon=DEFAULT_HORIZON, top_n=engine.SCAN_TOP_N,
+              min_score=0, workers=None, width=PANEL_WIDTH, rank_by="excess_return", panel=None, fetch_workers=engine.SCAN_WORKERS,
+              max_rps=engine.SCAN_MAX_RPS):
+    """
+    설정 리스트({파라미터: 값})마다 start~end 평가일 성과를 구해 rank_by 내림차순 DataFrame으로 리턴합니다.
+    규칙 파일의 변형(base 등)도 비교 기준으로 함께 평가합니다. tickers가 없으면 engine.get_candidate_tickers() 전체,
+    panel을 주면 일봉을 다시 읽지 않고 그 패널을 씁니다. workers는 채점 프로세스 수 (기본: CPU 수)
+    """
+    ruleset = load_rules(rules_path)
+    labelled = [(name, dict(values)) for name, values in ruleset.variants.items()]
+    labelled += [(f"sweep{i:04d}", dict(setting)) for i, setting in enumerate(settings)]
+    for name, setting in labelled:
+        unknown = set(setting) - set(ruleset.params)
+        if unknown:
+            raise ValueError(f"{name}: 규칙 파일에 없는 파라미터 {sorted(unknown)}")
+    all_settings = [setting for _, setting in labelled]
+
+    if panel is None:
+        if tickers is None:
+            tickers = list(engine.get_candidate_tickers().index)
+        # 마지막 평가일의 horizon봉 뒤까지 (달력일로 넉넉히, 오늘 이후는 조회하지 않음)
+        fetch_to = min(pd.Timestamp(end) + timedelta(days=horizon * 2 + 10), pd.Timestamp(datetime.today()))
+        panel = load_universe_panel(tickers, start, fetch_to, fetch_workers, max_rps)
+    dates = evaluation_dates(panel, start, end)
+    if len(dates) == 0 or len(panel) == 0:
+        raise ValueError("평가할 날짜나 종목이 없습니다.")
+
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers > 1:
+        chunks = [chunk for chunk in np.array_split(dates, workers * 4) if len(chunk)]
+        # 작업자에게는 공유 메모리 이름만 넘기므로 작업자 수가 늘어도 패널은 한 벌만 있음
+        with SharedPanel.create(panel) as shared, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(shared.handle, rules_path, all_settings, horizon, top_n, min_score, width)) as pool:
+            daily = np.concatenate(list(pool.map(_evaluate_chunk, chunks)), axis=1)
+    else:
+        daily = evaluate_dates(panel, ruleset, all_settings, dates, horizon, top_n, min_score, width)
+    print(f"{len(labelled)}개 설정 x {len(dates)}일 x {len(panel)}종목 평가: {time.perf_counter() - started:.1f}초")
+
+    table = summarize(daily, horizon)
+    params = pd.DataFrame([{**ruleset.params, **setting} for _, setting in labelled])
+    changed = [name for name in ruleset.params if params[name].nunique() > 1]
+    table = pd.concat([pd.DataFrame({"setting": [name for name, _ in labelled]}), params[changed], table], axis=1)
+    return table.sort_values(rank_by, ascending=False, na_position='last', kind='mergesort').reset_index(drop=True)
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() and not any(c in text for c in '.e') else value
+
+
+def _parse_grid(items):
+    return {name: [_number(v) for v in values.split(",")] for name, values in (item.split("=", 1) for item in items)}
+
+
+def _parse_ranges(items):
+    ranges = {}
+    for name, bounds in (item.split("=", 1) for item in items):
+        lo, hi = bounds.split(":", 1)
+        ranges[name] = (_number(lo), _number(hi))
+    return ranges
+
+
+def main():
+    parser = argparse.ArgumentParser(description="조건 규칙 파라미터 스윕")
+    parser.add_argument("--rules", default=None, help="규칙 파일 (기본: default_rules.json)")
+    parser.add_argument("--grid", nargs="+", default=[], metavar="NAME=V1,V2", help="격자 탐색할 파라미터 값들")
+    parser.add_argument("--range", nargs="+", default=[], dest="ranges", metavar="NAME=LO:HI", help="무작위 탐색 범위")
+    parser.add_argument("--random", type=int, default=0, help="--range에서 뽑을 설정 수")
+    parser.add_argument("--seed", type=int, default=0, help="무작위 탐색 시드")
+    parser.add_argument("--start", default=None, help=f"평가 시작일 (기본: {DEFAULT_LOOKBACK_DAYS}일 전)")
+    parser.add_argument("--end", default=None, help="평가 종료일 (기본: 오늘)")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="보유 기간(봉)")
+    parser.add_argument("--top-n", type=int, default=engine.SCAN_TOP_N, help="평가일마다 고르는 상위 종목 수")
+    parser.add_argument("--min-score", type=float, default=0, help="이 점수 미만은 고르지 않음")
+    parser.add_argument("--limit", type=int, default=None, help="후보 종목 중 앞에서부터 이 수만 사용")
+    parser.add_argument("--workers", type=int, default=None, help="채점 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--rank-by", default="excess_return", choices=METRICS, help="순위 기준 지표")
+    parser.add_argument("--out", default=None, help="결과 CSV 경로")
+    args = parser.parse_args()
+
+    settings = grid_settings(_parse_grid(args.grid)) if args.grid else []
+    if args.random:
+        settings += random_settings(_parse_ranges(args.ranges), args.random, args.seed)
+
+    end = pd.Timestamp(args.end) if args.end else pd.Timestamp(datetime.today()).normalize()
+    start = pd.Timestamp(args.start) if args.start else end - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+    tickers = list(engine.get_candidate_tickers().index)
+    if args.limit:
+        tickers = tickers[:args.limit]
+
+    table = run_sweep(settings, start, end, args.rules, tickers, args.horizon, args.top_n, args.min_score,
+                      args.workers, rank_by=args.rank_by)
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(table.head(20).to_string(index=False))
+    if args.out:
+        table.to_csv(args.out, index=False, encoding="utf-8-sig")
+        print(f"\n결과 저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
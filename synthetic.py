@@ -0,0 +1,191 @@
+"""
+오프라인 벤치마크/재현용 합성 시세 데이터입니다.
+시드가 같으면 항상 같은 KRX 형태의 일봉(호가 단위, ±30% 가격제한폭, 간헐적 급등, 거래량 폭증)과 상장 목록을 만들고,
+FinanceDataReader의 DataReader/StockListing, 번역기, Google News RSS를 네트워크 없이 대신합니다.
+"""
+import threading
+import time
+import zlib
+from datetime import datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+# 종목당 만드는 일봉 개수 (load_history의 150일 창보다 넉넉하게)
+BAR_DAYS = 400
+
+# KRX 호가 단위: (이 가격 미만, 호가 단위)
+TICK_SIZES = [(2000, 1), (5000, 5), (20000, 10), (50000, 50), (200000, 100), (500000, 500), (float('inf'), 1000)]
+
+PRICE_LIMIT = 0.30
+
+
+def tick_size(price):
+    for bound, tick in TICK_SIZES:
+        if price < bound:
+            return tick
+    return TICK_SIZES[-1][1]
+
+
+def round_to_tick(prices):
+    """가격 배열을 KRX 호가 단위로 반올림합니다."""
+    prices = np.asarray(prices, dtype=float)
+    bounds = [bound for bound, _ in TICK_SIZES[:-1]]
+    ticks = np.select([prices < bound for bound in bounds], [tick for _, tick in TICK_SIZES[:-1]],
+                      default=TICK_SIZES[-1][1]).astype(float)
+    return np.maximum(ticks, np.round(prices / ticks) * ticks)
+
+
+def _code_seed(code):
+    return int(code) if str(code).isdigit() else zlib.crc32(str(code).encode())
+
+
+class SyntheticMarket:
+    """
+    시드 하나로 정해지는 합성 시장입니다.
+    n_tickers개 종목의 상장 목록과, 종목마다 end 날짜에서 끝나는 BAR_DAYS개 영업일 일봉을 만듭니다.
+    latency(초)를 주면 호출마다 그만큼 기다려 네트워크 지연을 흉내 냅니다.
+    """
+
+    def __init__(self, n_tickers=2600, seed=42, end=None, latency=0.0):
+        self.n_tickers = n_tickers
+        self.seed = seed
+        self.end = pd.Timestamp(end or datetime.today()).normalize()
+        self.latency = latency
+        self.calls = {"reader": 0, "listing": 0}
+        self._lock = threading.Lock()
+        self.codes = [f"{i + 1:06d}" for i in range(n_tickers)]
+
+    def _count(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @lru_cache(maxsize=None)
+    def bars(self, code):
+        """종목 하나의 전체 합성 일봉 (Open/High/Low/Close/Volume/Change)"""
+        rng = np.random.default_rng([self.seed, _code_seed(code)])
+        dates = pd.bdate_range(end=self.end, periods=BAR_DAYS)
+
+        start = float(np.clip(rng.lognormal(mean=9.6, sigma=1.1), 600, 600000))
+        returns = rng.standard_t(4, size=BAR_DAYS) * 0.018 + rng.normal(0.0004, 0.0004)
+        # 간헐적 급등 (D조건과 거래량 폭증 재현)
+        spikes = rng.random(BAR_DAYS) < 0.015
+        returns = np.where(spikes, rng.uniform(0.10, 0.29, BAR_DAYS), returns)
+        returns = np.clip(returns, -PRICE_LIMIT + 0.01, PRICE_LIMIT - 0.01)
+
+        close = round_to_tick(start * np.cumprod(1 + returns))
+        prev = np.concatenate([[close[0]], close[:-1]])
+        opn = round_to_tick(prev * (1 + rng.normal(0, 0.006, BAR_DAYS)))
+        high = round_to_tick(np.maximum(opn, close) * (1 + np.abs(rng.normal(0, 0.012, BAR_DAYS))))
+        low = round_to_tick(np.minimum(opn, close) * (1 - np.abs(rng.normal(0, 0.012, BAR_DAYS))))
+        high = np.minimum(high, np.floor(prev * (1 + PRICE_LIMIT)))
+        high = np.maximum(high, np.maximum(opn, close))
+        low = np.minimum(low, np.minimum(opn, close))
+
+        base_volume = rng.lognormal(mean=12.5, sigma=1.0)
+        volume = np.round(base_volume * rng.lognormal(0, 0.5, BAR_DAYS) * np.where(spikes, 6.0, 1.0))
+
+        return pd.DataFrame({
+            'Open': opn, 'High': high, 'Low': low, 'Close': close,
+            'Volume': volume.astype(np.int64), 'Change': pd.Series(close).pct_change().values
+        }, index=pd.DatetimeIndex(dates, name='Date'))
+
+    def DataReader(self, symbol, start=None, end=None, *args, **kwargs):
+        """fdr.DataReader 대체: start~end 구간의 합성 일봉"""
+        self._count("reader")
+        df = self.bars(symbol)
+        s = pd.Timestamp(start).normalize() if start is not None else df.index[0]
+        e = pd.Timestamp(end).normalize() if end is not None else df.index[-1]
+        return df[(df.index >= s) & (df.index <= e)].copy()
+
+    def StockListing(self, market='KRX'):
+        """fdr.StockListing('KRX') 대체: 마지막 봉 기준 시세와 시가총액 (95% 정도가 500억 이상)"""
+        self._count("listing")
+        rng = np.random.default_rng([self.seed, 0])
+        marcaps = rng.lognormal(mean=np.log(4e11), sigma=1.3, size=self.n_tickers)
+        marcaps = np.where(rng.random(self.n_tickers) < 0.95, np.maximum(marcaps, 5.1e10), marcaps * 0.1)
+        order = np.argsort(-marcaps)
+
+        rows = []
+        for i in order:
+            code = self.codes[i]
+            b = self.bars(code)
+            last, prev = b.iloc[-1], b.iloc[-2]
+            rows.append({
+                'Code': code, 'Name': f"합성{code}", 'Market': "KOSPI" if i % 3 else "KOSDAQ",
+                'Close': last.Close, 'Changes': last.Close - prev.Close,
+                'ChagesRatio': round((last.Close / prev.Close - 1) * 100, 2),
+                'Open': last.Open, 'High': last.High, 'Low': last.Low, 'Volume': last.Volume,
+                'Amount': last.Volume * last.Close, 'Marcap': int(marcaps[i]), 'Stocks': int(marcaps[i] // last.Close)
+            })
+        return pd.DataFrame(rows)
+
+    def install(self):
+        """FinanceDataReader 모듈의 DataReader/StockListing을 이 합성 시장으로 바꿔 끼웁니다."""
+        import FinanceDataReader as fdr
+        fdr.DataReader = self.DataReader
+        fdr.StockListing = self.StockListing
+
+
+class OfflineTranslator:
+    """deep_translator.GoogleTranslator 대체: 줄마다 '[대상언어] ' 접두어를 붙여 돌려줍니다."""
+
+    def __init__(self, source='auto', target='ko'):
+        self.target = target
+
+    def translate(self, text=None, **kwargs):
+        return "\n".join(f"[{self.target}] {line}" for line in (text or "").split("\n"))
+
+
+def make_rss(query, items=20):
+    """검색어마다 고정된 합성 Google News RSS 본문"""
+    seed = zlib.crc32(query.encode())
+    entries = []
+    for i in range(items):
+        entries.append(
+            f"<item><title>Synthetic headline {seed % 997}-{i} - Source{i % 5}</title>"
+            f"<link>https://news.example/{seed}/{i}</link>"
+            f"<pubDate>Mon, 01 Jan 2024 00:{i % 60:02d}:00 GMT</pubDate>"
+            f"<source url=\"https://source{i % 5}.example\">Source{i % 5}</source></item>"
+        )
+    return f"<?xml version=\"1.0\"?><rss><channel><title>{seed}</title>{''.join(entries)}</channel></rss>".encode()
+
+
+def start_rss_server(items=20, latency=0.0):
+    """
+    ETag 조건부 요청을 지원하는 로컬 RSS 서버를 백그라운드 스레드로 띄우고 서버 객체를 리턴합니다.
+    news.NEWS_URL = f"http://127.0.0.1:{server.server_port}/rss/search" 로 연결해 씁니다.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            body = make_rss(self.path, items)
+            etag = f'"{zlib.crc32(body)}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml')
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
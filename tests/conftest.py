@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 저장소/캐시 경로는 모듈을 불러올 때 정해지므로 임시 폴더를 먼저 지정 (실제 .cache를 건드리지 않음)
+os.environ["STOCK_CACHE_DIR"] = tempfile.mkdtemp(prefix="stock_test_")
+os.environ["STOCK_DATA_MODE"] = "live"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def market():
+    """네트워크 대신 쓰는 시드 고정 합성 시장 (fdr.DataReader/StockListing을 바꿔 끼움)"""
+    market = synthetic.SyntheticMarket(n_tickers=400, seed=11)
+    market.install()
+    return market
@@ -0,0 +1,58 @@
+"""
+BarStore 보관 기간: 쓸 때마다 오래된 봉을 지우고, 지운 구간을 다시 요청하면 전체 조회로 채우는지 확인합니다.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import bar_store
+
+
+def _fetcher(calls):
+    def fetch(ticker, start, end):
+        calls.append((pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()))
+        index = pd.bdate_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize())
+        close = np.full(len(index), 10000.0)
+        return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000}, index=index)
+    return fetch
+
+
+def _stored(store, ticker):
+    with store._connect() as conn:
+        count, first = conn.execute("SELECT COUNT(*), MIN(date) FROM bars WHERE ticker = ?", (ticker,)).fetchone()
+        covered_from = conn.execute("SELECT covered_from FROM meta WHERE ticker = ?", (ticker,)).fetchone()[0]
+    return count, first, covered_from
+
+
+def test_write_trims_bars_older_than_retention(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "REFRESH_INTERVAL", 0)
+    calls = []
+    store = bar_store.BarStore(str(tmp_path / "bars.sqlite"), fetcher=_fetcher(calls), retention_days=120)
+    today = datetime.now()
+    cutoff = (today - timedelta(days=120)).strftime('%Y-%m-%d')
+
+    # 보관 기간보다 긴 구간을 요청하면 그 구간은 남겨 둠 (스윕 등)
+    store.load("000001", today - timedelta(days=300), today)
+    assert _stored(store, "000001")[1] < cutoff
+
+    # 다음 증분 수집 때 보관 기간 밖의 봉을 지우고 covered_from도 당김
+    store.load("000001", today - timedelta(days=100), today)
+    count, first, covered_from = _stored(store, "000001")
+    assert first >= cutoff and covered_from == cutoff
+    assert store.stats["trimmed"] > 0 and store.stats["full"] == 1
+
+    # 지운 구간을 다시 요청하면 잘린 데이터가 아니라 전체 조회 결과를 돌려줌
+    df = store.load("000001", today - timedelta(days=300), today)
+    assert store.stats["full"] == 2
+    assert df.index[0] <= pd.Timestamp(today - timedelta(days=298)).normalize()
+
+
+def test_zero_retention_keeps_everything(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "REFRESH_INTERVAL", 0)
+    store = bar_store.BarStore(str(tmp_path / "bars.sqlite"), fetcher=_fetcher([]), retention_days=0)
+    today = datetime.now()
+    store.load("000001", today - timedelta(days=300), today)
+    store.load("000001", today - timedelta(days=100), today)
+    assert _stored(store, "000001")[1] < (today - timedelta(days=290)).strftime('%Y-%m-%d')
+    assert store.stats["trimmed"] == 0
@@ -0,0 +1,163 @@
+"""
+최적화 경로가 기존 채점과 같은 결과를 내는지 확인합니다. (합성 시장, 네트워크 없음)
+- 패널 엔진(score_panel, score_history(Bars)) == engine.score_history (길이가 다른 종목을 한 패널에 묶어도 같은 결과)
+- IndicatorState 증분 채점 == engine.score_history (장중 임시 봉 덮어쓰기 포함)
+- 가지치기/사전 필터/top-K 스캔 == 전체 스캔 후 잘라낸 결과
+- 상장 목록 점수 상한 >= 실제 점수 (C조건이 15점을 넘는 경우 포함)
+"""
+import itertools
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+import market_calendar
+import metrics
+import synthetic
+from bars import Bars
+from indicator_state import IndicatorState
+from panel import Panel, score_panel
+
+
+def _history_score(df):
+    df = df.copy()
+    engine.add_moving_averages(df)
+    return engine.score_history(df)
+
+
+def test_panel_engine_matches_score_history(market):
+    codes = list(market.StockListing()['Code'])[:200]
+    # 상장 직후 종목처럼 봉 개수가 제각각이면 패널 왼쪽이 NaN으로 채워짐 (MIN_BARS 미만 종목 포함)
+    frames = {code: market.bars(code)[['Open', 'High', 'Low', 'Close', 'Volume']].iloc[-(40 + i % 120):]
+              for i, code in enumerate(codes)}
+    panel_results = score_panel(Panel.from_frames(frames))
+
+    checked = 0
+    for code, panel_result in zip(codes, panel_results):
+        df = frames[code]
+        if len(df) < 60:
+            assert panel_result[0] == 0
+            continue
+        expected = _history_score(df)
+        assert panel_result == expected, code
+        assert engine.score_history(Bars.from_frame(df, code)) == expected, code
+        checked += 1
+    assert checked > 100
+
+
+@pytest.mark.parametrize("code", ["000003", "000017", "000042"])
+def test_indicator_state_matches_score_history(market, code):
+    df = market.bars(code)[['Open', 'High', 'Low', 'Close', 'Volume']].iloc[-120:]
+    state = IndicatorState.from_frame(df.iloc[:60])
+    assert state.score() == _history_score(df.iloc[:60])
+
+    for i in range(60, len(df)):
+        bar = df.iloc[i]
+        # 장중 임시 봉: 같은 날짜로 먼저 들어왔다가 확정 봉으로 덮어써짐
+        close = float(synthetic.round_to_tick(bar.Close * 0.97))
+        provisional = (bar.Open, max(bar.Open, close), min(bar.Low, close), close, bar.Volume // 2)
+        state.update(df.index[i], *provisional)
+        intraday = df.iloc[:i + 1].copy()
+        intraday.iloc[-1] = provisional
+        assert state.score() == _history_score(intraday), f"{df.index[i].date()} 임시 봉"
+
+        state.update(df.index[i], bar.Open, bar.High, bar.Low, bar.Close, bar.Volume)
+        assert state.score() == _history_score(df.iloc[:i + 1]), f"{df.index[i].date()} 확정 봉"
+
+
+def _top(df, min_score, k):
+    if df.empty:
+        return []
+    df = df[df['적합도 점수'] >= min_score]
+    return list(zip(df['종목코드'], df['적합도 점수']))[:k]
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.parametrize("min_score,top_k", [(0, 5), (60, 10), (90, 5)])
+def test_pruned_scan_matches_full_scan(market, vectorized, min_score, top_k):
+    full = engine.scan_hot_stocks(limit=300, vectorized=vectorized)
+    pruned = engine.scan_hot_stocks(limit=300, vectorized=vectorized, min_score=min_score, top_k=top_k)
+    assert _top(pruned, min_score, top_k) == _top(full, min_score, top_k)
+
+
+def test_prefilter_only_drops_unreachable_names(market):
+    df_cap = engine.get_candidate_tickers().iloc[:300]
+    full = engine.scan_hot_stocks(limit=300)
+    scores = dict(zip(full['종목코드'], full['적합도 점수']))
+
+    before = metrics.get_metrics().export()["counters"].get("prefilter.pruned", 0)
+    kept = engine.prefilter_candidates(df_cap, 90)
+    pruned = metrics.get_metrics().export()["counters"].get("prefilter.pruned", 0) - before
+
+    dropped = set(df_cap.index) - set(kept.index)
+    assert pruned == len(dropped) > 0
+    assert all(scores.get(tk, 0) < 90 for tk in dropped)
+    # 봇 기준(PREFILTER_FLOOR 이하)에서는 목록을 그대로 둠
+    assert engine.prefilter_candidates(df_cap, 70) is df_cap
+
+
+def _limit_down_frame():
+    """+30% 급등 뒤 5봉 연속 하한가: 종가가 20봉 최저가 아래라 C조건이 15점을 넘음 (A10 + B15 + C50.7 + D15)"""
+    close = [20000.0] * 61 + [26000.0]
+    for _ in range(6):
+        close.append(close[-1] * 0.7)
+    close = np.array(close)
+    prev = np.r_[close[0], close[:-1]]
+    high = np.maximum(close, prev)
+    high[-1] = 0.85 * prev[-1]
+    df = pd.DataFrame({'Open': prev, 'High': high, 'Low': np.minimum(close, prev), 'Close': close, 'Volume': 2e6},
+                      index=pd.bdate_range('2024-01-02', periods=len(close)))
+    return engine.add_moving_averages(df)
+
+
+def test_listing_bound_covers_uncapped_rise_score():
+    df = _limit_down_frame()
+    score, details = engine.score_history(df)[:2]
+    assert score == 90.7 and details['C'] == "Pass(50.7점)"
+    assert engine.listing_score_bound(df['Close'].iloc[-1], df['High'].iloc[-1]) >= score
+
+    day = market_calendar.trading_date()
+    fetched_at = datetime.combine(day, market_calendar.MARKET_CLOSE, market_calendar.KST) + timedelta(hours=1)
+    df_cap = pd.DataFrame({'Close': [df['Close'].iloc[-1]], 'High': [df['High'].iloc[-1]]}, index=['999999'])
+    df_cap.attrs['as_of'] = (day, fetched_at)
+    for min_score in (86, 88, 90):
+        assert list(engine.prefilter_candidates(df_cap, min_score).index) == ['999999']
+
+
+def _crash_frames(n, seed=3):
+    """종가가 C조건 창 최저가 아래로 떨어지는 ±30% 가격제한폭 안의 무작위 경로"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2024-01-02', periods=70)
+    for _ in range(n):
+        moves = rng.choice([-0.3, -0.15, 0.0, 0.1, 0.3], size=69, p=[0.3, 0.1, 0.2, 0.2, 0.2])
+        moves[-rng.integers(1, 6):] = -0.3
+        close = 20000.0 * np.cumprod(np.r_[1.0, 1 + moves])
+        prev = np.r_[close[0], close[:-1]]
+        high = np.minimum(np.maximum(close, prev) * rng.uniform(1.0, 1.3, 70), prev * 1.3)
+        df = pd.DataFrame({'Open': prev, 'High': np.maximum(high, close), 'Low': np.minimum(close, prev) * 0.99,
+                           'Close': close, 'Volume': rng.uniform(1e5, 3e6, 70)}, index=index)
+        yield engine.add_moving_averages(df)
+
+
+def test_pruning_bound_covers_uncapped_rise_score():
+    # 가지치기는 C를 채점하기 전 남은 조건 상한(REMAINING_MAX)이 C > 15점인 경우까지 덮어야 안전함
+    uncapped = 0
+    for df in itertools.chain([_limit_down_frame()], _crash_frames(300)):
+        score, details = engine.score_history(df)[:2]
+        points = {k: float(v[5:-2]) for k, v in details.items() if v.startswith("Pass(")}
+        uncapped += points.get('C', 0) > 15
+        partial = 0.0
+        for done in 'ABCDEF':
+            partial += points.get(done, 0)
+            assert partial + engine.REMAINING_MAX[done] >= score - 0.3, (done, details)
+        assert engine.score_history(df, cutoff=score)[0] == score
+    assert uncapped > 0
+
+
+def test_panel_engine_matches_on_uncapped_rise_score():
+    frames = {f"{i:06d}": df[['Open', 'High', 'Low', 'Close', 'Volume']]
+              for i, df in enumerate(itertools.chain([_limit_down_frame()], _crash_frames(100)))}
+    for (code, df), panel_result in zip(frames.items(), score_panel(Panel.from_frames(frames))):
+        assert panel_result == _history_score(df), code
@@ -0,0 +1,38 @@
+import threading
+import time
+
+import metrics
+
+
+class RateLimiter:
+    """
+    여러 스레드가 공유하는 토큰 버킷 방식의 초당 요청 수 제한기입니다.
+    rate: 초당 허용 요청 수, burst: 한 번에 몰아서 허용할 최대 요청 수
+    """
+
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("rate는 0보다 커야 합니다.")
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰이 생길 때까지 기다렸다가 1개를 소모합니다."""
+        started = None
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    if started is not None:
+                        metrics.observe("rate_limit.wait", now - started)
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            if started is None:
+                started = now
+            time.sleep(wait)
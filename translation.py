@@ -0,0 +1,179 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+
+from deep_translator import GoogleTranslator
+
+import metrics
+from bar_store import CACHE_DIR
+
+DB_FILE = "translations.sqlite"
+
+# 보관할 최대 번역 개수 (초과 시 가장 오래 사용하지 않은 것부터 삭제)
+MAX_ENTRIES = 5000
+
+# 번역 API 한 번에 보낼 최대 글자 수 (Google 번역 5,000자 제한 여유)
+BATCH_CHARS = 4500
+SEPARATOR = "\n"
+
+FAILED = "(번역 실패)"
+
+
+def normalize(text):
+    """캐시 키용 제목 정규화: 유니코드 정규화, 공백 정리, 대소문자 통일"""
+    text = unicodedata.normalize('NFKC', text or "")
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class TranslationCache:
+    """(정규화된 제목, 대상 언어)를 키로 번역 결과를 SQLite에 보관하는 크기 제한 캐시입니다."""
+
+    def __init__(self, path=None, max_entries=MAX_ENTRIES):
+        self.path = path or os.path.join(CACHE_DIR, DB_FILE)
+        self.max_entries = max_entries
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS translations (
+                    key TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    used_at REAL NOT NULL,
+                    PRIMARY KEY (key, target)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_used ON translations (used_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, texts, target):
+        """캐시에 있는 번역만 {원문: 번역} 으로 리턴하고 사용 시각을 갱신합니다."""
+        keys = {normalize(t): t for t in texts}
+        found = {}
+        if not keys:
+            return found
+        with self._connect() as conn:
+            placeholders = ",".join("?" * len(keys))
+            rows = conn.execute(
+                f"SELECT key, text FROM translations WHERE target = ? AND key IN ({placeholders})",
+                [target, *keys]
+            ).fetchall()
+            hit_keys = [k for k, _ in rows]
+            if hit_keys:
+                conn.executemany(
+                    "UPDATE translations SET used_at = ? WHERE key = ? AND target = ?",
+                    [(time.time(), k, target) for k in hit_keys]
+                )
+        by_key = dict(rows)
+        for t in texts:
+            k = normalize(t)
+            if k in by_key:
+                found[t] = by_key[k]
+        return found
+
+    def put_many(self, pairs, target):
+        """{원문: 번역} 을 저장하고 최대 개수를 넘으면 오래된 항목부터 지웁니다."""
+        if not pairs:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                [(normalize(src), target, dst, now) for src, dst in pairs.items()]
+            )
+            count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM translations WHERE rowid IN "
+                    "(SELECT rowid FROM translations ORDER BY used_at LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+
+def _batches(texts, limit=BATCH_CHARS):
+    """구분자로 이어 붙였을 때 limit 글자를 넘지 않도록 묶습니다."""
+    batch, size = [], 0
+    for t in texts:
+        if batch and size + len(t) + len(SEPARATOR) > limit:
+            yield batch
+            batch, size = [], 0
+        batch.append(t)
+        size += len(t) + len(SEPARATOR)
+    if batch:
+        yield batch
+
+
+def _translate_batch(translator, batch):
+    """여러 제목을 줄바꿈으로 이어 한 번에 번역하고, 줄 수가 어긋나면 한 건씩 다시 번역합니다."""
+    if len(batch) > 1:
+        try:
+            joined = translator.translate(text=SEPARATOR.join(batch))
+            lines = [line.strip() for line in (joined or "").split(SEPARATOR)]
+            if len(lines) == len(batch) and all(lines):
+                return dict(zip(batch, lines))
+        except Exception as e:
+            print(f"일괄 번역 실패, 개별 번역으로 전환: {e}")
+
+    results = {}
+    for text in batch:
+        try:
+            results[text] = translator.translate(text=text) or FAILED
+        except Exception as e:
+            results[text] = FAILED
+    return results
+
+
+_cache = None
+_lock = threading.Lock()
+
+
+def get_cache():
+    """프로세스 전역에서 공유하는 기본 번역 캐시"""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = TranslationCache()
+        return _cache
+
+
+def translate_titles(titles, target='ko'):
+    """
+    제목 리스트를 번역해 {원문: 번역} 딕셔너리로 리턴합니다.
+    캐시에 있는 제목은 그대로 쓰고, 나머지는 중복을 제거해 묶음 단위로 번역한 뒤 캐시에 저장합니다.
+    번역에 실패한 제목은 "(번역 실패)"로 채우며 캐시하지 않습니다.
+    """
+    unique = list(dict.fromkeys(t for t in titles if t))
+    cache = get_cache()
+    results = cache.get_many(unique, target)
+    metrics.incr("translation.hit", len(results))
+
+    # 정규화 키 기준으로 한 번만 번역
+    misses = {}
+    for t in unique:
+        if t not in results:
+            misses.setdefault(normalize(t), t)
+    if misses:
+        metrics.incr("translation.miss", len(misses))
+        translator = GoogleTranslator(source='auto', target=target)
+        translated = {}
+        with metrics.timer("translation"):
+            for batch in _batches(list(misses.values())):
+                translated.update(_translate_batch(translator, batch))
+        cache.put_many({src: dst for src, dst in translated.items() if dst and dst != FAILED}, target)
+        for t in unique:
+            if t not in results:
+                results[t] = translated.get(misses[normalize(t)], FAILED)
+    return results
@@ -0,0 +1,202 @@
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import market_calendar
+import metrics
+import providers
+from bar_store import CACHE_DIR
+
+# 필터링된 상장 목록 스냅샷 저장 폴더
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "universe")
+
+# 메모리 캐시 유효 시간(초) 및 보관할 스냅샷 개수
+UNIVERSE_TTL = 600
+KEEP_SNAPSHOTS = 5
+
+# 후보 종목 조건: 시가총액 500억 = 50,000,000,000 원
+MIN_MARCAP = 50000000000
+
+
+def fetch_candidate_listing():
+    """
+    FinanceDataReader를 활용하여 KOSPI, KOSDAQ 시장에서 시가총액 500억 이상인 종목의
+    종목코드와 종목명, 시가총액(억) 목록 데이터프레임을 리턴합니다. (네트워크 조회)
+    """
+    # FinanceDataReader 한국 증시 (KRX) 전체 종목 리스트 (제공자 계층 경유: 요청 병합/재시도/기록 재생)
+    df = providers.get_provider().listing('KRX')
+
+    # 'Code', 'Market', 'Marcap' (시가총액, 원), 'Name' 등 컬럼 존재
+    # KOSPI, KOSDAQ 종목만 취합
+    df_filtered = df[(df['Market'].str.contains('KOSPI') | df['Market'].str.contains('KOSDAQ'))]
+
+    # 시가총액 500억 이상
+    df_filtered = df_filtered[df_filtered['Marcap'] >= MIN_MARCAP].copy()
+
+    # 종목코드 코드를 인덱스로
+    df_filtered = df_filtered.set_index('Code')
+
+    # 종목코드별 시가총액 억 단위로 변환해 새 컬럼에 넣기
+    df_filtered['시가총액(억)'] = df_filtered['Marcap'] // 100000000
+
+    return df_filtered
+
+
+class UniverseCache:
+    """
+    후보 종목 목록(필터링된 KRX 상장 목록)을 메모리와 날짜별 디스크 스냅샷으로 캐시합니다.
+    - 메모리 값은 ttl 동안 그대로 사용
+    - 거래일마다 한 번 백그라운드 스레드로 새로 받아 스냅샷 저장
+    - 조회 실패 시 가장 최근 스냅샷으로 대체
+    """
+
+    def __init__(self, ttl=UNIVERSE_TTL, snapshot_dir=SNAPSHOT_DIR, loader=None):
+        self.ttl = ttl
+        self.snapshot_dir = snapshot_dir
+        self.loader = loader or fetch_candidate_listing
+        self._df = None
+        self._df_date = None      # 메모리 값의 기준 거래일
+        self._fetched_at = None   # 메모리 값을 받아온 시각 (KST, 스냅샷이면 파일 수정 시각)
+        self._loaded_at = 0.0
+        self._attempted_date = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _snapshot_path(self, day):
+        return os.path.join(self.snapshot_dir, f"universe_{day.strftime('%Y%m%d')}.csv")
+
+    def _latest_snapshot(self):
+        paths = sorted(glob.glob(os.path.join(self.snapshot_dir, "universe_*.csv")))
+        return paths[-1] if paths else None
+
+    @staticmethod
+    def _read_snapshot(path):
+        return pd.read_csv(path, dtype={'Code': str}, float_precision='round_trip').set_index('Code')
+
+    @staticmethod
+    def _snapshot_mtime(path):
+        return datetime.fromtimestamp(os.path.getmtime(path), market_calendar.KST)
+
+    @staticmethod
+    def _snapshot_date(path):
+        stamp = os.path.basename(path)[len("universe_"):-len(".csv")]
+        return pd.Timestamp(stamp).date()
+
+    def _write_snapshot(self, df, day):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = self._snapshot_path(day)
+        tmp = path + ".tmp"
+        df.to_csv(tmp)
+        os.replace(tmp, path)
+
+        # 오래된 스냅샷 정리
+        paths = sorted(glob.glob(os.path.join(self.snapshot_dir, "universe_*.csv")))
+        for old in paths[:-KEEP_SNAPSHOTS]:
+            os.remove(old)
+
+    def _set(self, df, day, fetched_at):
+        # 목록과 기준 시점을 한 객체로 묶어 둠: get()이 돌려준 복사본(df.attrs)에 같이 따라가므로
+        # 그 사이 백그라운드 갱신이 값을 바꿔도 다른 목록의 기준 시점을 읽을 일이 없음
+        df.attrs['as_of'] = (day, fetched_at)
+        with self._lock:
+            self._df = df
+            self._df_date = day
+            self._fetched_at = fetched_at
+            self._loaded_at = time.monotonic()
+
+    @property
+    def as_of(self):
+        """(기준 거래일, 받아온 시각 KST) - 아직 값이 없으면 (None, None)"""
+        with self._lock:
+            return self._df_date, self._fetched_at
+
+    def refresh(self):
+        """상장 목록을 새로 받아 메모리와 스냅샷을 갱신합니다. 실패 시 False를 리턴합니다."""
+        day = market_calendar.trading_date()
+        try:
+            with metrics.timer("universe.fetch"):
+                df = self.loader()
+            if df.empty:
+                raise ValueError("빈 상장 목록")
+        except Exception as e:
+            metrics.incr("universe.fetch_error")
+            print(f"시가총액 데이터 수집 실패: {e}")
+            return False
+
+        try:
+            self._write_snapshot(df, day)
+        except OSError as e:
+            print(f"상장 목록 스냅샷 저장 실패: {e}")
+        self._set(df, day, market_calendar.now_kst())
+        return True
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self):
+        """후보 종목 목록을 리턴합니다. (종목코드 인덱스, 원본 목록 컬럼 + '시가총액(억)')"""
+        day = market_calendar.trading_date()
+
+        with self._lock:
+            fresh = self._df is not None and time.monotonic() - self._loaded_at < self.ttl
+            if fresh and self._df_date == day:
+                metrics.incr("universe.memory_hit")
+                return self._df.copy()
+
+        # 오늘자 스냅샷이 디스크에 있으면 그대로 사용 (다른 프로세스가 받아둔 경우 포함)
+        path = self._snapshot_path(day)
+        if os.path.exists(path):
+            try:
+                self._set(self._read_snapshot(path), day, self._snapshot_mtime(path))
+                metrics.incr("universe.snapshot_hit")
+                return self._df.copy()
+            except Exception as e:
+                print(f"상장 목록 스냅샷 읽기 실패: {e}")
+
+        # 이전 거래일 데이터라도 있으면 먼저 돌려주고, 갱신은 거래일당 한 번 백그라운드로
+        if self._df is None:
+            latest = self._latest_snapshot()
+            if latest:
+                try:
+                    self._set(self._read_snapshot(latest), self._snapshot_date(latest), self._snapshot_mtime(latest))
+                except Exception as e:
+                    print(f"상장 목록 스냅샷 읽기 실패: {e}")
+
+        if self._df is not None:
+            with self._lock:
+                start = not self._refreshing and self._attempted_date != day
+                if start:
+                    self._refreshing = True
+                    self._attempted_date = day
+            if start:
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+            metrics.incr("universe.stale")
+            return self._df.copy()
+
+        # 캐시도 스냅샷도 없으면 직접 받아옴
+        with self._lock:
+            self._attempted_date = day
+        if self.refresh():
+            return self._df.copy()
+        return pd.DataFrame()
+
+
+_default_cache = UniverseCache()
+
+
+def get_universe():
+    """프로세스 전역에서 공유하는 후보 종목 목록"""
+    return _default_cache.get()
+
+
+def listing_as_of(df):
+    """get_universe가 돌려준 목록(또는 그 일부)의 (기준 거래일, 받아온 시각 KST) - 모르면 (None, None)"""
+    return df.attrs.get('as_of', (None, None))